@@ -0,0 +1,113 @@
+"""
+Набор бенчмарков целиком: нагрузка на локальный App, микробенчмарки и
+память гидрации ORM; результаты — JSON, графики и сравнение с базой.
+
+    python -m benchmarks run --out results/base.json            # полный прогон
+    python -m benchmarks run --quick --baseline results/base.json
+    python -m benchmarks compare results/base.json results/new.json --threshold 0.05
+    python -m benchmarks plot results/base.json results/new.json --out results/cmp.png
+
+compare (и run с --baseline) завершается с кодом 1, если какая-то
+метрика ухудшилась больше чем на threshold — так прогон можно поставить
+в CI. Числа сильно зависят от машины: сравнивать имеет смысл прогоны на
+одном и том же железе.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from . import bench_load, bench_micro, bench_orm_hydrate
+from .results import Results, compare, format_comparison, plot
+
+SUITES = ("load", "micro", "memory")
+
+# (requests, concurrency, rows для гидрации, min_time микробенчмарков)
+PRESETS = {
+    "full": (20000, 64, 200_000, 0.2),
+    "quick": (3000, 32, 20_000, 0.05),
+}
+
+
+def run_suite(suites=SUITES, quick: bool = False) -> Results:
+    requests, concurrency, rows, min_time = PRESETS["quick" if quick else "full"]
+    results = Results()
+    results.meta["preset"] = "quick" if quick else "full"
+    if "load" in suites:
+        for path, keep_alive in (("/", True), ("/", False), ("/sync", True), ("/payload", True)):
+            bench_load.run(results, requests, concurrency, keep_alive, path, payload_size=64 * 1024)
+        bench_load.run(results, requests, concurrency, True, "/echo", method="POST", body_size=4096)
+    if "micro" in suites:
+        bench_micro.run(results, min_time=min_time)
+    if "memory" in suites:
+        bench_orm_hydrate.record(results, rows, os.path.join(tempfile.mkdtemp(), "bench_hydrate.db"))
+    return results
+
+
+def _compare(baseline: Results, current: Results, threshold: float) -> int:
+    rows, regressions = compare(baseline, current, threshold)
+    print(format_comparison(rows, threshold))
+    if baseline.meta.get("platform") != current.meta.get("platform"):
+        print("warning: results come from different platforms", file=sys.stderr)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="miniweb benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="прогнать бенчмарки и сохранить JSON")
+    run_p.add_argument("--suite", action="append", choices=SUITES,
+                       help="только указанные наборы (можно несколько раз)")
+    run_p.add_argument("--quick", action="store_true", help="малые размеры для быстрой проверки")
+    run_p.add_argument("--out", default=None,
+                       help="файл результатов (по умолчанию benchmarks/results/<время>.json)")
+    run_p.add_argument("--baseline", default=None, help="сравнить с этим файлом")
+    run_p.add_argument("--threshold", type=float, default=0.10)
+    run_p.add_argument("--plot", default=None, help="сохранить график (PNG, нужен matplotlib)")
+
+    cmp_p = sub.add_parser("compare", help="сравнить два файла результатов")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=0.10)
+
+    plot_p = sub.add_parser("plot", help="график по одному или нескольким файлам")
+    plot_p.add_argument("files", nargs="+")
+    plot_p.add_argument("--out", default="benchmarks.png")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_suite(args.suite or SUITES, args.quick)
+        print(results.report())
+        out = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                       time.strftime("%Y%m%d-%H%M%S") + ".json")
+        results.save(out)
+        print(f"saved {out}")
+        runs = [("current", results)]
+        code = 0
+        if args.baseline:
+            baseline = Results.load(args.baseline)
+            runs.insert(0, ("baseline", baseline))
+            code = _compare(baseline, results, args.threshold)
+        if args.plot and not plot(runs, args.plot):
+            print("matplotlib is not installed, plot skipped", file=sys.stderr)
+        return code
+
+    if args.command == "compare":
+        return _compare(Results.load(args.baseline), Results.load(args.current), args.threshold)
+
+    runs = [(os.path.splitext(os.path.basename(path))[0], Results.load(path)) for path in args.files]
+    if not plot(runs, args.out):
+        print("matplotlib is not installed", file=sys.stderr)
+        return 1
+    print(f"saved {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Сравнение пропускной способности App с переиспользованием соединений
+(HTTP/1.1 keep-alive) и без него.
+
+Запуск:  python -m benchmarks.bench_keepalive --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+from miniweb.core.server import App
+
+
+REQUEST_KEEP_ALIVE = b"GET / HTTP/1.1\r\nHost: bench\r\n\r\n"
+REQUEST_CLOSE = b"GET / HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n"
+
+
+def make_app() -> App:
+    app = App(max_requests_per_connection=1_000_000)
+
+    @app.route("/")
+    def index(request):
+        return "ok"
+
+    return app
+
+
+async def _read_response(reader: asyncio.StreamReader) -> None:
+    head = await reader.readuntil(b"\r\n\r\n")
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            await reader.readexactly(int(line.split(b":", 1)[1]))
+            return
+
+
+async def _worker_reuse(port: int, count: int) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for _ in range(count):
+        writer.write(REQUEST_KEEP_ALIVE)
+        await writer.drain()
+        await _read_response(reader)
+    writer.close()
+
+
+async def _worker_no_reuse(port: int, count: int) -> None:
+    for _ in range(count):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(REQUEST_CLOSE)
+        await writer.drain()
+        await _read_response(reader)
+        writer.close()
+
+
+async def run(total: int, concurrency: int) -> dict:
+    app = make_app()
+    server = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    per_worker = max(1, total // concurrency)
+    results = {}
+    async with server:
+        for name, worker in (("no-reuse", _worker_no_reuse), ("keep-alive", _worker_reuse)):
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(port, per_worker) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+            results[name] = per_worker * concurrency / elapsed
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="keep-alive vs new connection per request")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.concurrency))
+    for name, rps in results.items():
+        print(f"{name:>10}: {rps:10.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Нагрузочный генератор на asyncio против App, запущенного локально в
+отдельном процессе (сервер и клиент не делят одно ядро и один event loop).
+
+    python -m benchmarks.bench_load --concurrency 64 --requests 20000
+    python -m benchmarks.bench_load --path /payload --payload-size 65536
+    python -m benchmarks.bench_load --path /echo --body-size 4096 --no-keep-alive
+    python -m benchmarks.bench_load --workers 4 --json results/load.json
+
+Маршруты тестового приложения: / (inline), /sync (пул потоков),
+/payload (async, тело --payload-size байт), POST /echo (async, читает и
+возвращает тело запроса). Печатает req/s, перцентили задержки и ошибки.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import time
+from typing import List, Optional
+
+from miniweb.core.server import App
+from miniweb.core.workers import create_listen_socket
+
+from .results import LOWER, Results
+
+
+def make_app(payload_size: int = 1024) -> App:
+    app = App(max_requests_per_connection=1_000_000, thread_queue_limit=0)
+    payload = b"x" * payload_size
+
+    @app.route("/", inline=True)
+    def index(request):
+        return "ok"
+
+    @app.route("/sync")
+    def sync(request):
+        return "ok"
+
+    @app.route("/payload")
+    async def body(request):
+        return payload
+
+    @app.route("/echo", method="POST")
+    async def echo(request):
+        return request.body
+
+    return app
+
+
+def _serve(sock: socket.socket, payload_size: int) -> None:
+    make_app(payload_size).serve_worker(sock)
+
+
+def start_server(payload_size: int = 1024, workers: int = 1):
+    """
+    Поднимает App в workers дочерних процессах на общем слушающем сокете
+    (свободный порт); возвращает (processes, port).
+    """
+    sock = create_listen_socket("127.0.0.1", 0, backlog=1024)
+    port = sock.getsockname()[1]
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_serve, args=(sock, payload_size), daemon=True) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    sock.close()
+    return procs, port
+
+
+def stop_server(procs) -> None:
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        proc.join(5)
+        if proc.is_alive():
+            proc.kill()
+
+
+def _build_request(method: str, path: str, body: bytes, keep_alive: bool) -> bytes:
+    head = [f"{method} {path} HTTP/1.1", "Host: bench"]
+    if body:
+        head.append(f"Content-Length: {len(body)}")
+    if not keep_alive:
+        head.append("Connection: close")
+    return ("\r\n".join(head) + "\r\n\r\n").encode() + body
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head[9:12])
+    length = None
+    chunked = False
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"transfer-encoding" and b"chunked" in value.lower():
+            chunked = True
+    if length is not None:
+        await reader.readexactly(length)
+    elif chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+    return status
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.statuses: dict = {}
+
+    def percentile(self, p: float) -> float:
+        data = sorted(self.latencies)
+        if not data:
+            return 0.0
+        return data[min(len(data) - 1, int(len(data) * p))]
+
+
+async def _client(port: int, request: bytes, keep_alive: bool, budget: list,
+                  deadline: Optional[float], stats: LoadStats) -> None:
+    reader = writer = None
+    loop = asyncio.get_running_loop()
+    try:
+        while budget[0] > 0 and (deadline is None or loop.time() < deadline):
+            budget[0] -= 1
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(request)
+                await writer.drain()
+                status = await _read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                stats.errors += 1
+                if writer is not None:
+                    writer.close()
+                reader = writer = None
+                continue
+            stats.latencies.append(time.perf_counter() - started)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def generate_load(port: int, requests: int = 10000, concurrency: int = 50,
+                        keep_alive: bool = True, path: str = "/", method: str = "GET",
+                        body_size: int = 0, duration: Optional[float] = None) -> dict:
+    """
+    concurrency клиентов шлют запросы, пока не разойдётся общий бюджет
+    requests (или не истечёт duration секунд). Каждый клиент держит одно
+    соединение (keep_alive) или открывает новое на каждый запрос.
+    """
+    request = _build_request(method, path, b"b" * body_size, keep_alive)
+    stats = LoadStats()
+    budget = [requests if duration is None else float("inf")]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration if duration is not None else None
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(port, request, keep_alive, budget, deadline, stats)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done = len(stats.latencies)
+    return {
+        "requests": done,
+        "errors": stats.errors,
+        "seconds": elapsed,
+        "rps": done / elapsed if elapsed else 0.0,
+        "p50_ms": stats.percentile(0.50) * 1000,
+        "p90_ms": stats.percentile(0.90) * 1000,
+        "p99_ms": stats.percentile(0.99) * 1000,
+        "statuses": stats.statuses,
+    }
+
+
+def run(results: Results, requests: int = 10000, concurrency: int = 50, keep_alive: bool = True,
+        path: str = "/", method: str = "GET", payload_size: int = 1024, body_size: int = 0,
+        duration: Optional[float] = None, workers: int = 1, name: Optional[str] = None) -> dict:
+    procs, port = start_server(payload_size, workers)
+    try:
+        summary = asyncio.run(_wait_and_load(port, requests, concurrency, keep_alive,
+                                             path, method, body_size, duration))
+    finally:
+        stop_server(procs)
+    name = name or f"{path.strip('/') or 'index'}[c{concurrency},{'keepalive' if keep_alive else 'close'}]"
+    results.add(f"load.rps.{name}", summary["rps"], "req/s")
+    results.add(f"load.p50.{name}", summary["p50_ms"], "ms", LOWER)
+    results.add(f"load.p99.{name}", summary["p99_ms"], "ms", LOWER)
+    return summary
+
+
+async def _wait_and_load(port, *args) -> dict:
+    # дочерний процесс мог ещё не дойти до accept — сокет уже слушает,
+    # так что достаточно одного пробного запроса
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(_build_request("GET", "/", b"", False))
+    await _read_response(reader)
+    writer.close()
+    return await generate_load(port, *args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="asyncio load generator against a local App")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--duration", type=float, default=None,
+                        help="секунд нагрузки (вместо --requests)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--no-keep-alive", action="store_true", help="новое соединение на запрос")
+    parser.add_argument("--path", default="/", choices=["/", "/sync", "/payload", "/echo"])
+    parser.add_argument("--payload-size", type=int, default=1024, help="размер тела ответа /payload")
+    parser.add_argument("--body-size", type=int, default=1024, help="размер тела запроса для /echo")
+    parser.add_argument("--workers", type=int, default=1, help="процессов сервера")
+    parser.add_argument("--json", default=None, help="сохранить результаты в файл")
+    args = parser.parse_args()
+
+    results = Results()
+    echo = args.path == "/echo"
+    summary = run(results, args.requests, args.concurrency, not args.no_keep_alive, args.path,
+                  "POST" if echo else "GET", args.payload_size, args.body_size if echo else 0,
+                  args.duration, args.workers)
+    print(f"requests: {summary['requests']}  errors: {summary['errors']}  "
+          f"time: {summary['seconds']:.2f} s  statuses: {summary['statuses']}")
+    print(f"throughput: {summary['rps']:.0f} req/s")
+    print(f"latency ms: p50 {summary['p50_ms']:.2f}  p90 {summary['p90_ms']:.2f}  "
+          f"p99 {summary['p99_ms']:.2f}")
+    if args.json:
+        results.save(args.json)
+
+
+if __name__ == "__main__":
+    main()
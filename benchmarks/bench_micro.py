@@ -0,0 +1,157 @@
+"""
+Микробенчмарки горячих путей: Router.match, разбор головы запроса,
+Model.get / Model.all / save и render_template. Всё работает без сети,
+БД — временный файл SQLite.
+
+Запуск:  python -m benchmarks.bench_micro [--only router,parser] [--json results/micro.json]
+
+Каждый замер — лучший из --repeat прогонов; число итераций подбирается
+так, чтобы прогон длился не меньше --min-time секунд (как timeit -r/-n).
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable
+
+from miniweb.core.parser import parse_request_head
+from miniweb.core.router import Router
+from miniweb.orm import identity_map
+from miniweb.orm.fields import IntegerField, StringField
+from miniweb.orm.models import Model
+from miniweb.templates import init_template_engine, render_template
+
+from .results import Results
+
+GROUPS = ("router", "parser", "orm", "templates")
+
+BROWSER_REQUEST = (
+    b"GET /api/v1/resource42/1337/items/item-42?page=2&sort=title HTTP/1.1\r\n"
+    b"Host: localhost:8000\r\n"
+    b"User-Agent: Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0\r\n"
+    b"Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8\r\n"
+    b"Accept-Language: ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3\r\n"
+    b"Accept-Encoding: gzip, deflate, br\r\n"
+    b"Connection: keep-alive\r\n"
+    b"Cookie: session=0123456789abcdef; theme=dark\r\n"
+    b"Upgrade-Insecure-Requests: 1\r\n"
+    b"\r\n"
+)
+
+
+class MicroRow(Model):
+    title = StringField()
+    pages = IntegerField(default=0)
+
+
+def measure(func: Callable[[], object], min_time: float = 0.2, repeat: int = 3) -> float:
+    """Операций в секунду для func (лучший прогон)."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - started)
+    return number / best
+
+
+def bench_router(results: Results, min_time: float, repeat: int) -> None:
+    for count in (10, 100, 1000):
+        for cache_size, label in ((0, "nocache"), (1024, "lru")):
+            router = Router(cache_size=cache_size)
+            for i in range(count):
+                router.add_route("GET", f"/api/v1/resource{i}/<int:id>/items/<str:slug>", lambda r, **p: None)
+            router.add_route("GET", "/static/page", lambda r: None)
+            path = f"/api/v1/resource{count // 2}/1337/items/item-{count // 2}"
+            results.add(f"micro.router.match[{count},{label}]",
+                        measure(lambda: router.match("GET", path), min_time, repeat), "ops/s")
+    results.add("micro.router.match[static]",
+                measure(lambda: router.match("GET", "/static/page"), min_time, repeat), "ops/s")
+
+
+def bench_parser(results: Results, min_time: float, repeat: int) -> None:
+    results.add("micro.parser.request_head[browser]",
+                measure(lambda: parse_request_head(BROWSER_REQUEST), min_time, repeat), "ops/s")
+    minimal = b"GET / HTTP/1.1\r\nHost: x\r\n\r\n"
+    results.add("micro.parser.request_head[minimal]",
+                measure(lambda: parse_request_head(minimal), min_time, repeat), "ops/s")
+
+
+def bench_orm(results: Results, min_time: float, repeat: int, rows: int = 1000) -> None:
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_micro.db")
+    Model.connect(db_path)
+    MicroRow.create_table()
+    MicroRow.bulk_create(MicroRow(title=f"row {i}", pages=i) for i in range(rows))
+    pk = rows // 2
+
+    results.add("micro.orm.get[db]", measure(lambda: MicroRow.get(pk), min_time, repeat), "ops/s")
+    with identity_map():
+        MicroRow.get(pk)
+        results.add("micro.orm.get[identity_map]",
+                    measure(lambda: MicroRow.get(pk), min_time, repeat), "ops/s")
+    MicroRow.enable_row_cache(max_size=rows)
+    results.add("micro.orm.get[row_cache]", measure(lambda: MicroRow.get(pk), min_time, repeat), "ops/s")
+    MicroRow._row_cache = None
+
+    results.add(f"micro.orm.all[{rows}]", measure(MicroRow.all, min_time, repeat), "ops/s")
+
+    obj = MicroRow.get(pk)
+    results.add("micro.orm.save[update]", measure(obj.save, min_time, repeat), "ops/s")
+    results.add("micro.orm.save[insert]",
+                measure(lambda: MicroRow(title="new", pages=1).save(), min_time, repeat), "ops/s")
+    Model._pool.close()
+    Model._pool = None
+
+
+def bench_templates(results: Results, min_time: float, repeat: int) -> None:
+    directory = tempfile.mkdtemp()
+    with open(os.path.join(directory, "list.html"), "w", encoding="utf-8") as f:
+        f.write("<h1>{{ title }}</h1><ul>{% for item in items %}"
+                "<li><a href=\"/items/{{ item.id }}\">{{ item.title }}</a> {{ item.pages }}</li>"
+                "{% endfor %}</ul>")
+    items = [{"id": i, "title": f"Книга <{i}>", "pages": i * 3} for i in range(100)]
+    for production in (False, True):
+        init_template_engine(templates_dir=directory, production=production, bytecode_cache="memory")
+        label = "production" if production else "dev"
+        results.add(f"micro.templates.render[100 items,{label}]",
+                    measure(lambda: render_template("list.html", {"title": "Список", "items": items}),
+                            min_time, repeat), "ops/s")
+
+
+def run(results: Results, groups=GROUPS, min_time: float = 0.2, repeat: int = 3) -> Results:
+    benches = {"router": bench_router, "parser": bench_parser,
+               "orm": bench_orm, "templates": bench_templates}
+    for group in groups:
+        benches[group](results, min_time, repeat)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="micro-benchmarks: router, parser, ORM, templates")
+    parser.add_argument("--only", default=",".join(GROUPS), help="группы через запятую")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", default=None, help="сохранить результаты в файл")
+    args = parser.parse_args()
+
+    groups = [g for g in args.only.split(",") if g]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"неизвестные группы: {', '.join(sorted(unknown))}")
+    results = run(Results(), groups, args.min_time, args.repeat)
+    print(results.report())
+    if args.json:
+        results.save(args.json)
+
+
+if __name__ == "__main__":
+    main()
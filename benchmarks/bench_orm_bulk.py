@@ -0,0 +1,64 @@
+"""
+Загрузка N строк в SQLite: построчный save() (commit на каждую строку)
+против Model.bulk_create (executemany в одной транзакции).
+
+Запуск:  python -m benchmarks.bench_orm_bulk --rows 100000
+Построчный вариант очень медленный на диске, поэтому по умолчанию он
+замеряется на --save-rows строк и экстраполируется.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from miniweb.orm.fields import IntegerField, StringField
+from miniweb.orm.models import Model
+
+
+class BenchRow(Model):
+    title = StringField()
+    pages = IntegerField(default=0)
+
+
+def _fresh_db(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+    Model.connect(path)
+    BenchRow.create_table()
+
+
+def run(rows: int, save_rows: int, db_path: str) -> dict:
+    _fresh_db(db_path)
+    started = time.perf_counter()
+    for i in range(save_rows):
+        BenchRow(title=f"row {i}", pages=i).save()
+    per_row_save = (time.perf_counter() - started) / save_rows
+
+    _fresh_db(db_path)
+    objs = [BenchRow(title=f"row {i}", pages=i) for i in range(rows)]
+    started = time.perf_counter()
+    BenchRow.bulk_create(objs, batch_size=5000)
+    bulk = time.perf_counter() - started
+    assert BenchRow.objects.count() == rows
+
+    save_total = per_row_save * rows
+    return {"rows": rows, "save_s": save_total, "bulk_s": bulk, "speedup": save_total / bulk}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="save() loop vs bulk_create")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--save-rows", type=int, default=2000)
+    parser.add_argument("--db", default=None, help="файл БД (по умолчанию временный)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "bench_bulk.db")
+    result = run(args.rows, min(args.save_rows, args.rows), db_path)
+    print(f"rows:            {result['rows']}")
+    print(f"save() loop:     {result['save_s']:.2f} s (экстраполяция)")
+    print(f"bulk_create:     {result['bulk_s']:.2f} s")
+    print(f"speedup:         {result['speedup']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
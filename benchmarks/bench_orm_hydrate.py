@@ -0,0 +1,144 @@
+"""
+Гидрация N строк в объекты модели: прежний путь (sqlite3.Row, cls() и
+setattr по каждому полю с поиском индекса через row.keys()) против
+Model._from_values (кортеж строки, без __init__) для обычной модели и
+модели с Meta.slots = True. Для каждого варианта печатает время, пик
+памяти под список объектов (tracemalloc) и прирост RSS процесса (если
+установлен psutil).
+
+Запуск:  python -m benchmarks.bench_orm_hydrate --rows 1000000 [--json results/hydrate.json]
+"""
+import argparse
+import gc
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from miniweb.orm.fields import BooleanField, FloatField, IntegerField, StringField
+from miniweb.orm.models import Model
+
+from .results import LOWER, Results
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class HydrateRow(Model):
+    title = StringField()
+    pages = IntegerField(default=0)
+    price = FloatField(default=0.0)
+    in_stock = BooleanField(default=True)
+
+
+class SlottedHydrateRow(Model):
+    title = StringField()
+    pages = IntegerField(default=0)
+    price = FloatField(default=0.0)
+    in_stock = BooleanField(default=True)
+
+    class Meta:
+        table_name = "hydraterow"
+        slots = True
+
+
+def _legacy_hydrate(cls, rows):
+    objects = []
+    for row in rows:
+        obj = cls()
+        for fname, field in cls._fields.items():
+            if field.column_name in row.keys():
+                setattr(obj, fname, row[field.column_name])
+        objects.append(obj)
+    return objects
+
+
+def _fast_hydrate(cls, rows):
+    return list(map(cls._from_values, rows))
+
+
+def _rss() -> int:
+    return psutil.Process().memory_info().rss if psutil is not None else 0
+
+
+def _measure(key, label, fetch, hydrate):
+    rows = fetch()
+    gc.collect()
+    rss_before = _rss()
+    tracemalloc.start()
+    started = time.perf_counter()
+    objects = hydrate(rows)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_growth = _rss() - rss_before
+    assert len(objects) == len(rows)
+    del objects, rows
+    gc.collect()
+    return {"key": key, "variant": label, "seconds": elapsed, "peak_mb": peak / 2**20,
+            "rss_mb": rss_growth / 2**20 if psutil is not None else None}
+
+
+def run(rows: int, db_path: str) -> list:
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    Model.connect(db_path)
+    HydrateRow.create_table()
+    HydrateRow.bulk_create(
+        (HydrateRow(title=f"row {i}", pages=i, price=i / 10, in_stock=i % 2) for i in range(rows)),
+        batch_size=10_000,
+    )
+    sql = HydrateRow._sql["select"]
+
+    def fetch_rows():
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        return conn.execute(sql).fetchall()
+
+    def fetch_tuples():
+        return Model._connection.execute(sql).fetchall()
+
+    # tracemalloc замедляет все варианты одинаково; время — для сравнения
+    return [
+        _measure("legacy", "legacy Row + setattr", fetch_rows, lambda r: _legacy_hydrate(HydrateRow, r)),
+        _measure("fast", "tuple + _from_values", fetch_tuples, lambda r: _fast_hydrate(HydrateRow, r)),
+        _measure("slots", "tuple + slots", fetch_tuples, lambda r: _fast_hydrate(SlottedHydrateRow, r)),
+    ]
+
+
+def record(results: Results, rows: int, db_path: str) -> list:
+    measured = run(rows, db_path)
+    for r in measured:
+        prefix, key = f"memory.hydrate[{rows}]", r["key"]
+        results.add(f"{prefix}.seconds.{key}", r["seconds"], "s", LOWER)
+        results.add(f"{prefix}.peak.{key}", r["peak_mb"], "MiB", LOWER)
+        if r["rss_mb"] is not None:
+            results.add(f"{prefix}.rss.{key}", r["rss_mb"], "MiB", LOWER)
+    return measured
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ORM row hydration: legacy vs fast path")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default=None, help="файл БД (по умолчанию временный)")
+    parser.add_argument("--json", default=None, help="сохранить результаты в файл")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "bench_hydrate.db")
+    results = Results()
+    measured = record(results, args.rows, db_path)
+    base = measured[0]["seconds"]
+    print(f"rows: {args.rows}")
+    for r in measured:
+        rss = f"  rss +{r['rss_mb']:.1f} MiB" if r["rss_mb"] is not None else ""
+        print(f"{r['variant']:<22} {r['seconds']:7.2f} s  {r['peak_mb']:8.1f} MiB  "
+              f"x{base / r['seconds']:.1f}{rss}")
+    if args.json:
+        results.save(args.json)
+
+
+if __name__ == "__main__":
+    main()
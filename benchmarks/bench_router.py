@@ -0,0 +1,93 @@
+"""
+Микробенчмарк Router.match: префиксное дерево против прежнего линейного
+перебора регулярных выражений на 10, 100 и 1000 параметризованных маршрутах.
+
+Запуск:  python -m benchmarks.bench_router
+"""
+import argparse
+import random
+import re
+import timeit
+from collections import defaultdict
+
+from miniweb.core.router import Router
+
+
+class LegacyRouter:
+    """Прежняя реализация: по одному re.Pattern.match на маршрут."""
+
+    def __init__(self):
+        self.static = defaultdict(dict)
+        self.dynamic = defaultdict(list)
+
+    def add_route(self, method, path, handler):
+        method = method.upper()
+        if "<" not in path:
+            self.static[method][path] = handler
+            return
+        parts = []
+        converters = {}
+        for segment in path.strip("/").split("/"):
+            if segment.startswith("<") and segment.endswith(">"):
+                typ, name = segment[1:-1].split(":", 1)
+                if typ == "int":
+                    regex, converters[name] = rf"(?P<{name}>\d+)", int
+                elif typ == "float":
+                    regex, converters[name] = rf"(?P<{name}>[\d.]+)", float
+                elif typ == "path":
+                    regex, converters[name] = rf"(?P<{name}>.+)", str
+                else:
+                    regex, converters[name] = rf"(?P<{name}>[^/]+)", str
+                parts.append(regex)
+            else:
+                parts.append(re.escape(segment))
+        self.dynamic[method].append((re.compile("^/" + "/".join(parts) + "$"), handler, converters))
+
+    def match(self, method, path):
+        method = method.upper()
+        if path in self.static[method]:
+            return self.static[method][path], {}
+        for pattern, handler, conv in self.dynamic[method]:
+            m = pattern.match(path)
+            if m:
+                return handler, {k: conv[k](v) for k, v in m.groupdict().items()}
+        raise FileNotFoundError(path)
+
+
+def build(router_cls, count: int, **kwargs):
+    router = router_cls(**kwargs)
+    paths = []
+    for i in range(count):
+        router.add_route("GET", f"/api/v1/resource{i}/<int:id>/items/<str:slug>", lambda r, **p: None)
+        paths.append(f"/api/v1/resource{i}/{i * 7}/items/item-{i}")
+    return router, paths
+
+
+def bench(count: int, lookups: int, seed: int = 0) -> dict:
+    rnd = random.Random(seed)
+    results = {}
+    variants = (
+        ("regex scan", LegacyRouter, {}),
+        ("trie, no cache", Router, {"cache_size": 0}),
+        ("trie + LRU", Router, {}),
+    )
+    for name, cls, kwargs in variants:
+        router, paths = build(cls, count, **kwargs)
+        sample = [rnd.choice(paths) for _ in range(lookups)]
+        elapsed = timeit.timeit(lambda: [router.match("GET", p) for p in sample], number=1)
+        results[name] = lookups / elapsed
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Router.match micro-benchmark")
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+    for count in (10, 100, 1000):
+        results = bench(count, args.lookups)
+        line = "  ".join(f"{name}: {ops:>10.0f} ops/s" for name, ops in results.items())
+        print(f"{count:>5} routes | {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Результаты бенчмарков: сохранение в JSON, сравнение с базовым прогоном
+и графики.
+
+Файл результатов:
+
+    {"meta": {"python": ..., "platform": ..., "commit": ..., "created": ...},
+     "results": {"micro.router.match[100]": {"value": 812345.0, "unit": "ops/s",
+                                              "better": "higher"}, ...}}
+
+Для каждой метрики указано, какое направление — улучшение ("higher" для
+ops/s и req/s, "lower" для секунд и мегабайт), так что compare() не
+нужно знать, откуда метрика взялась.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+HIGHER = "higher"
+LOWER = "lower"
+
+
+class Results:
+    """Набор метрик одного прогона."""
+
+    def __init__(self, meta: Optional[dict] = None) -> None:
+        self.meta = meta if meta is not None else _environment()
+        self.metrics: Dict[str, dict] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str = HIGHER) -> None:
+        self.metrics[name] = {"value": value, "unit": unit, "better": better}
+
+    def to_dict(self) -> dict:
+        return {"meta": self.meta, "results": self.metrics}
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+    @classmethod
+    def load(cls, path: str) -> "Results":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        results = cls(data.get("meta", {}))
+        results.metrics = data["results"]
+        return results
+
+    def report(self) -> str:
+        width = max((len(name) for name in self.metrics), default=0)
+        return "\n".join(f"{name:<{width}}  {_format(m['value'])} {m['unit']}"
+                         for name, m in self.metrics.items())
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def _format(value: float) -> str:
+    return f"{value:,.0f}" if abs(value) >= 100 else f"{value:.4g}"
+
+
+def compare(baseline: Results, current: Results,
+            threshold: float = 0.10) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Сравнивает общие метрики. Возвращает (rows, regressions), где строка —
+    (имя, было, стало, относительное изменение в сторону улучшения).
+    Регрессия — ухудшение больше threshold (0.10 — на 10%).
+    """
+    rows, regressions = [], []
+    for name, new in current.metrics.items():
+        old = baseline.metrics.get(name)
+        if old is None or not old["value"]:
+            continue
+        change = (new["value"] - old["value"]) / old["value"]
+        if new.get("better", HIGHER) == LOWER:
+            change = -change
+        row = (name, old["value"], new["value"], change)
+        rows.append(row)
+        if change < -threshold:
+            regressions.append(row)
+    return rows, regressions
+
+
+def format_comparison(rows: List[tuple], threshold: float) -> str:
+    width = max((len(row[0]) for row in rows), default=0)
+    lines = []
+    for name, old, new, change in rows:
+        mark = "REGRESSION" if change < -threshold else ("improved" if change > threshold else "")
+        lines.append(f"{name:<{width}}  {_format(old):>14} -> {_format(new):>14}  "
+                     f"{change * 100:+7.1f}%  {mark}")
+    return "\n".join(lines)
+
+
+def plot(runs: List[Tuple[str, Results]], path: str) -> bool:
+    """
+    Столбчатые диаграммы в PNG: по графику на группу метрик (имя без
+    последней части после точки), по столбцу на прогон. Без matplotlib
+    ничего не делает и возвращает False.
+    """
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return False
+
+    groups: Dict[Tuple[str, str], List[str]] = {}
+    for _, results in runs:
+        for name, metric in results.metrics.items():
+            key = (name.rsplit(".", 1)[0], metric["unit"])
+            if name not in groups.setdefault(key, []):
+                groups[key].append(name)
+    if not groups:
+        return False
+
+    fig, axes = plt.subplots(len(groups), 1, figsize=(10, 3 * max(len(groups), 1)), squeeze=False)
+    width = 0.8 / max(len(runs), 1)
+    for ax, ((group, unit), names) in zip(axes[:, 0], sorted(groups.items())):
+        for i, (label, results) in enumerate(runs):
+            values = [results.metrics.get(n, {}).get("value", 0) for n in names]
+            ax.bar([x + i * width for x in range(len(names))], values, width, label=label)
+        ax.set_title(group)
+        ax.set_ylabel(unit)
+        ax.set_xticks([x + width * (len(runs) - 1) / 2 for x in range(len(names))])
+        ax.set_xticklabels([n[len(group) + 1:] for n in names], rotation=20, ha="right", fontsize=8)
+        if len(runs) > 1:
+            ax.legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    return True
@@ -2,6 +2,7 @@ from pathlib import Path
 from random   import randint
 
 from miniweb.orm.models import Model
+from miniweb.orm.transactions import atomic
 from miniweb.orm.fields import StringField, IntegerField, ForeignKey
 
 DB_FILE = "big_demo.db"
@@ -21,22 +22,26 @@ class Book(Model):
 
 Model.create_all()
 author_objs: list[Author] = []
-for idx in range(1, 6):
-    a = Author(name=f"Author #{idx}")
-    a.save()
-    author_objs.append(a)
-    for k in range(1, 4):
+with atomic():
+    for idx in range(1, 6):
+        a = Author(name=f"Author #{idx}")
+        a.save()
+        author_objs.append(a)
+    Book.bulk_create(
         Book(
-            title = f"Book {k}-of-{idx}",
+            title = f"Book {k}-of-{a.id}",
             pages = randint(90, 400),
             author = a,
-        ).save()
+        )
+        for a in author_objs
+        for k in range(1, 4)
+    )
 
 header = f"{'ID':>2}  {'BOOK TITLE':15} {'PAGES':>5}  {'AUTHOR'}"
 print(header)
 print("-" * len(header))
 
-for b in Book.all():
+for b in Book.all(select_related=["author"]):
     print(f"{b.id:>2}  {b.title:15} {b.pages:>5}  {b.author.name}")
 
 print("\nВсего авторов:", len(Author.all()))
@@ -1,4 +1,10 @@
-from .server import App, Request, Response
-from .router import Router
+from .server import App, Request, Response, make_response, send_file
+from .cache import ResponseCache
+from .compression import Compressor
+from .metrics import Metrics
+from .parser import Headers, HTTPError
+from .router import MethodNotAllowed, Router
+from .static import StaticFiles
+from .workers import Supervisor
 
-__all__ = ["App", "Request", "Response", "Router"]
\ No newline at end of file
+__all__ = ["App", "Request", "Response", "make_response", "send_file", "ResponseCache", "Compressor", "Metrics", "Headers", "HTTPError", "Router", "MethodNotAllowed", "StaticFiles", "Supervisor"]
\ No newline at end of file
@@ -0,0 +1,213 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from .compression import ENCODINGS, encoded_etag
+
+
+class CacheEntry:
+    __slots__ = ("response", "etag", "expires", "size", "tables")
+
+    def __init__(self, response, etag: str, expires: float, tables: Tuple[str, ...]) -> None:
+        self.response = response
+        self.etag = etag
+        self.expires = expires
+        self.tables = tables
+        self.size = len(response.body) + sum(len(k) + len(v) for k, v in response.headers.items())
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Слабое сравнение ETag, как требует RFC 9110 для If-None-Match."""
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def matching_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    Валидатор из If-None-Match, совпавший с etag или ETag одной из его
+    сжатых форм (см. encoded_etag); None — совпадений нет.
+    """
+    for candidate in (etag, *(encoded_etag(etag, encoding) for encoding in ENCODINGS)):
+        if etag_matches(if_none_match, candidate):
+            return candidate
+    return None
+
+
+class ResponseCache:
+    """
+    Кэш целых ответов с TTL и LRU-вытеснением по суммарному размеру в байтах.
+
+    Одновременные промахи по одному ключу схлопываются (single-flight):
+    ответ вычисляется один раз, остальные запросы ждут его результата.
+    Записи можно сбрасывать по имени таблицы БД (invalidate_table).
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()
+        self._by_table: Dict[str, set] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def get(self, key: Tuple) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Tuple, response, ttl: float, tables: Sequence[str] = ()) -> CacheEntry:
+        entry = CacheEntry(response, make_etag(response.body), time.monotonic() + ttl, tuple(tables))
+        if entry.size > self.max_bytes:
+            return entry
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            for table in entry.tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def _remove(self, key: Tuple) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+
+    def invalidate_table(self, table: str) -> None:
+        """Сбрасывает все ответы, зависящие от таблицы (вызывается из Model.save)."""
+        with self._lock:
+            for key in list(self._by_table.pop(table, ())):
+                if key in self._entries:
+                    self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self._bytes,
+                "hits": self.hits, "misses": self.misses}
+
+    async def get_or_compute(self, key: Tuple, compute: Callable[[], Any], ttl: float,
+                             tables: Sequence[str] = ()) -> Tuple[Any, Optional[CacheEntry]]:
+        """
+        Возвращает (response, entry). entry — None, если ответ не кэшируемый
+        (не 200 или потоковое тело).
+        """
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry.response, entry
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            response, entry = await asyncio.shield(pending)
+            if entry is not None:
+                self.hits += 1
+                return response, entry
+            # некэшируемый ответ (например, генератор) делить нельзя:
+            # итератор один на всех — каждый ожидающий считает свой
+            self.misses += 1
+            return await compute(), None
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await compute()
+            entry = None
+            if response.status == 200 and isinstance(response.body, (bytes, bytearray)):
+                entry = self.set(key, response, ttl, tables)
+            future.set_result((response, entry))
+            return response, entry
+        except BaseException as e:
+            future.set_exception(e)
+            # исключение уже получит вызывающий; ожидающие получат своё
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+
+def cached_handler(app, cache: ResponseCache, func: Callable, ttl: float,
+                   vary: Iterable[str] = (), tables: Iterable[str] = ()) -> Callable:
+    """Оборачивает обработчик кэшем ответов (используется App.cache)."""
+    from .server import make_response
+
+    vary = tuple(vary)
+    tables = tuple(tables)
+    is_async = inspect.iscoroutinefunction(func)
+
+    @functools.wraps(func)
+    async def wrapper(request, **params):
+        if request.method not in ("GET", "HEAD"):
+            return await _call(request, params)
+
+        key = (request.method, request.path, request.query,
+               tuple(request.headers.get(h, "") for h in vary))
+
+        async def compute():
+            return await _call(request, params)
+
+        response, entry = await cache.get_or_compute(key, compute, ttl, tables)
+        if entry is None:
+            return response
+        headers = dict(response.headers)
+        headers["ETag"] = entry.etag
+        if vary:
+            headers["Vary"] = ", ".join(vary)
+        if_none_match = request.headers.get("If-None-Match")
+        matched = matching_etag(if_none_match, entry.etag) if if_none_match else None
+        if matched is not None:
+            # клиент мог закэшировать сжатую форму — в 304 её валидатор
+            headers["ETag"] = matched
+            return response._replace(status=304, headers=headers, body=b"")
+        return response._replace(headers=headers)
+
+    async def _call(request, params):
+        if is_async:
+            result = await func(request, **params)
+        else:
+            result = await app._call_sync(func, request, params)
+        return make_response(result)
+
+    return wrapper
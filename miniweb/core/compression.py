@@ -0,0 +1,214 @@
+import zlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+
+# Типы, которые уже сжаты: повторное сжатие только тратит CPU.
+SKIP_CONTENT_TYPES = (
+    "image/", "video/", "audio/", "font/woff",
+    "application/zip", "application/gzip", "application/x-gzip",
+    "application/x-bzip2", "application/x-7z-compressed", "application/x-rar",
+    "application/octet-stream", "application/pdf", "application/wasm",
+)
+COMPRESSIBLE_IMAGES = ("image/svg+xml", "image/x-icon", "image/bmp")
+
+
+ENCODINGS = ("br", "gzip", "deflate")
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag сжатой формы ответа. Сильный валидатор не может быть общим у
+    несжатой и сжатой форм (RFC 9110, 8.8.3), поэтому к нему добавляется
+    суффикс кодировки: "abc" -> "abc-gzip". Слабый остаётся как есть.
+    """
+    if etag.startswith("W/") or len(etag) < 2 or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """'gzip;q=0.8, br' -> {'gzip': 0.8, 'br': 1.0}"""
+    result = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, params = item.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[name.strip().lower()] = q
+    return result
+
+
+class _Encoder:
+    """Потоковый кодировщик с единым интерфейсом для zlib и brotli."""
+
+    def __init__(self, encoding: str, level: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=min(level, 11))
+        else:
+            wbits = 31 if encoding == "gzip" else 15
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        # SYNC_FLUSH отдаёт всё накопленное сразу: клиент получает
+        # содержимое каждого чанка без ожидания конца потока
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+def compress_bytes(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    wbits = 31 if encoding == "gzip" else 15
+    obj = zlib.compressobj(level, zlib.DEFLATED, wbits)
+    return obj.compress(data) + obj.flush()
+
+
+class Compressor:
+    """
+    Сжатие ответов App по Accept-Encoding (br, если установлен brotli, gzip, deflate).
+
+    Буферизованные тела меньше min_size и уже сжатые типы не трогаются.
+    Потоковые тела (генераторы) сжимаются по мере выдачи. Сжатые формы
+    одинаковых тел кэшируются в LRU, ограниченном cache_size байтами.
+    """
+
+    def __init__(self, min_size: int = 1024, level: int = 6, cache_size: int = 16 * 1024 * 1024,
+                 cache_max_item: int = 1024 * 1024) -> None:
+        self.min_size = min_size
+        self.level = level
+        self.encodings: Tuple[str, ...] = ENCODINGS if brotli else ENCODINGS[1:]
+        self.cache_size = cache_size
+        self.cache_max_item = cache_max_item
+        self._cache: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._cache_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        if not accept_encoding:
+            return None
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = None, 0.0
+        for enc in self.encodings:
+            q = accepted.get(enc, wildcard)
+            if q > best_q:
+                best, best_q = enc, q
+        return best
+
+    @staticmethod
+    def _compressible(headers: Dict[str, str]) -> bool:
+        content_type = ""
+        for k, v in headers.items():
+            lower = k.lower()
+            if lower in ("content-encoding", "content-range"):
+                return False
+            if lower == "content-type":
+                content_type = v.lower()
+        if content_type.startswith(COMPRESSIBLE_IMAGES):
+            return True
+        return not content_type.startswith(SKIP_CONTENT_TYPES)
+
+    def _cached(self, encoding: str, body: bytes) -> bytes:
+        if len(body) > self.cache_max_item:
+            return compress_bytes(body, encoding, self.level)
+        key = (encoding, body)
+        compressed = self._cache.get(key)
+        if compressed is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return compressed
+        self.misses += 1
+        compressed = compress_bytes(body, encoding, self.level)
+        self._cache[key] = compressed
+        self._cache_bytes += len(body) + len(compressed)
+        while self._cache_bytes > self.cache_size and self._cache:
+            (_, old_body), old = self._cache.popitem(last=False)
+            self._cache_bytes -= len(old_body) + len(old)
+        return compressed
+
+    def apply(self, request, response):
+        """Возвращает сжатую копию response или его же, если сжимать не нужно."""
+        status, headers, body = response
+        if status < 200 or status in (204, 304) or request.method == "HEAD":
+            return response
+        if not self._compressible(headers):
+            return response
+
+        is_bytes = isinstance(body, (bytes, bytearray, memoryview))
+        if is_bytes:
+            if len(body) < self.min_size:
+                return response
+        elif not (hasattr(body, "__iter__") or hasattr(body, "__aiter__")) or hasattr(body, "fileno"):
+            # файлы отдаются через sendfile без копирования — их не сжимаем
+            return response
+
+        encoding = self.choose_encoding(request.headers.get("Accept-Encoding", ""))
+        new_headers = {k: v for k, v in headers.items() if k.lower() not in ("content-length", "vary")}
+        vary = [v for k, v in headers.items() if k.lower() == "vary"]
+        new_headers["Vary"] = ", ".join(vary + ["Accept-Encoding"]) if vary else "Accept-Encoding"
+        if encoding is None:
+            return response._replace(headers=new_headers)
+
+        new_headers["Content-Encoding"] = encoding
+        for k, v in new_headers.items():
+            if k.lower() == "etag":
+                new_headers[k] = encoded_etag(v, encoding)
+                break
+        if is_bytes:
+            new_body: Any = self._cached(encoding, bytes(body))
+        elif hasattr(body, "__aiter__"):
+            new_body = self._compress_async(body, encoding)
+        else:
+            new_body = self._compress_iter(body, encoding)
+        return response._replace(headers=new_headers, body=new_body)
+
+    def _compress_iter(self, body: Iterable, encoding: str) -> Iterator[bytes]:
+        encoder = _Encoder(encoding, self.level)
+        try:
+            for chunk in body:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                out = encoder.compress(chunk)
+                if out:
+                    yield out
+            yield encoder.finish()
+        finally:
+            close = getattr(body, "close", None)
+            if close is not None:
+                close()
+
+    async def _compress_async(self, body, encoding: str) -> AsyncIterator[bytes]:
+        encoder = _Encoder(encoding, self.level)
+        try:
+            async for chunk in body:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                out = encoder.compress(chunk)
+                if out:
+                    yield out
+            yield encoder.finish()
+        finally:
+            aclose = getattr(body, "aclose", None)
+            if aclose is not None:
+                await aclose()
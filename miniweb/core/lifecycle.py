@@ -0,0 +1,194 @@
+"""
+Перезапуск процесса сервера без потери соединений.
+
+SIGHUP: процесс запускает свою копию (тот же интерпретатор и аргументы),
+передавая ей слушающий сокет через унаследованный дескриптор
+(MINIWEB_LISTEN_FD). Когда преемник начал принимать соединения, он пишет
+байт в канал готовности (MINIWEB_READY_FD); старый процесс перестаёт
+принимать новые соединения, дообслуживает текущие и завершается. Сокет
+всё время открыт хотя бы в одном процессе, поэтому новые соединения ждут
+в очереди ядра, а не получают отказ.
+
+Reloader (App.run(reload=True), --reload): для разработки — держит
+слушающий сокет у себя, запускает сервер дочерним процессом и
+перезапускает его при изменении исходников или шаблонов.
+"""
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+LISTEN_FD_ENV = "MINIWEB_LISTEN_FD"
+READY_FD_ENV = "MINIWEB_READY_FD"
+RELOADER_ENV = "MINIWEB_RELOADER"
+
+WATCHED_SUFFIXES = (".py", ".html", ".htm", ".jinja", ".jinja2", ".txt", ".json", ".toml", ".cfg", ".ini")
+_SKIP_DIRS = {"__pycache__", ".git", ".venv", "venv", "node_modules", ".pytest_cache", ".mypy_cache"}
+
+
+def restart_command() -> List[str]:
+    """Команда, которой запущен текущий процесс (с учётом python -m)."""
+    args = [sys.executable] + [f"-W{opt}" for opt in sys.warnoptions]
+    spec = getattr(sys.modules.get("__main__"), "__spec__", None)
+    if spec is not None and spec.name:
+        name = spec.name[:-len(".__main__")] if spec.name.endswith(".__main__") else spec.name
+        return args + ["-m", name] + sys.argv[1:]
+    return args + sys.argv
+
+
+def inherited_socket() -> Optional[socket.socket]:
+    """Слушающий сокет, переданный родителем (SIGHUP или reloader), если он есть."""
+    fd = os.environ.pop(LISTEN_FD_ENV, None)
+    if fd is None:
+        return None
+    sock = socket.socket(fileno=int(fd))
+    sock.setblocking(False)
+    return sock
+
+
+def take_ready_fd() -> Optional[str]:
+    """Забирает из окружения канал готовности (чтобы его не унаследовали воркеры)."""
+    return os.environ.pop(READY_FD_ENV, None)
+
+
+def notify_ready(fd: Optional[str] = None) -> None:
+    """Сообщает процессу, передавшему сокет, что преемник принимает соединения."""
+    if fd is None:
+        fd = take_ready_fd()
+    if fd is None:
+        return
+    try:
+        os.write(int(fd), b"1")
+    except OSError:
+        pass
+    finally:
+        os.close(int(fd))
+
+
+def spawn_successor(sock: socket.socket, timeout: float = 30.0,
+                    env: Optional[Dict[str, str]] = None) -> Optional[subprocess.Popen]:
+    """
+    Запускает копию текущего процесса с унаследованным сокетом и ждёт её
+    готовности до timeout секунд. Если преемник не поднялся (упал на
+    импорте, не дождались), он останавливается и возвращается None —
+    текущий процесс продолжает работу.
+    """
+    ready_r, ready_w = os.pipe()
+    child_env = dict(os.environ if env is None else env)
+    child_env[LISTEN_FD_ENV] = str(sock.fileno())
+    child_env[READY_FD_ENV] = str(ready_w)
+    try:
+        proc = subprocess.Popen(restart_command(), env=child_env, pass_fds=(sock.fileno(), ready_w))
+    except OSError as e:
+        print(f"* Restart failed: {e}")
+        os.close(ready_r)
+        os.close(ready_w)
+        return None
+    os.close(ready_w)
+    try:
+        readable, _, _ = select.select([ready_r], [], [], timeout)
+        ok = bool(readable) and os.read(ready_r, 1) == b"1"
+    finally:
+        os.close(ready_r)
+    if ok:
+        print(f"* Handed over to process {proc.pid}")
+        return proc
+    print("* Restart failed: new process did not become ready")
+    if proc.poll() is None:
+        proc.kill()
+    proc.wait()
+    return None
+
+
+def _snapshot(paths: Iterable[str]) -> Dict[str, float]:
+    mtimes = {}
+    for root in paths:
+        if os.path.isfile(root):
+            try:
+                mtimes[root] = os.stat(root).st_mtime
+            except OSError:
+                pass
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS and not d.startswith(".")]
+            for name in filenames:
+                if name.endswith(WATCHED_SUFFIXES):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        mtimes[path] = os.stat(path).st_mtime
+                    except OSError:
+                        pass
+    return mtimes
+
+
+class Reloader:
+    """
+    Перезапускает сервер при изменении файлов в paths (по умолчанию —
+    текущий каталог). Проверка — раз в interval секунд по mtime; сокет
+    остаётся открытым в родителе, так что запросы во время перезапуска
+    ждут в очереди, а не получают отказ.
+    """
+
+    def __init__(self, sock: socket.socket, paths: Sequence[str] = (), interval: float = 0.5,
+                 shutdown_timeout: float = 5.0) -> None:
+        self.sock = sock
+        self.paths = [os.path.abspath(p) for p in (paths or [os.getcwd()])]
+        self.interval = interval
+        self.shutdown_timeout = shutdown_timeout
+        self._proc: Optional[subprocess.Popen] = None
+
+    def _spawn(self) -> subprocess.Popen:
+        env = dict(os.environ)
+        env[RELOADER_ENV] = "child"
+        env[LISTEN_FD_ENV] = str(self.sock.fileno())
+        return subprocess.Popen(restart_command(), env=env, pass_fds=(self.sock.fileno(),))
+
+    def _stop_child(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(self.shutdown_timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    def changed_files(self, before: Dict[str, float], after: Dict[str, float]) -> List[str]:
+        return sorted(path for path in before.keys() | after.keys() if before.get(path) != after.get(path))
+
+    def run(self) -> None:
+        print(f"* Reloading on changes in {', '.join(self.paths)}")
+        # SIGTERM останавливает и сервер, а не только наблюдателя
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        mtimes = _snapshot(self.paths)
+        try:
+            while True:
+                self._proc = self._spawn()
+                while True:
+                    time.sleep(self.interval)
+                    current = _snapshot(self.paths)
+                    changed = self.changed_files(mtimes, current)
+                    mtimes = current
+                    if changed:
+                        print(f"* Detected change in {changed[0]}"
+                              f"{f' (+{len(changed) - 1})' if len(changed) > 1 else ''}, reloading")
+                        break
+                    if self._proc is not None and self._proc.poll() is not None:
+                        # упал (например, синтаксическая ошибка) — ждём правки
+                        print(f"* Server exited with code {self._proc.returncode}, waiting for changes")
+                        self._proc = None
+                self._stop_child()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop_child()
+            self.sock.close()
+
+
+def is_reloader_child() -> bool:
+    return os.environ.get(RELOADER_ENV) == "child"
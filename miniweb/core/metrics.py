@@ -0,0 +1,151 @@
+import asyncio
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# границы корзин гистограммы задержек, секунды
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """Гистограмма в духе Prometheus: счётчики по корзинам, сумма и число наблюдений."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        result, total = [], 0
+        for bound, n in zip(self.buckets, self.counts):
+            total += n
+            result.append((_format_number(bound), total))
+        result.append(("+Inf", self.count))
+        return result
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else f"{int(value)}.0"
+
+
+def _labels(**labels) -> str:
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Metrics:
+    """
+    Метрики сервера для /__metrics (текстовый формат Prometheus):
+    гистограммы задержки по маршрутам, запросы по статусам, исключения
+    обработчиков, вызовы по типу обработчика (async/inline/thread), задержка
+    event loop. Собираются в пределах процесса — при нескольких воркерах
+    каждый отдаёт свои (метка pid).
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._exceptions: Dict[Tuple[str, str], int] = {}
+        self.handler_calls = {"async": 0, "inline": 0, "thread": 0}
+        # ответы 503 при перегрузке по причинам (connections, inflight, executor, queue_time)
+        self.shed: Dict[str, int] = {}
+        self.loop_lag = Histogram((0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0))
+        self.loop_lag_last = 0.0
+
+    def observe_request(self, route: Optional[str], method: str, status: int, seconds: float) -> None:
+        route = route or UNMATCHED_ROUTE
+        with self._lock:
+            hist = self._latency.get((route, method))
+            if hist is None:
+                hist = self._latency[(route, method)] = Histogram(self.buckets)
+            hist.observe(seconds)
+            key = (route, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def record_exception(self, route: Optional[str], exc: BaseException) -> None:
+        key = (route or UNMATCHED_ROUTE, type(exc).__name__)
+        with self._lock:
+            self._exceptions[key] = self._exceptions.get(key, 0) + 1
+
+    def record_shed(self, reason: str) -> None:
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+
+    async def monitor_loop_lag(self, interval: float = 0.5) -> None:
+        """Фоновая задача: насколько позже заказанного просыпается sleep(interval)."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - started - interval)
+            self.loop_lag_last = lag
+            self.loop_lag.observe(lag)
+
+    def render(self, gauges: Dict[str, Tuple[str, float]] = None) -> str:
+        """
+        Текст для Prometheus. gauges — дополнительные значения
+        {имя: (описание, значение)} (соединения, запросы в работе и т.п.).
+        """
+        pid = os.getpid()
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            header("miniweb_request_duration_seconds", "histogram", "Request latency by route")
+            for (route, method), hist in sorted(self._latency.items()):
+                for le, n in hist.cumulative():
+                    lines.append(f"miniweb_request_duration_seconds_bucket"
+                                 f"{_labels(route=route, method=method, le=le, pid=pid)} {n}")
+                base = _labels(route=route, method=method, pid=pid)
+                lines.append(f"miniweb_request_duration_seconds_sum{base} {hist.sum}")
+                lines.append(f"miniweb_request_duration_seconds_count{base} {hist.count}")
+
+            header("miniweb_requests_total", "counter", "Requests by route and status")
+            for (route, method, status), n in sorted(self._requests.items()):
+                lines.append(f"miniweb_requests_total"
+                             f"{_labels(route=route, method=method, status=status, pid=pid)} {n}")
+
+            header("miniweb_handler_exceptions_total", "counter", "Unhandled handler exceptions")
+            for (route, exc), n in sorted(self._exceptions.items()):
+                lines.append(f"miniweb_handler_exceptions_total"
+                             f"{_labels(route=route, exception=exc, pid=pid)} {n}")
+
+        header("miniweb_handler_calls_total", "counter", "Handler calls by execution kind")
+        for kind, n in self.handler_calls.items():
+            lines.append(f"miniweb_handler_calls_total{_labels(kind=kind, pid=pid)} {n}")
+
+        header("miniweb_shed_total", "counter", "Requests rejected with 503 under overload")
+        for reason, n in sorted(self.shed.items()):
+            lines.append(f"miniweb_shed_total{_labels(reason=reason, pid=pid)} {n}")
+
+        header("miniweb_event_loop_lag_seconds", "histogram", "Event loop scheduling lag")
+        for le, n in self.loop_lag.cumulative():
+            lines.append(f"miniweb_event_loop_lag_seconds_bucket{_labels(le=le, pid=pid)} {n}")
+        lines.append(f"miniweb_event_loop_lag_seconds_sum{_labels(pid=pid)} {self.loop_lag.sum}")
+        lines.append(f"miniweb_event_loop_lag_seconds_count{_labels(pid=pid)} {self.loop_lag.count}")
+
+        for name, (text, value) in (gauges or {}).items():
+            header(name, "gauge", text)
+            lines.append(f"{name}{_labels(pid=pid)} {value}")
+        return "\n".join(lines) + "\n"
+
@@ -0,0 +1,148 @@
+import inspect
+import threading
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+Endpoint = Callable[[Any], Awaitable[Any]]
+
+
+class StageTimings:
+    """
+    Накопленная статистика по этапам конвейера: число вызовов и суммарное
+    время. Время этапа включает все вложенные этапы (middleware измеряется
+    вместе с тем, что она вызвала через call_next).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._data: Dict[str, List[float]] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                self._data[name] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                if seconds > entry[2]:
+                    entry[2] = seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {"count": int(count), "total": total, "avg": total / count, "max": peak}
+                for name, (count, total, peak) in self._data.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def _stage_name(func: Callable) -> str:
+    return getattr(func, "__qualname__", None) or type(func).__name__
+
+
+def _timed(name: str, inner: Endpoint, timings: StageTimings) -> Endpoint:
+    async def stage(request):
+        started = perf_counter()
+        try:
+            return await inner(request)
+        finally:
+            elapsed = perf_counter() - started
+            request.timings[name] = elapsed
+            timings.record(name, elapsed)
+    return stage
+
+
+def _wrap_middleware(middleware: Callable, inner: Endpoint,
+                     make_response: Callable[[Any], Any]) -> Endpoint:
+    # middleware может ответить сама строкой или (тело, статус) — внешние
+    # слои и сжатие получают уже Response
+    if inspect.iscoroutinefunction(middleware) or inspect.iscoroutinefunction(
+            getattr(middleware, "__call__", None)):
+        async def layer(request):
+            return make_response(await middleware(request, inner))
+    else:
+        # синхронная middleware получает call_next и должна вернуть его
+        # awaitable (или готовый ответ) — так она может поменять запрос,
+        # не превращаясь в корутину
+        async def layer(request):
+            result = middleware(request, inner)
+            if inspect.isawaitable(result):
+                result = await result
+            return make_response(result)
+    return layer
+
+
+def _split_hooks(hooks: Sequence[Callable]):
+    return tuple((hook, inspect.iscoroutinefunction(hook)) for hook in hooks)
+
+
+def build_pipeline(endpoint: Endpoint, middlewares: Sequence[Callable], before: Sequence[Callable],
+                   after: Sequence[Callable], make_response: Callable[[Any], Any],
+                   timings: StageTimings, compressor: Optional[Any] = None) -> Endpoint:
+    """
+    Собирает обработку запроса в одну корутину: один раз при старте,
+    чтобы на каждом запросе не перебирать списки хуков.
+
+    Порядок: сжатие → middleware (первая добавленная — внешняя) →
+    before_request → обработчик → after_request.
+    """
+    before_hooks = _split_hooks(before)
+    after_hooks = _split_hooks(after)
+
+    handler_stage = _timed("handler", endpoint, timings)
+    core = handler_stage
+
+    if before_hooks or after_hooks:
+        async def hooks_stage(request):
+            if before_hooks:
+                started = perf_counter()
+                for hook, is_async in before_hooks:
+                    result = await hook(request) if is_async else hook(request)
+                    if result is not None:
+                        # before_request вернул ответ — обработчик не вызывается
+                        response = make_response(result)
+                        break
+                else:
+                    response = None
+                elapsed = perf_counter() - started
+                request.timings["before_request"] = elapsed
+                timings.record("before_request", elapsed)
+                if response is None:
+                    response = await handler_stage(request)
+            else:
+                response = await handler_stage(request)
+
+            if after_hooks:
+                started = perf_counter()
+                for hook, is_async in after_hooks:
+                    result = await hook(request, response) if is_async else hook(request, response)
+                    if result is not None:
+                        response = make_response(result)
+                elapsed = perf_counter() - started
+                request.timings["after_request"] = elapsed
+                timings.record("after_request", elapsed)
+            return response
+        core = hooks_stage
+
+    for middleware in reversed(middlewares):
+        name = _stage_name(middleware)
+        core = _timed(name, _wrap_middleware(middleware, core, make_response), timings)
+
+    if compressor is not None:
+        inner = core
+
+        async def compression_stage(request):
+            response = make_response(await inner(request))
+            started = perf_counter()
+            response = compressor.apply(request, response)
+            elapsed = perf_counter() - started
+            request.timings["compression"] = elapsed
+            timings.record("compression", elapsed)
+            return response
+        core = compression_stage
+
+    return core
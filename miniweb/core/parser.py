@@ -0,0 +1,311 @@
+import asyncio
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class HTTPError(Exception):
+    """Ошибка разбора запроса; status уходит клиенту, после чего соединение закрывается."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class Headers(dict):
+    """
+    Заголовки запроса с регистронезависимым доступом.
+    Имена хранятся в нижнем регистре, повторяющиеся заголовки склеиваются через «, ».
+    """
+
+    def __init__(self, data=None, **kwargs) -> None:
+        super().__init__()
+        if data or kwargs:
+            self.update(data or (), **kwargs)
+
+    def __setitem__(self, key: str, value: str) -> None:
+        super().__setitem__(key.lower(), value)
+
+    def __getitem__(self, key: str) -> str:
+        return super().__getitem__(key.lower())
+
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key.lower())
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and super().__contains__(key.lower())
+
+    def get(self, key: str, default=None):
+        return super().get(key.lower(), default)
+
+    # методы dict, которые иначе обошли бы приведение имён к нижнему регистру
+
+    def update(self, data=(), **kwargs) -> None:
+        items = data.items() if hasattr(data, "items") else data
+        for key, value in items:
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def pop(self, key: str, *default):
+        return super().pop(key.lower(), *default)
+
+    def setdefault(self, key: str, default=None):
+        return super().setdefault(key.lower(), default)
+
+    def copy(self) -> "Headers":
+        return Headers(self)
+
+    def add(self, key: str, value: str) -> None:
+        key = key.lower()
+        if super().__contains__(key):
+            super().__setitem__(key, super().__getitem__(key) + ", " + value)
+        else:
+            super().__setitem__(key, value)
+
+
+def _searchable(data: Buffer) -> Union[bytes, bytearray]:
+    """
+    Буфер с find() и срезами без копирования: bytes и bytearray как есть,
+    memoryview — объект под ним, если вид покрывает его целиком.
+    """
+    if not isinstance(data, memoryview):
+        return data
+    obj = data.obj
+    if isinstance(obj, (bytes, bytearray)) and data.contiguous and data.nbytes == len(obj):
+        return obj
+    return data.tobytes()
+
+
+_TOKEN_CHARS = frozenset(b"!#$%&'*+-.^_`|~0123456789"
+                         b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+
+
+def parse_request_head(data: Buffer, max_headers: int = 100) -> Tuple[str, str, str, str, Headers]:
+    """
+    Разбирает стартовую строку и заголовки (всё до пустой строки включительно).
+    Работает по смещениям внутри буфера, не декодируя и не разбивая голову
+    целиком; в str превращаются только отдельные поля.
+
+    Возвращает (method, path, query, version, headers).
+    """
+    raw = _searchable(data)
+    end = raw.find(b"\r\n")
+    if end <= 0:
+        raise HTTPError(400, "Malformed request line")
+
+    sp1 = raw.find(b" ", 0, end)
+    sp2 = raw.find(b" ", sp1 + 1, end)
+    if sp1 <= 0:
+        raise HTTPError(400, "Malformed request line")
+    method = raw[:sp1].decode("ascii", "replace").upper()
+    if sp2 == -1:
+        target = raw[sp1 + 1:end]
+        version = "HTTP/1.0"
+    else:
+        target = raw[sp1 + 1:sp2]
+        version = raw[sp2 + 1:end].decode("ascii", "replace")
+    if not target or not version.startswith("HTTP/"):
+        raise HTTPError(400, "Malformed request line")
+
+    qpos = target.find(b"?")
+    if qpos == -1:
+        path, query = target.decode("utf-8", "surrogateescape"), ""
+    else:
+        path = target[:qpos].decode("utf-8", "surrogateescape")
+        query = target[qpos + 1:].decode("utf-8", "surrogateescape")
+
+    headers = Headers()
+    count = 0
+    pos = end + 2
+    length = len(raw)
+    while pos < length:
+        end = raw.find(b"\r\n", pos)
+        if end == -1:
+            end = length
+        if end == pos:
+            break
+        colon = raw.find(b":", pos, end)
+        if colon <= pos:
+            raise HTTPError(400, "Malformed header line")
+        name = raw[pos:colon]
+        if not _TOKEN_CHARS.issuperset(name):
+            raise HTTPError(400, "Invalid header name")
+        count += 1
+        if count > max_headers:
+            raise HTTPError(431, "Too many headers")
+        headers.add(name.decode("ascii"), raw[colon + 1:end].strip().decode("latin-1"))
+        pos = end + 2
+    return method, path, query, version, headers
+
+
+def parse_chunk_size(line: Buffer) -> int:
+    """Размер чанка из строки «<hex>[;ext]\\r\\n»."""
+    raw = _searchable(line)
+    end = raw.find(b";")
+    try:
+        # int() сам отбрасывает пробелы и \r\n по краям
+        size = int(raw[:end] if end != -1 else raw, 16)
+    except ValueError:
+        raise HTTPError(400, "Invalid chunk size") from None
+    if size < 0:
+        raise HTTPError(400, "Invalid chunk size")
+    return size
+
+
+async def iter_chunked(reader: asyncio.StreamReader, max_size: Optional[int] = None,
+                       piece_size: int = 65536) -> AsyncIterator[bytes]:
+    """
+    Асинхронно выдаёт куски тела в кодировке Transfer-Encoding: chunked.
+    Большой чанк отдаётся частями не длиннее piece_size; объявленный размер
+    сверх max_size даёт HTTPError(413) до чтения самих данных.
+    """
+    received = 0
+    while True:
+        size = parse_chunk_size(await reader.readuntil(b"\r\n"))
+        if size == 0:
+            # трейлеры игнорируем, дочитываем до пустой строки
+            while (await reader.readuntil(b"\r\n")) != b"\r\n":
+                pass
+            return
+        received += size
+        if max_size is not None and received > max_size:
+            raise HTTPError(413, "Request body too large")
+        while size:
+            piece = await reader.read(min(size, piece_size))
+            if not piece:
+                raise asyncio.IncompleteReadError(b"", size)
+            size -= len(piece)
+            yield piece
+        if await reader.readexactly(2) != b"\r\n":
+            raise HTTPError(400, "Malformed chunk")
+
+
+# asyncio.timeout появился в Python 3.11
+_timeout = getattr(asyncio, "timeout", None)
+
+
+async def _within(delay: Optional[float], aw):
+    if _timeout is not None:
+        # asyncio.timeout не создаёт задачу на каждое чтение, в отличие от wait_for
+        async with _timeout(delay):
+            return await aw
+    return await asyncio.wait_for(aw, delay)
+
+
+async def read_request_head(reader: asyncio.StreamReader, max_head_size: int = 65536,
+                            timeout: Optional[float] = None,
+                            header_timeout: Optional[float] = None) -> Optional[bytes]:
+    """
+    Читает голову запроса до \\r\\n\\r\\n одним readuntil. Возвращает None,
+    если клиент закрыл соединение (или истёк таймаут простоя timeout) до
+    начала нового запроса.
+
+    Если к истечению timeout голова уже начала приходить, на остаток даётся
+    ещё header_timeout: клиент, присылающий заголовки по байту (slowloris),
+    получает HTTPError(408), а не держит соединение бесконечно.
+    """
+    idle = timeout if timeout is not None else header_timeout
+    raw = None
+    try:
+        while raw is None:
+            try:
+                raw = await _within(idle, reader.readuntil(b"\r\n\r\n"))
+            except asyncio.TimeoutError:
+                # прерванный readuntil оставляет принятые байты в буфере потока
+                if header_timeout is not None and reader._buffer:
+                    try:
+                        raw = await _within(header_timeout, reader.readuntil(b"\r\n\r\n"))
+                    except asyncio.TimeoutError:
+                        raise HTTPError(408, "Request header timeout") from None
+                elif timeout is not None:
+                    raise
+                # без timeout простой не ограничен — ждём дальше
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431, "Request header fields too large") from None
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+        return None
+    if len(raw) > max_head_size:
+        raise HTTPError(431, "Request header fields too large")
+    # пустые строки перед запросом допускаются RFC 9112
+    return raw.lstrip(b"\r\n") or None
+
+
+def body_length(headers: Dict[str, str]) -> Optional[int]:
+    """
+    Длина тела по Content-Length; None для chunked-тела.
+    Бросает HTTPError для некорректных/неподдерживаемых комбинаций.
+    """
+    te = headers.get("Transfer-Encoding")
+    if te is not None:
+        if te.lower().rsplit(",", 1)[-1].strip() != "chunked":
+            raise HTTPError(501, "Unsupported Transfer-Encoding")
+        if "Content-Length" in headers:
+            raise HTTPError(400, "Both Content-Length and Transfer-Encoding")
+        return None
+    cl = headers.get("Content-Length")
+    if cl is None:
+        return 0
+    if not cl.isdigit():
+        raise HTTPError(400, "Invalid Content-Length")
+    return int(cl)
+
+
+class BodyReader:
+    """
+    Потоковое чтение тела запроса из StreamReader: по Content-Length
+    или в кодировке chunked. Превышение max_size даёт HTTPError(413),
+    ожидание очередного куска дольше timeout секунд — HTTPError(408).
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, length: Optional[int],
+                 max_size: int, chunk_size: int = 65536, timeout: Optional[float] = None) -> None:
+        self._reader = reader
+        self.timeout = timeout
+        self._remaining = length
+        self._chunks = iter_chunked(reader, max_size, chunk_size) if length is None else None
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.received = 0
+        self.done = length == 0
+
+    async def read_chunk(self) -> bytes:
+        """Следующий кусок тела; b"" — тело закончилось."""
+        if self.done:
+            return b""
+        if self._chunks is not None:
+            try:
+                chunk = await self._wait(self._chunks.__anext__())
+            except StopAsyncIteration:
+                self.done = True
+                return b""
+        else:
+            chunk = await self._wait(self._reader.read(min(self.chunk_size, self._remaining)))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", self._remaining)
+            self._remaining -= len(chunk)
+            if not self._remaining:
+                self.done = True
+        self.received += len(chunk)
+        if self.received > self.max_size:
+            self.done = False
+            raise HTTPError(413, "Request body too large")
+        return chunk
+
+    async def _wait(self, read):
+        if self.timeout is None:
+            return await read
+        try:
+            if _timeout is not None:
+                async with _timeout(self.timeout):
+                    return await read
+            return await asyncio.wait_for(read, self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "Request body timeout") from None
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await self.read_chunk()
+            if not chunk:
+                return
+            yield chunk
@@ -0,0 +1,77 @@
+"""
+Профилирование одного запроса в режиме отладки (App.run(debug=True)):
+
+    GET /items?__profile=1       -> статистика cProfile (по cumulative)
+    GET /items?__profile=flame   -> свёрнутые стеки сэмплирующего профайлера
+                                    (формат flamegraph.pl / speedscope)
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Iterable, Optional
+
+# ожидание в этих модулях — простой потока, а не работа
+_IDLE_MODULES = ("threading.py", "selectors.py", "queue.py", os.path.join("concurrent", "futures", "thread.py"))
+
+
+class SamplingProfiler:
+    """
+    Раз в interval секунд снимает стеки всех потоков процесса (кроме
+    своего) через sys._current_frames() и считает одинаковые стеки.
+    Потоки, стоящие в ожидании (select, Condition.wait и т.п.), не
+    учитываются.
+    """
+
+    def __init__(self, interval: float = 0.001) -> None:
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="miniweb-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            for ident, frame in sys._current_frames().items():
+                if ident == own or frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                    continue
+                self.stacks[_collapse(frame)] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def cprofile_report(profilers: Iterable[cProfile.Profile], limit: int = 40) -> str:
+    """Сводка pstats по нескольким профилям (цикл событий + поток обработчика)."""
+    profilers = list(profilers)
+    out = io.StringIO()
+    stats = pstats.Stats(profilers[0], stream=out)
+    for extra in profilers[1:]:
+        stats.add(extra)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
@@ -1,55 +1,156 @@
-import re
-from collections import defaultdict
-from typing import Any, Callable, Dict, Optional, Tuple
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 Handler = Callable[..., Any]
 
 
-class Router:
+class MethodNotAllowed(Exception):
+    """Путь найден, но для данного HTTP-метода обработчик не зарегистрирован."""
+
+    def __init__(self, method: str, path: str, allowed: List[str]) -> None:
+        super().__init__(f"Method not allowed: {method} {path}")
+        self.allowed = allowed
+
+
+def _is_int(segment: str) -> bool:
+    return segment.isdecimal()
+
+
+def _is_float(segment: str) -> bool:
+    if not segment or segment.strip("0123456789.") or not any(c.isdigit() for c in segment):
+        return False
+    return segment.count(".") <= 1
+
+
+# Порядок, в котором пробуются параметры одного уровня: более строгие раньше.
+_CONVERTERS: Dict[str, Tuple[int, Callable[[str], bool], Callable[[str], Any]]] = {
+    "int": (0, _is_int, int),
+    "float": (1, _is_float, float),
+    "str": (2, bool, str),
+    "path": (3, bool, str),
+}
+
+
+class _Node:
+    __slots__ = ("children", "params", "handlers")
+
     def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        # (тип конвертера, имя параметра, узел)
+        self.params: List[Tuple[str, str, "_Node"]] = []
+        self.handlers: Dict[str, Handler] = {}
+
+
+class Router:
+    """
+    Маршрутизатор на префиксном дереве сегментов пути.
+
+    Полностью статические пути хранятся в словаре (O(1)), пути с
+    параметрами — в дереве: на каждом уровне сначала пробуется статический
+    сегмент, затем параметры (int, float, str, path). Результаты поиска
+    динамических маршрутов кэшируются в LRU.
+    """
+
+    def __init__(self, cache_size: int = 1024) -> None:
         self.static: Dict[str, Dict[str, Handler]] = defaultdict(dict)
-        self.dynamic: Dict[str, list[Tuple[re.Pattern, Handler, Dict[str, Callable]]]] = defaultdict(list)
+        self._root = _Node()
         self._handler_404: Optional[Handler] = None
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[Handler, Dict[str, Any]]]" = OrderedDict()
 
     def add_route(self, method: str, path: str, handler: Handler) -> None:
         method = method.upper()
+        self._cache.clear()
         if "<" not in path:
-            self.static[method][path] = handler
+            self.static[path][method] = handler
             return
 
-        parts = []
-        converters: Dict[str, Callable] = {}
+        node = self._root
         for segment in path.strip("/").split("/"):
             if segment.startswith("<") and segment.endswith(">"):
-                typ, name = segment[1:-1].split(":", 1)
-                if typ == "int":
-                    regex, converters[name] = rf"(?P<{name}>\d+)", int
-                elif typ == "float":
-                    regex, converters[name] = rf"(?P<{name}>[\d.]+)", float
-                elif typ == "path":
-                    regex, converters[name] = rf"(?P<{name}>.+)", str
+                typ, name = segment[1:-1].split(":", 1) if ":" in segment else ("str", segment[1:-1])
+                if typ not in _CONVERTERS:
+                    typ = "str"
+                for p_typ, p_name, child in node.params:
+                    if p_typ == typ and p_name == name:
+                        node = child
+                        break
                 else:
-                    regex, converters[name] = rf"(?P<{name}>[^/]+)", str
-                parts.append(regex)
+                    child = _Node()
+                    node.params.append((typ, name, child))
+                    node.params.sort(key=lambda item: _CONVERTERS[item[0]][0])
+                    node = child
             else:
-                parts.append(re.escape(segment))
-        pattern = re.compile("^/" + "/".join(parts) + "$")
-        self.dynamic[method].append((pattern, handler, converters))
+                node = node.children.setdefault(segment, _Node())
+        node.handlers[method] = handler
 
     def set_404(self, handler: Handler) -> None:
         self._handler_404 = handler
 
     def match(self, method: str, path: str) -> Tuple[Handler, Dict[str, Any]]:
         method = method.upper()
-        if path in self.static[method]:
-            return self.static[method][path], {}
+        handlers = self.static.get(path)
+        if handlers and method in handlers:
+            return handlers[method], {}
+
+        key = (method, path)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
 
-        for pattern, handler, conv in self.dynamic[method]:
-            m = pattern.match(path)
-            if m:
-                params = {k: conv[k](v) for k, v in m.groupdict().items()}
-                return handler, params
+        allowed: List[str] = list(handlers) if handlers else []
+        if path.startswith("/"):
+            segments = path[1:].split("/")
+            found = self._search(self._root, segments, 0, method, {}, allowed)
+            if found is not None:
+                if self._cache_size:
+                    if len(self._cache) >= self._cache_size:
+                        self._cache.popitem(last=False)
+                    self._cache[key] = found
+                return found
 
+        if allowed:
+            raise MethodNotAllowed(method, path, sorted(set(allowed)))
         if self._handler_404:
             return self._handler_404, {}
-        raise FileNotFoundError(f"Route not found: {method} {path}")
\ No newline at end of file
+        raise FileNotFoundError(f"Route not found: {method} {path}")
+
+    def _search(self, node: _Node, segments: List[str], idx: int, method: str,
+                params: Dict[str, Any], allowed: List[str]) -> Optional[Tuple[Handler, Dict[str, Any]]]:
+        if idx == len(segments):
+            if method in node.handlers:
+                return node.handlers[method], dict(params)
+            allowed.extend(node.handlers)
+            return None
+
+        segment = segments[idx]
+        child = node.children.get(segment)
+        if child is not None:
+            found = self._search(child, segments, idx + 1, method, params, allowed)
+            if found is not None:
+                return found
+
+        for typ, name, child in node.params:
+            if typ == "path":
+                # path забирает остаток пути; как и жадный «.+» в регулярке,
+                # сначала пробуем самый длинный вариант
+                for end in range(len(segments), idx, -1):
+                    value = "/".join(segments[idx:end])
+                    if not value:
+                        continue
+                    params[name] = value
+                    found = self._search(child, segments, end, method, params, allowed)
+                    del params[name]
+                    if found is not None:
+                        return found
+                continue
+            _, check, convert = _CONVERTERS[typ]
+            if not check(segment):
+                continue
+            params[name] = convert(segment)
+            found = self._search(child, segments, idx + 1, method, params, allowed)
+            del params[name]
+            if found is not None:
+                return found
+        return None
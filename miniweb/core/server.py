@@ -1,97 +1,965 @@
 import asyncio
+import contextvars
+import cProfile
 import inspect
+import io
+import mimetypes
+import os
+import stat
+import signal
 import functools
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from http.client import responses
 from collections import namedtuple
-from typing import Any, Dict
+from functools import cached_property
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Sequence, Set
+from urllib.parse import parse_qs
 import time
 
-from .router import Router
+from .cache import ResponseCache, cached_handler
+from .compression import Compressor
+from .metrics import Metrics
+from .middleware import StageTimings, build_pipeline
+from .lifecycle import Reloader, inherited_socket, is_reloader_child, notify_ready, spawn_successor
+from .profiling import SamplingProfiler, cprofile_report
+from .parser import BodyReader, Headers, HTTPError, body_length, parse_request_head, read_request_head
+from .router import MethodNotAllowed, Router
+
+
+class Request:
+    """
+    HTTP-запрос. path — без строки запроса, query — сырая строка после «?».
+    Производные атрибуты (args, content_type, ...) вычисляются при первом обращении.
+
+    Тело либо уже прочитано (body), либо читается потоково через
+    request.stream() / await request.read() — для маршрутов с stream=True.
+    """
+
+    def __init__(self, method: str, path: str, headers: Dict[str, str], body: Optional[bytes] = b"",
+                 query: str = "", version: str = "HTTP/1.1",
+                 body_reader: Optional[BodyReader] = None) -> None:
+        self.method = method
+        self.path = path
+        self.headers = headers if isinstance(headers, Headers) else Headers(headers)
+        self._body = body if body_reader is None else None
+        self._body_reader = body_reader
+        self.query = query
+        self.version = version
+        # время этапов конвейера (см. App.add_middleware), секунды
+        self.timings: Dict[str, float] = {}
+        # шаблон маршрута, выбранного роутером (метка для метрик)
+        self.route: Optional[str] = None
+        # профили cProfile при ?__profile=1 (режим отладки)
+        self.profilers: Optional[list] = None
+        # момент получения головы запроса — от него считается время в очереди
+        self.received_at = time.perf_counter()
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            raise RuntimeError("Тело запроса ещё не прочитано: используйте await request.read() "
+                               "или request.stream()")
+        return self._body
+
+    @body.setter
+    def body(self, value: bytes) -> None:
+        self._body = value
+
+    @property
+    def body_consumed(self) -> bool:
+        """Тело полностью вычитано из соединения (можно читать следующий запрос)."""
+        return self._body_reader is None or self._body_reader.done
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Асинхронный итератор по кускам тела запроса."""
+        if self._body is not None:
+            if self._body:
+                yield self._body
+            return
+        async for chunk in self._body_reader:
+            yield chunk
+
+    async def read(self) -> bytes:
+        """Читает тело целиком (с учётом max_body_size) и запоминает его в body."""
+        if self._body is None:
+            self._body = b"".join([chunk async for chunk in self._body_reader])
+        return self._body
+
+    def __repr__(self) -> str:
+        return f"<Request {self.method} {self.full_path}>"
+
+    @cached_property
+    def args(self) -> Dict[str, str]:
+        """Параметры строки запроса (первое значение для каждого ключа)."""
+        if not self.query:
+            return {}
+        raw = parse_qs(self.query, keep_blank_values=True)
+        return {k: v[0] if v else "" for k, v in raw.items()}
+
+    @cached_property
+    def content_type(self) -> str:
+        return self.headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+
+    @cached_property
+    def content_length(self) -> Optional[int]:
+        value = self.headers.get("Content-Length")
+        return int(value) if value and value.isdigit() else None
+
+    @property
+    def full_path(self) -> str:
+        return f"{self.path}?{self.query}" if self.query else self.path
 
 
-Request = namedtuple("Request", ["method", "path", "headers", "body"])
 Response = namedtuple("Response", ["status", "headers", "body"])
 
 
+_STREAM_CHUNK = 64 * 1024
+_END_OF_STREAM = object()
+
+
+def _is_text(content_type: str) -> bool:
+    ct = content_type.lower()
+    return ct.startswith("text/") or ct.startswith("application/json") or "javascript" in ct
+
+
+def _is_file(body: Any) -> bool:
+    if not hasattr(body, "read") or not hasattr(body, "fileno"):
+        return False
+    try:
+        return stat.S_ISREG(os.fstat(body.fileno()).st_mode)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        return False
+
+
+class FileRange:
+    """
+    Участок [start, start + length) открытого файла — тело ответа 206.
+    Для _write_response выглядит как обычный файл и тоже уходит через
+    sendfile; read() не выходит за конец участка.
+    """
+
+    def __init__(self, file, start: int, length: int) -> None:
+        file.seek(start)
+        self.file = file
+        self.end = start + length
+        self.length = length
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = max(self.end - self.file.tell(), 0)
+        return self.file.read(remaining if size < 0 else min(size, remaining))
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _file_size(fileobj) -> Optional[int]:
+    if isinstance(fileobj, FileRange):
+        return fileobj.length
+    try:
+        return os.fstat(fileobj.fileno()).st_size - fileobj.tell()
+    except (OSError, ValueError, io.UnsupportedOperation):
+        return None
+
+
+def _iter_file(fileobj):
+    try:
+        while True:
+            chunk = fileobj.read(_STREAM_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+async def _write_chunk(writer, chunk, chunked: bool) -> None:
+    if isinstance(chunk, str):
+        chunk = chunk.encode()
+    if not chunk:
+        return
+    if chunked:
+        writer.write(b"%x\r\n" % len(chunk))
+        writer.write(chunk)
+        writer.write(b"\r\n")
+    else:
+        writer.write(chunk)
+    # drain() ждёт, пока буфер транспорта не опустеет ниже high-water mark,
+    # так медленный клиент притормаживает генератор, а не раздувает память
+    await writer.drain()
+
+
+async def _close_body(body) -> None:
+    close = getattr(body, "aclose", None) or getattr(body, "close", None)
+    if close is not None:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+
+
+async def _drain_body(body) -> None:
+    """Прогоняет потоковое тело ответа вхолостую (для профилирования)."""
+    if isinstance(body, (bytes, bytearray, memoryview, str)) or body is None:
+        return
+    if _is_file(body) or hasattr(body, "read"):
+        body.close()
+    elif hasattr(body, "__aiter__"):
+        async for _ in body:
+            pass
+    else:
+        for _ in body:
+            pass
+
+
+def send_file(path, content_type: Optional[str] = None, status: int = 200,
+              headers: Optional[Dict[str, str]] = None) -> Response:
+    """Ответ с содержимым файла; тело отдаётся через sendfile без чтения в память."""
+    path = os.fspath(path)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+    if content_type is None:
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    all_headers = {"Content-Type": content_type}
+    if headers:
+        all_headers.update(headers)
+    return Response(status, all_headers, open(path, "rb"))
+
+
+def make_response(result: Any) -> Response:
+    """
+    Приводит результат обработчика к Response: str/bytes, (тело, статус),
+    pathlib.Path (файл), открытый файл, генератор или асинхронный генератор.
+    """
+    if isinstance(result, Response):
+        if isinstance(result.body, str):
+            return result._replace(body=result.body.encode())
+        return result
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], int):
+        return make_response(result[0])._replace(status=result[1])
+    if isinstance(result, os.PathLike):
+        return send_file(result)
+    if isinstance(result, str):
+        result = result.encode()
+    elif result is None:
+        result = b""
+    return Response(200, {"Content-Type": "text/html"}, result)
+
+
+class ExecutorOverloaded(Exception):
+    """Очередь пула потоков для синхронных обработчиков переполнена."""
+
+    reason = "executor"
+
+
+class QueueTimeExceeded(ExecutorOverloaded):
+    """Запрос прождал дольше App.max_queue_time, прежде чем дошёл до обработчика."""
+
+    reason = "queue_time"
+
+
 class App:
-    def __init__(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        keep_alive_timeout: float = 5.0,
+        max_requests_per_connection: int = 100,
+        thread_pool_size: int = 8,
+        thread_queue_limit: int = 64,
+        max_head_size: int = 65536,
+        max_headers: int = 100,
+        max_body_size: int = 10 * 1024 * 1024,
+        response_cache_size: int = 64 * 1024 * 1024,
+        max_connections: int = 1024,
+        max_inflight: int = 256,
+        header_timeout: Optional[float] = 10.0,
+        body_timeout: Optional[float] = 30.0,
+        backlog: int = 1024,
+        max_queue_time: Optional[float] = None,
+        retry_after: int = 1,
+    ) -> None:
         self.host = host
         self.port = port
         self.router = Router()
+        # Сколько секунд держим простаивающее keep-alive соединение
+        # и сколько запросов обслуживаем на одном соединении.
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_requests_per_connection = max_requests_per_connection
+        # Ограничения на размер головы запроса и число заголовков (иначе 431).
+        self.max_head_size = max_head_size
+        self.max_headers = max_headers
+        # Максимальный размер тела запроса (иначе 413).
+        self.max_body_size = max_body_size
+        # Защита от перегрузки: сверх max_connections соединений и
+        # max_inflight одновременно обрабатываемых запросов сервер сразу
+        # отвечает 503 с Retry-After (0 — без ограничения). Запрос, который
+        # прождал в очереди (пул потоков, занятый event loop) дольше
+        # max_queue_time секунд, тоже получает 503 вместо обработки.
+        self.max_connections = max_connections
+        self.max_inflight = max_inflight
+        self.max_queue_time = max_queue_time
+        self.retry_after = retry_after
+        # Сколько можно читать голову запроса после первого байта и ждать
+        # очередной кусок тела (иначе 408); None — без ограничения.
+        self.header_timeout = header_timeout
+        self.body_timeout = body_timeout
+        # Очередь ещё не принятых соединений в ядре (listen backlog).
+        self.backlog = backlog
+        # Синхронные обработчики выполняются в ограниченном пуле потоков,
+        # чтобы не блокировать event loop. thread_queue_limit — сколько
+        # вызовов может ждать свободного потока (0 — без ограничения).
+        self.thread_pool_size = thread_pool_size
+        self.thread_queue_limit = thread_queue_limit
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inline_handlers: Set[Callable] = set()
+        self._streaming_handlers: Set[Callable] = set()
+        self._executor_lock = threading.Lock()
+        self._executor_stats = {"queued": 0, "active": 0, "completed": 0, "rejected": 0}
+        self._worker_start_hooks: list[Callable[[], Any]] = []
+        self._after_sync_hooks: list[Callable[[], Any]] = []
+        self.compressor: Optional[Compressor] = None
+        self.response_cache = ResponseCache(response_cache_size)
+        self._middlewares: list[Callable] = []
+        self._before_request: list[Callable] = []
+        self._after_request: list[Callable] = []
+        self._pipeline: Optional[Callable] = None
+        self.stage_timings = StageTimings()
+        self._inflight = 0
+        self._connections = 0
+        self._closing = False
+        self.shutdown_timeout = 10.0
+        self._shutdown_hooks: list[Callable[[], Any]] = []
+        self.debug = False
+        self._profiling = False
+        self.metrics: Optional[Metrics] = None
+        self._metrics_lag_interval = 0.5
+        self._route_paths: Dict[Callable, str] = {}
 
-    def route(self, path: str, method: str = "GET"):
+    def route(self, path: str, method: str = "GET", inline: bool = False, stream: bool = False):
+        """
+        Регистрирует обработчик. inline=True оставляет синхронный
+        обработчик в event loop (для тривиальных view без блокирующих вызовов).
+        stream=True не буферизует тело: обработчик (async) сам читает его
+        через request.stream() / await request.read().
+        """
         def decorator(func):
             self.router.add_route(method, path, func)
+            self._route_paths.setdefault(func, path)
+            if inline:
+                self._inline_handlers.add(func)
+            if stream:
+                self._streaming_handlers.add(func)
             return func
         return decorator
 
+    def static(self, prefix: str, directory: str, **options):
+        """
+        Раздаёт файлы из directory по адресам prefix/<путь> (GET и HEAD):
+        sendfile, Range, ETag/Last-Modified с 304, кэш мелких файлов в
+        памяти и готовые .gz-версии. options — см. StaticFiles.
+        """
+        from .static import StaticFiles
+
+        files = StaticFiles(directory, **options)
+        path = f"{prefix.rstrip('/')}/<path:filename>"
+        for method in ("GET", "HEAD"):
+            self.route(path, method)(files.serve)
+        return files
+
+    def cache(self, ttl: float = 60.0, vary: Sequence[str] = (), tables: Sequence[str] = ()):
+        """
+        Кэширует ответы обработчика (GET/HEAD, статус 200, буферизованное тело).
+        Ставится под @app.route. vary — заголовки запроса, входящие в ключ;
+        tables — таблицы БД, запись в которые сбрасывает кэш
+        (см. ResponseCache.invalidate_table и Model.add_write_listener).
+        Ответы получают ETag, If-None-Match даёт 304.
+        """
+        def decorator(func):
+            return cached_handler(self, self.response_cache, func, ttl, vary, tables)
+        return decorator
+
+    def enable_compression(self, min_size: int = 1024, level: int = 6,
+                           cache_size: int = 16 * 1024 * 1024) -> Compressor:
+        """Включает сжатие ответов (gzip/deflate, br при наличии пакета brotli)."""
+        self.compressor = Compressor(min_size=min_size, level=level, cache_size=cache_size)
+        self._pipeline = None
+        return self.compressor
+
+    def add_middleware(self, middleware: Callable) -> Callable:
+        """
+        Добавляет middleware вида mw(request, call_next) -> response.
+        Асинхронная middleware делает `await call_next(request)`; синхронная
+        может вернуть call_next(request) как есть или готовый ответ.
+        Первая добавленная middleware оказывается самой внешней.
+        """
+        self._middlewares.append(middleware)
+        self._pipeline = None
+        return middleware
+
+    def before_request(self, func: Callable) -> Callable:
+        """
+        Хук func(request) перед обработчиком (sync или async). Если он вернул
+        не None, это значение становится ответом, обработчик не вызывается.
+        """
+        self._before_request.append(func)
+        self._pipeline = None
+        return func
+
+    def after_request(self, func: Callable) -> Callable:
+        """Хук func(request, response) после обработчика; не-None заменяет ответ."""
+        self._after_request.append(func)
+        self._pipeline = None
+        return func
+
+    def middleware_timings(self) -> Dict[str, Dict[str, float]]:
+        """Статистика времени по этапам конвейера: count, total, avg, max (секунды)."""
+        return self.stage_timings.snapshot()
+
+    def enable_metrics(self, path: str = "/__metrics", lag_interval: float = 0.5) -> Metrics:
+        """
+        Включает сбор метрик и маршрут path с ними в текстовом формате
+        Prometheus: задержки по маршрутам, статусы, исключения обработчиков,
+        вызовы по типу обработчика, задержка event loop (замер раз в
+        lag_interval секунд), соединения, запросы в работе, пул потоков и
+        кэш ответов.
+        """
+        self.metrics = Metrics()
+        self._metrics_lag_interval = lag_interval
+
+        async def metrics_view(request):
+            return Response(200, {"Content-Type": "text/plain; version=0.0.4"},
+                            self.metrics.render(self._metrics_gauges()).encode())
+
+        self.route(path)(metrics_view)
+        return self.metrics
+
+    def _metrics_gauges(self) -> Dict[str, Any]:
+        executor = self.executor_stats()
+        cache = self.response_cache.stats()
+        return {
+            "miniweb_connections": ("Open client connections", self._connections),
+            "miniweb_requests_in_flight": ("Requests being processed", self._inflight),
+            "miniweb_executor_queued": ("Sync handler calls waiting for a thread", executor["queued"]),
+            "miniweb_executor_active": ("Sync handler calls running", executor["active"]),
+            "miniweb_executor_rejected_total": ("Sync handler calls rejected (503)", executor["rejected"]),
+            "miniweb_response_cache_hits_total": ("Response cache hits", cache["hits"]),
+            "miniweb_response_cache_misses_total": ("Response cache misses", cache["misses"]),
+            "miniweb_response_cache_entries": ("Response cache entries", cache["entries"]),
+            "miniweb_event_loop_lag_last_seconds": ("Last event loop lag sample", self.metrics.loop_lag_last),
+        }
+
+    def _start_background(self) -> list:
+        tasks = []
+        if self.metrics is not None:
+            tasks.append(asyncio.ensure_future(self.metrics.monitor_loop_lag(self._metrics_lag_interval)))
+        return tasks
+
+    def _build_pipeline(self) -> Callable:
+        self._pipeline = build_pipeline(
+            self._dispatch, self._middlewares, self._before_request, self._after_request,
+            make_response, self.stage_timings, self.compressor,
+        )
+        return self._pipeline
+
+    async def _run_pipeline(self, request: Request) -> Response:
+        pipeline = self._pipeline or self._build_pipeline()
+        if self.debug and "__profile" in request.query and "__profile" in request.args:
+            return await self._profile(pipeline, request)
+        try:
+            return make_response(await pipeline(request))
+        except HTTPError as e:
+            return self._error_response(e.status, str(e))
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.record_exception(request.route, e)
+            return Response(500, {"Content-Type": "text/plain"}, str(e).encode())
+
+    async def _profile(self, pipeline: Callable, request: Request) -> Response:
+        """
+        ?__profile=1 — cProfile запроса (цикл событий и поток синхронного
+        обработчика), ?__profile=flame — свёрнутые стеки сэмплирующего
+        профайлера. Ответ обработчика отбрасывается, тело стрима
+        вычитывается, чтобы профиль включал его генерацию.
+
+        Профайлер видит всё, что выполняется в потоке event loop, в том
+        числе чужие запросы между await, поэтому точен только при
+        единственном запросе в работе. Два профилируемых запроса
+        одновременно не допускаются: второй получает 409.
+        """
+        if self._profiling:
+            return self._error_response(409, "Another profiled request is in progress")
+        self._profiling = True
+        try:
+            return await self._profile_request(pipeline, request)
+        finally:
+            self._profiling = False
+
+    async def _profile_request(self, pipeline: Callable, request: Request) -> Response:
+        flame = request.args["__profile"] == "flame"
+        if flame:
+            sampler = SamplingProfiler()
+            sampler.start()
+        else:
+            profiler = cProfile.Profile()
+            request.profilers = [profiler]
+            profiler.enable()
+        try:
+            response = make_response(await pipeline(request))
+            await _drain_body(response.body)
+        except Exception as e:
+            response = Response(500, {"Content-Type": "text/plain"}, str(e).encode())
+        finally:
+            if flame:
+                sampler.stop()
+            else:
+                profiler.disable()
+        if flame:
+            report = sampler.collapsed()
+        else:
+            report = cprofile_report(request.profilers)
+        return Response(200, {"Content-Type": "text/plain", "X-Profiled-Status": str(response.status)},
+                        report.encode())
+
+    def on_worker_start(self, func):
+        """
+        Регистрирует функцию, вызываемую в каждом воркер-процессе до начала
+        обслуживания (например, чтобы заново открыть соединение с БД после fork).
+        """
+        self._worker_start_hooks.append(func)
+        return func
+
+    def after_sync_handler(self, func):
+        """
+        Регистрирует функцию без аргументов, вызываемую в потоке пула после
+        каждого синхронного обработчика (и при исключении) — например,
+        Model.release_connection, чтобы поток не держал соединение БД между
+        запросами.
+        """
+        self._after_sync_hooks.append(func)
+        return func
+
+    def on_shutdown(self, func):
+        """
+        Регистрирует функцию (sync или async), вызываемую при плавной
+        остановке процесса после завершения текущих запросов — например,
+        чтобы закрыть соединения с БД.
+        """
+        self._shutdown_hooks.append(func)
+        return func
+
+    def executor_stats(self) -> Dict[str, int]:
+        """Текущее состояние пула потоков: глубина очереди, активные задачи и т.д."""
+        with self._executor_lock:
+            stats = dict(self._executor_stats)
+        stats["workers"] = self.thread_pool_size
+        stats["queue_limit"] = self.thread_queue_limit
+        return stats
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.thread_pool_size,
+                thread_name_prefix="miniweb-handler",
+            )
+        return self._executor
+
+    def _shutdown_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _call_sync(self, handler: Callable, request: "Request", params: Dict[str, Any]) -> Any:
+        stats = self._executor_stats
+        with self._executor_lock:
+            if self.thread_queue_limit and stats["queued"] >= self.thread_queue_limit:
+                stats["rejected"] += 1
+                raise ExecutorOverloaded("Handler thread pool queue is full")
+            stats["queued"] += 1
+
+        def job():
+            with self._executor_lock:
+                stats["queued"] -= 1
+                stats["active"] += 1
+            try:
+                if (self.max_queue_time is not None
+                        and time.perf_counter() - request.received_at > self.max_queue_time):
+                    raise QueueTimeExceeded("Request waited too long for a handler thread")
+                if request.profilers is not None:
+                    profiler = cProfile.Profile()
+                    request.profilers.append(profiler)
+                    return profiler.runcall(handler, request, **params)
+                return handler(request, **params)
+            finally:
+                for hook in self._after_sync_hooks:
+                    hook()
+                with self._executor_lock:
+                    stats["active"] -= 1
+                    stats["completed"] += 1
+
+        loop = asyncio.get_running_loop()
+        # contextvars запроса (например, карта идентичности ORM) видны в потоке
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self._get_executor(), ctx.run, job)
+
     async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Цикл обработки одного TCP-соединения (HTTP/1.1 keep-alive).
+        Запросы читаются из потока по очереди, поэтому конвейерные
+        (pipelined) запросы обслуживаются строго в порядке поступления.
+        """
+        if self.max_connections and self._connections >= self.max_connections:
+            # ответ без чтения запроса: клиент узнаёт о перегрузке сразу
+            try:
+                await self._write_response(writer, self._shed("connections"))
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+            return
+        served = 0
+        self._connections += 1
         try:
-            raw = await reader.readuntil(b"\r\n\r\n")
-        except asyncio.IncompleteReadError:
-            writer.close()
+            while True:
+                try:
+                    raw = await read_request_head(
+                        reader, self.max_head_size,
+                        self.keep_alive_timeout if served else self.header_timeout,
+                        self.header_timeout,
+                    )
+                    if raw is None:
+                        return
+                    method, path, query, version, headers = parse_request_head(raw, self.max_headers)
+                    length = body_length(headers)
+                    if length is not None and length > self.max_body_size:
+                        raise HTTPError(413, "Request body too large")
+                except HTTPError as e:
+                    await self._write_response(writer, self._error_response(e.status, str(e)))
+                    return
+
+                if length == 0:
+                    request = Request(method, path, headers, b"", query, version)
+                else:
+                    body_reader = BodyReader(reader, length, self.max_body_size,
+                                             timeout=self.body_timeout)
+                    request = Request(method, path, headers, None, query, version, body_reader)
+                served += 1
+
+                self._inflight += 1
+                started = time.perf_counter()
+                try:
+                    if self.max_inflight and self._inflight > self.max_inflight:
+                        resp = self._shed("inflight")
+                    else:
+                        resp = await self._run_pipeline(request)
+                    # недочитанное тело (ошибка, 413, потоковый обработчик бросил
+                    # чтение) оставляет поток в неизвестном месте — закрываем
+                    keep_alive = (
+                        self._wants_keep_alive(version, headers)
+                        and served < self.max_requests_per_connection
+                        and request.body_consumed
+                        and not self._closing
+                    )
+                    keep_alive = await self._write_response(
+                        writer, resp, keep_alive, chunked=version != "HTTP/1.0",
+                        head=method == "HEAD",
+                    )
+                finally:
+                    self._inflight -= 1
+                if self.metrics is not None:
+                    self.metrics.observe_request(request.route, method, resp.status,
+                                                 time.perf_counter() - started)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
             return
+        finally:
+            self._connections -= 1
+            writer.close()
 
-        text = raw.decode()
-        lines = text.split("\r\n")
-        method, path, *_ = lines[0].split(" ")
-        headers = {}
-        idx = 1
-        while lines[idx]:
-            key, val = lines[idx].split(":", 1)
-            headers[key.strip()] = val.strip()
-            idx += 1
+    def _shed(self, reason: str) -> Response:
+        """Ответ 503 при перегрузке; reason попадает в метрики."""
+        if self.metrics is not None:
+            self.metrics.record_shed(reason)
+        return Response(503, {"Content-Type": "text/plain", "Retry-After": str(self.retry_after)},
+                        b"503 Service Unavailable")
 
-        body = b""
-        if "Content-Length" in headers:
-            length = int(headers["Content-Length"])
-            body = await reader.readexactly(length)
+    @staticmethod
+    def _error_response(status: int, message: str = "") -> Response:
+        text = f"{status} {responses.get(status, '')}"
+        if message:
+            text += f": {message}"
+        return Response(status, {"Content-Type": "text/plain"}, text.encode())
 
-        request = Request(method, path, headers, body)
+    @staticmethod
+    def _wants_keep_alive(version: str, headers: Dict[str, str]) -> bool:
+        connection = headers.get("Connection", "").lower()
+        if version == "HTTP/1.1":
+            return "close" not in connection
+        return "keep-alive" in connection
 
+    async def _dispatch(self, request: Request) -> Response:
         try:
-            handler, params = self.router.match(method, path)
+            handler, params = self.router.match(request.method, request.path)
+            request.route = self._route_paths.get(handler)
+            if (self.max_queue_time is not None
+                    and time.perf_counter() - request.received_at > self.max_queue_time):
+                raise QueueTimeExceeded("Request waited too long in the event loop")
+            if handler not in self._streaming_handlers:
+                await request.read()
+            metrics = self.metrics
             if inspect.iscoroutinefunction(handler):
+                if metrics is not None:
+                    metrics.handler_calls["async"] += 1
                 result = await handler(request, **params)
-            else:
+            elif handler in self._inline_handlers:
+                if metrics is not None:
+                    metrics.handler_calls["inline"] += 1
                 result = handler(request, **params)
-
-            if isinstance(result, Response):
-                resp = result
             else:
-                content = result.encode() if isinstance(result, str) else result
-                resp = Response(200, {"Content-Type": "text/html"}, content)
+                if metrics is not None:
+                    metrics.handler_calls["thread"] += 1
+                result = await self._call_sync(handler, request, params)
+
+            return make_response(result)
+        except HTTPError as e:
+            return self._error_response(e.status, str(e))
         except FileNotFoundError:
-            resp = Response(404, {"Content-Type": "text/plain"}, b"404 Not Found")
+            return Response(404, {"Content-Type": "text/plain"}, b"404 Not Found")
+        except MethodNotAllowed as e:
+            return Response(405, {"Content-Type": "text/plain", "Allow": ", ".join(e.allowed)},
+                            b"405 Method Not Allowed")
+        except ExecutorOverloaded as e:
+            return self._shed(e.reason)
         except Exception as e:
-            resp = Response(500, {"Content-Type": "text/plain"}, str(e).encode())
+            if self.metrics is not None:
+                self.metrics.record_exception(request.route, e)
+            return Response(500, {"Content-Type": "text/plain"}, str(e).encode())
 
-        await self._write_response(writer, resp)
-        writer.close()
+    async def _write_response(self, writer, response: Response, keep_alive: bool = False,
+                              chunked: bool = True, head: bool = False) -> bool:
+        """
+        Пишет ответ в сокет. bytes уходят одним куском с Content-Length,
+        файлы — через loop.sendfile, итераторы/асинхронные генераторы —
+        кусками в Transfer-Encoding: chunked (или до закрытия соединения,
+        если клиент не умеет chunked). head=True (ответ на HEAD) — только
+        заголовки, те же, что у GET. Возвращает False, если соединение
+        после ответа нужно закрыть.
+        """
+        body = response.body
+        if isinstance(body, str):
+            body = body.encode()
+        length: Optional[int] = None
+        bodiless = response.status < 200 or response.status in (204, 304)
+        if bodiless:
+            body = b""
+        elif isinstance(body, (bytes, bytearray, memoryview)):
+            length = len(body)
+        elif _is_file(body):
+            length = _file_size(body)
+        if length is None and not chunked and not bodiless:
+            keep_alive = False
 
-    async def _write_response(self, writer, response: Response):
         writer.write(f"HTTP/1.1 {response.status} {responses.get(response.status, '')}\r\n".encode())
         for k, v in response.headers.items():
-            if k.lower() == "content-type" and "charset" not in v.lower():
+            lower = k.lower()
+            if lower in ("content-length", "connection", "transfer-encoding"):
+                continue
+            if lower == "content-type" and "charset" not in v.lower() and _is_text(v):
                 v += "; charset=utf-8"
             writer.write(f"{k}: {v}\r\n".encode())
+        if length is not None:
+            writer.write(f"Content-Length: {length}\r\n".encode())
+        elif chunked and not bodiless:
+            writer.write(b"Transfer-Encoding: chunked\r\n")
+        writer.write(b"Connection: keep-alive\r\n" if keep_alive else b"Connection: close\r\n")
         writer.write(b"\r\n")
-        writer.write(response.body)
+
+        if head:
+            await _close_body(body)
+            await writer.drain()
+            return keep_alive
+        if isinstance(body, (bytes, bytearray, memoryview)):
+            writer.write(body)
+            await writer.drain()
+        elif length is not None:
+            await self._send_file(writer, body, length)
+        else:
+            try:
+                await self._write_stream(writer, body, chunked)
+            except (ConnectionError, asyncio.CancelledError):
+                raise
+            except Exception:
+                # заголовки уже ушли, сообщить об ошибке статусом нельзя:
+                # обрываем соединение без завершающего чанка
+                return False
+        return keep_alive
+
+    @staticmethod
+    async def _send_file(writer, fileobj, length: int) -> None:
         await writer.drain()
+        try:
+            loop = asyncio.get_running_loop()
+            file = fileobj.file if isinstance(fileobj, FileRange) else fileobj
+            await loop.sendfile(writer.transport, file, fileobj.tell(), length, fallback=True)
+        finally:
+            fileobj.close()
+
+    async def _write_stream(self, writer, body, chunked: bool) -> None:
+        if _is_file(body) or hasattr(body, "read"):
+            body = _iter_file(body)
+        try:
+            if hasattr(body, "__aiter__"):
+                async for chunk in body:
+                    await _write_chunk(writer, chunk, chunked)
+            elif isinstance(body, (list, tuple)):
+                for chunk in body:
+                    await _write_chunk(writer, chunk, chunked)
+            else:
+                # синхронный генератор может блокироваться (БД, диск): как и
+                # синхронные обработчики, он продвигается в пуле потоков, по
+                # переходу на кусок — поэтому куски лучше делать крупными
+                loop = asyncio.get_running_loop()
+                executor = self._get_executor()
+                ctx = contextvars.copy_context()
+                it = iter(body)
+                while True:
+                    chunk = await loop.run_in_executor(executor, ctx.run, next, it, _END_OF_STREAM)
+                    if chunk is _END_OF_STREAM:
+                        break
+                    await _write_chunk(writer, chunk, chunked)
+        finally:
+            try:
+                await _close_body(body)
+            except ValueError:
+                # соединение оборвалось, пока next() ещё выполняется в потоке
+                pass
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _serve(self, sock, handover: bool = False) -> None:
+        """
+        Обслуживает слушающий сокет до SIGTERM/SIGINT, затем плавно
+        останавливается: перестаёт принимать соединения, закрывает
+        keep-alive после текущего ответа, ждёт запросы в работе до
+        shutdown_timeout и вызывает хуки on_shutdown. handover=True
+        включает перезапуск по SIGHUP с передачей сокета новому процессу.
+        """
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        server = await asyncio.start_server(self._handle_client, sock=sock, limit=self.max_head_size)
+        if handover:
+            restarting = []
+
+            def on_hup():
+                if not restarting:
+                    restarting.append(loop.create_task(self._hand_over(sock, stop, restarting)))
+            loop.add_signal_handler(signal.SIGHUP, on_hup)
+        background = self._start_background()
+        notify_ready()
+        try:
+            await stop.wait()
+        finally:
+            self._closing = True
+            server.close()
+            deadline = loop.time() + self.shutdown_timeout
+            while self._inflight and loop.time() < deadline:
+                await asyncio.sleep(0.05)
+            for task in background:
+                task.cancel()
+            await self._run_shutdown_hooks()
+
+    async def _hand_over(self, sock, stop: asyncio.Event, restarting: list) -> None:
+        print("* SIGHUP: starting a new process")
+        loop = asyncio.get_running_loop()
+        successor = await loop.run_in_executor(None, spawn_successor, sock)
+        if successor is not None:
+            stop.set()
+        restarting.clear()
+
+    async def _run_shutdown_hooks(self) -> None:
+        for hook in self._shutdown_hooks:
+            try:
+                result = hook()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                traceback.print_exc()
 
     def start(self) -> None:
-        async def runner():
-            server = await asyncio.start_server(self._handle_client, self.host, self.port)
-            print(f"* Running on http://{self.host}:{self.port}")
-            async with server:
-                await server.serve_forever()
-        asyncio.run(runner())
-
-    def run(self, host: str = None, port: int = None, debug: bool = False) -> None:
+        """
+        Однопроцессный режим. SIGTERM/SIGINT — плавная остановка, SIGHUP —
+        перезапуск без простоя (новый процесс получает слушающий сокет).
+        """
+        from .workers import create_listen_socket
+        sock = inherited_socket()
+        if sock is None:
+            sock = create_listen_socket(self.host, self.port, backlog=self.backlog)
+        self.port = sock.getsockname()[1]
+        self._build_pipeline()
+        print(f"* Running on http://{self.host}:{self.port} (pid {os.getpid()})")
+        try:
+            asyncio.run(self._serve(sock, handover=not is_reloader_child()))
+        finally:
+            self._shutdown_executor()
+            sock.close()
+
+    def serve_worker(self, sock) -> None:
+        """
+        Точка входа воркер-процесса: обслуживает уже открытый сокет до SIGTERM,
+        после чего перестаёт принимать соединения и дожидается текущих запросов.
+        """
+        for hook in self._worker_start_hooks:
+            hook()
+        self._build_pipeline()
+        try:
+            asyncio.run(self._serve(sock))
+        finally:
+            self._shutdown_executor()
+
+    def run(
+        self,
+        host: str = None,
+        port: int = None,
+        debug: bool = False,
+        thread_pool_size: int = None,
+        thread_queue_limit: int = None,
+        workers: int = 1,
+        reload: bool = False,
+        reload_paths: Sequence[str] = (),
+    ) -> None:
+        """
+        Запускает сервер. reload=True (для разработки) перезапускает его
+        при изменении файлов в reload_paths (по умолчанию — текущий каталог).
+        """
+        if thread_pool_size is not None:
+            self.thread_pool_size = thread_pool_size
+        if thread_queue_limit is not None:
+            self.thread_queue_limit = thread_queue_limit
         if host is not None:
             self.host = host
         if port is not None:
             self.port = port
+        self.debug = debug
         if debug:
             print("[DEBUG MODE ENABLED]")
-        self.start()
\ No newline at end of file
+        if reload and not is_reloader_child():
+            from .workers import create_listen_socket
+            sock = create_listen_socket(self.host, self.port, backlog=self.backlog)
+            print(f"* Running on http://{self.host}:{sock.getsockname()[1]}")
+            Reloader(sock, reload_paths, shutdown_timeout=self.shutdown_timeout).run()
+            return
+        if workers > 1:
+            from .workers import Supervisor
+            Supervisor(self, workers, shutdown_timeout=self.shutdown_timeout).run()
+            return
+        self.start()
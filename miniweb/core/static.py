@@ -0,0 +1,203 @@
+"""
+Раздача статических файлов: app.static("/static", "static").
+
+Файлы уходят через loop.sendfile без копирования в память; мелкие и
+частые (до cache_file_size) держатся в памяти, актуальность проверяется
+по stat (mtime_ns и размер) на каждом запросе. Поддерживаются
+ETag/Last-Modified с ответом 304, один диапазон Range (206/416) с If-Range
+и заранее сжатые соседние файлы «имя.gz» для клиентов с gzip.
+"""
+import mimetypes
+import os
+import stat
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import unquote
+
+from .cache import matching_etag
+from .compression import parse_accept_encoding
+from .server import FileRange, Response
+
+
+def _resolve(root: str, filename: str) -> str:
+    """Путь к файлу внутри root; всё, что ведёт наружу или в скрытые файлы, — FileNotFoundError."""
+    filename = unquote(filename)
+    if "\x00" in filename or "\\" in filename:
+        raise FileNotFoundError(filename)
+    parts = filename.split("/")
+    # пустые части (//, ведущий /), «.», «..» и скрытые файлы (.env, .git)
+    if any(not part or part.startswith(".") for part in parts):
+        raise FileNotFoundError(filename)
+    path = os.path.realpath(os.path.join(root, *parts))
+    # симлинк может указывать за пределы каталога
+    if not path.startswith(root + os.sep):
+        raise FileNotFoundError(filename)
+    return path
+
+
+def parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    'bytes=0-99' -> (0, 100): начало и длина. None — заголовок не разобран
+    или диапазонов несколько (тогда отдаётся весь файл), (-1, 0) —
+    диапазон вне файла (416).
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                return (-1, 0) if suffix == 0 else None
+            start = max(size - suffix, 0)
+            end = size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else max(start, size - 1)
+            if start < 0 or end < start:
+                return None
+    except ValueError:
+        return None
+    if start >= size:
+        return (-1, 0)
+    end = min(end, size - 1)
+    return start, end - start + 1
+
+
+class StaticFiles:
+    """
+    Обработчик статических файлов из directory (см. App.static).
+
+    max_age — Cache-Control: max-age для ответов; cache_file_size —
+    файлы не больше этого размера кэшируются в памяти целиком, cache_size —
+    предел суммарного размера кэша (LRU); precompressed=True отдаёт
+    «файл.gz» вместо файла, если он есть, не старше оригинала и клиент
+    принимает gzip.
+    """
+
+    def __init__(self, directory: str, max_age: int = 3600, cache_file_size: int = 64 * 1024,
+                 cache_size: int = 16 * 1024 * 1024, precompressed: bool = True) -> None:
+        self.root = os.path.realpath(directory)
+        self.max_age = max_age
+        self.cache_file_size = cache_file_size
+        self.cache_size = cache_size
+        self.precompressed = precompressed
+        # путь -> (mtime_ns, size, содержимое)
+        self._cache: "OrderedDict[str, Tuple[int, int, bytes]]" = OrderedDict()
+        self._cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _stat(self, path: str) -> Optional[os.stat_result]:
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        return st if stat.S_ISREG(st.st_mode) else None
+
+    def _select(self, path: str, accept_encoding: str):
+        """(путь, stat, gzip?, есть ли .gz-вариант) для отдачи."""
+        st = self._stat(path)
+        if st is None:
+            raise FileNotFoundError(path)
+        if not self.precompressed:
+            return path, st, False, False
+        gz_st = self._stat(path + ".gz")
+        if gz_st is None or gz_st.st_mtime_ns < st.st_mtime_ns:
+            return path, st, False, False
+        if parse_accept_encoding(accept_encoding).get("gzip", 0) > 0:
+            return path + ".gz", gz_st, True, True
+        return path, st, False, True
+
+    def _cached(self, path: str, st: os.stat_result) -> Optional[bytes]:
+        if st.st_size > self.cache_file_size:
+            return None
+        entry = self._cache.get(path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            self._cache.move_to_end(path)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        with open(path, "rb") as f:
+            fresh = os.fstat(f.fileno())
+            data = f.read()
+        if entry is not None:
+            del self._cache[path]
+            self._cached_bytes -= len(entry[2])
+        # файл могли переписать между stat и чтением — такое не запоминаем
+        if fresh.st_mtime_ns == st.st_mtime_ns and fresh.st_size == len(data) == st.st_size:
+            self._cache[path] = (st.st_mtime_ns, st.st_size, data)
+            self._cached_bytes += len(data)
+            while self._cached_bytes > self.cache_size and self._cache:
+                _, (_, _, old) = self._cache.popitem(last=False)
+                self._cached_bytes -= len(old)
+        return data
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._cached_bytes = 0
+
+    async def serve(self, request, filename: str) -> Response:
+        path = _resolve(self.root, filename)
+        headers = request.headers
+        served, st, gzipped, has_variant = self._select(path, headers.get("Accept-Encoding", ""))
+
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}{"-gz" if gzipped else ""}"'
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+        response_headers = {
+            "Content-Type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+            "ETag": etag,
+            "Last-Modified": last_modified,
+            "Cache-Control": f"public, max-age={self.max_age}",
+            "Accept-Ranges": "bytes",
+        }
+        if gzipped:
+            response_headers["Content-Encoding"] = "gzip"
+        if has_variant:
+            response_headers["Vary"] = "Accept-Encoding"
+
+        matched = self._not_modified(headers, etag, st.st_mtime)
+        if matched is not None:
+            del response_headers["Content-Type"]
+            response_headers["ETag"] = matched
+            return Response(304, response_headers, b"")
+
+        size = st.st_size
+        byte_range = None
+        range_header = headers.get("Range")
+        if range_header and request.method == "GET":
+            if_range = headers.get("If-Range")
+            if if_range is None or if_range.strip() in (etag, last_modified):
+                byte_range = parse_range(range_header, size)
+        if byte_range is not None and byte_range[0] < 0:
+            response_headers["Content-Range"] = f"bytes */{size}"
+            return Response(416, response_headers, b"")
+
+        data = self._cached(served, st)
+        if byte_range is None:
+            return Response(200, response_headers, data if data is not None else open(served, "rb"))
+        start, length = byte_range
+        response_headers["Content-Range"] = f"bytes {start}-{start + length - 1}/{size}"
+        if data is not None:
+            return Response(206, response_headers, data[start:start + length])
+        return Response(206, response_headers, FileRange(open(served, "rb"), start, length))
+
+    @staticmethod
+    def _not_modified(headers, etag: str, mtime: float) -> Optional[str]:
+        """ETag для ответа 304 или None, если файл нужно отдать."""
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match is not None:
+            # мелкий текстовый файл мог уйти сжатым Compressor'ом со своим ETag
+            return matching_etag(if_none_match, etag)
+        if_modified_since = headers.get("If-Modified-Since")
+        if if_modified_since is None:
+            return None
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return None
+        return etag if int(mtime) <= since else None
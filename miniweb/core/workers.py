@@ -0,0 +1,167 @@
+import os
+import signal
+import socket
+import time
+from typing import Dict, Optional
+
+from .lifecycle import inherited_socket, notify_ready, spawn_successor, take_ready_fd
+
+
+def create_listen_socket(host: str, port: int, reuse_port: bool = False, backlog: int = 128,
+                         listen: bool = True) -> socket.socket:
+    """Создаёт слушающий TCP-сокет (с SO_REUSEPORT, если он нужен и доступен)."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # proto=IPPROTO_TCP наследуют принятые сокеты, и только для них asyncio
+    # включает TCP_NODELAY; с proto=0 ответы keep-alive ждут delayed ACK (~40 мс)
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    if listen:
+        sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+class Supervisor:
+    """
+    Мастер-процесс многопроцессного режима App.run(workers=N).
+
+    Форкает N воркеров, каждый со своим event loop. При reuse_port=True
+    каждый воркер открывает собственный сокет с SO_REUSEPORT и ядро само
+    распределяет соединения; иначе все воркеры наследуют один общий сокет.
+    Упавшие воркеры перезапускаются, SIGTERM/SIGINT передаётся воркерам
+    для плавной остановки. SIGHUP запускает новый мастер с тем же сокетом
+    и, когда он поднял своих воркеров, плавно останавливает старых.
+    """
+
+    def __init__(self, app, workers: int, reuse_port: Optional[bool] = None,
+                 shutdown_timeout: float = 10.0) -> None:
+        if reuse_port is None:
+            reuse_port = hasattr(socket, "SO_REUSEPORT")
+        self.app = app
+        self.workers = workers
+        self.reuse_port = reuse_port
+        self.shutdown_timeout = shutdown_timeout
+        self.children: Dict[int, int] = {}
+        self._sock: Optional[socket.socket] = None
+        self._stopping = False
+        self._ready_fd: Optional[str] = None
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = slot
+            return
+        # дочерний процесс
+        code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            # перезапуском по SIGHUP занимается мастер
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            if self._ready_fd is not None:
+                os.close(int(self._ready_fd))
+            if self.reuse_port:
+                # унаследованный сокет мастера входит в ту же reuseport-группу;
+                # если его не закрыть, ядро будет отдавать ему часть соединений
+                if self._sock is not None:
+                    self._sock.close()
+                sock = create_listen_socket(self.app.host, self.app.port, reuse_port=True,
+                                            backlog=self.app.backlog)
+            else:
+                sock = self._sock
+            self.app.serve_worker(sock)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _on_signal(self, signum, frame) -> None:
+        self._stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _on_hup(self, signum, frame) -> None:
+        if self._stopping or self._sock is None:
+            return
+        print("* SIGHUP: starting a new master")
+        if spawn_successor(self._sock, timeout=self.shutdown_timeout + 20) is not None:
+            self._on_signal(signum, frame)
+
+    def run(self) -> None:
+        # готовность сообщает мастер, когда воркеры запущены, а не сами воркеры
+        self._ready_fd = take_ready_fd()
+        inherited = inherited_socket()
+        if inherited is not None:
+            # перезапуск по SIGHUP: сокет уже привязан предыдущим мастером
+            self._sock = inherited
+            self.app.port = self._sock.getsockname()[1]
+        elif self.reuse_port:
+            # мастер только привязывает сокет (без listen): порт остаётся
+            # занятым за нами, ошибка bind проявляется сразу, а порт 0
+            # превращается в конкретный номер для воркеров
+            self._sock = create_listen_socket(self.app.host, self.app.port, reuse_port=True,
+                                              listen=False)
+            self.app.port = self._sock.getsockname()[1]
+        else:
+            self._sock = create_listen_socket(self.app.host, self.app.port, backlog=self.app.backlog)
+            self.app.port = self._sock.getsockname()[1]
+
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        signal.signal(signal.SIGHUP, self._on_hup)
+
+        print(f"* Running on http://{self.app.host}:{self.app.port} ({self.workers} workers, "
+              f"pid {os.getpid()})")
+        for slot in range(self.workers):
+            self._spawn(slot)
+        if self._ready_fd is not None:
+            notify_ready(self._ready_fd)
+            self._ready_fd = None
+
+        last_crash = 0.0
+        while self.children:
+            if self._stopping:
+                self._reap(time.monotonic() + self.shutdown_timeout)
+                break
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot = self.children.pop(pid, None)
+            if slot is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            print(f"* Worker {pid} exited with code {code}, restarting")
+            # защита от бесконечного цикла падений при старте
+            now = time.monotonic()
+            if now - last_crash < 1.0:
+                time.sleep(1.0)
+            last_crash = now
+            self._spawn(slot)
+
+        if self._sock is not None:
+            self._sock.close()
+
+    def _reap(self, deadline: float) -> None:
+        """Ждёт завершения воркеров до дедлайна, затем добивает оставшихся."""
+        while self.children and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.children.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.children.pop(pid, None)
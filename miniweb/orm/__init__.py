@@ -1,4 +1,10 @@
 from .models import Model
+from .queryset import QuerySet
+from .transactions import atomic
+from .connection import ConnectionPool, PoolTimeout
+from .cache import RowCache, identity_map, identity_map_middleware
+from .migrations import migrate
+from .executor import query_budget, track_queries
 from .fields import (
     Field,
     IntegerField,
@@ -6,14 +12,26 @@ from .fields import (
     BooleanField,
     FloatField,
     ForeignKey,
+    Index,
 )
 
 __all__ = [
     "Model",
+    "QuerySet",
+    "atomic",
+    "ConnectionPool",
+    "PoolTimeout",
+    "RowCache",
+    "identity_map",
+    "identity_map_middleware",
+    "migrate",
+    "query_budget",
+    "track_queries",
     "Field",
     "IntegerField",
     "StringField",
     "BooleanField",
     "FloatField",
     "ForeignKey",
+    "Index",
 ]
\ No newline at end of file
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+_current_map: ContextVar = ContextVar("miniweb_identity_map", default=None)
+
+
+class IdentityMap:
+    """
+    Объекты, уже загруженные в текущей единице работы: (модель, pk) -> объект.
+    Пока карта активна, Model.get и гидрация запросов возвращают один и тот
+    же экземпляр для одного pk, а Model.get не ходит в БД повторно.
+    """
+
+    def __init__(self) -> None:
+        self._objects: Dict[Tuple[type, Any], Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def get(self, model: type, pk) -> Optional[Any]:
+        obj = self._objects.get((model, pk))
+        if obj is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return obj
+
+    def find(self, model: type, pk) -> Optional[Any]:
+        """Как get(), но без учёта в hits/misses (для гидрации строк)."""
+        return self._objects.get((model, pk))
+
+    def add(self, obj):
+        """Регистрирует объект; если pk уже есть в карте — возвращает прежний экземпляр."""
+        model = type(obj)
+        pk = getattr(obj, model._primary_key_name)
+        if pk is None:
+            return obj
+        return self._objects.setdefault((model, pk), obj)
+
+    def discard(self, model: type, pk) -> None:
+        self._objects.pop((model, pk), None)
+
+    def clear(self) -> None:
+        self._objects.clear()
+
+
+def current_identity_map() -> Optional[IdentityMap]:
+    return _current_map.get()
+
+
+class identity_map(ContextDecorator):
+    """
+    Область действия карты идентичности: контекстный менеджер и декоратор.
+
+        with identity_map():
+            a = Author.get(1)
+            assert Book.get(5).author is a   # без второго SELECT
+
+    Вложенный identity_map() использует уже открытую карту. Карта живёт
+    в contextvars, поэтому у каждого запроса (задачи asyncio или потока
+    обработчика) она своя.
+    """
+
+    def __init__(self) -> None:
+        self._tokens = []
+
+    def __enter__(self) -> IdentityMap:
+        current = _current_map.get()
+        if current is not None:
+            self._tokens.append(None)
+            return current
+        imap = IdentityMap()
+        self._tokens.append(_current_map.set(imap))
+        return imap
+
+    def __exit__(self, exc_type, exc, tb):
+        token = self._tokens.pop()
+        if token is not None:
+            _current_map.reset(token)
+        return False
+
+
+async def identity_map_middleware(request, call_next):
+    """Middleware для App.add_middleware: одна карта идентичности на запрос."""
+    with identity_map():
+        return await call_next(request)
+
+
+class RowCache:
+    """
+    Кэш строк одной модели для Model.get: pk -> кортеж значений колонок,
+    LRU на max_size записей и необязательный TTL в секундах.
+
+    Хранятся значения, а не объекты: каждый get() получает свой экземпляр.
+    Запись через ORM сбрасывает строку (save/delete) или весь кэш модели
+    (COMMIT atomic()). Поколение (generation) защищает от гонки, когда
+    другой поток прочитал строку до записи, а положить её в кэш пытается
+    уже после сброса. Кэш локален для процесса: при нескольких воркерах
+    чужие записи видны только по истечении TTL.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._rows: "OrderedDict[Any, Tuple[tuple, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, pk) -> Optional[tuple]:
+        with self._lock:
+            entry = self._rows.get(pk)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._rows[pk]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end(pk)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, pk, values: tuple, generation: Optional[int] = None) -> None:
+        """Кладёт строку, если с момента чтения (generation) не было сброса."""
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._rows[pk] = (tuple(values), expires)
+            self._rows.move_to_end(pk)
+            while len(self._rows) > self.max_size:
+                self._rows.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, pk) -> None:
+        with self._lock:
+            self.generation += 1
+            self._rows.pop(pk, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._rows.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._rows), "max_size": self.max_size,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
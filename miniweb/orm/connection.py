@@ -0,0 +1,182 @@
+import asyncio
+import contextvars
+import functools
+import sqlite3
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+
+
+class PoolTimeout(Exception):
+    """Все соединения-читатели заняты дольше timeout секунд."""
+
+
+class ConnectionPool:
+    """
+    Пул соединений SQLite: одно соединение-писатель и до max_readers читателей.
+
+    Читатель выдаётся потоку при первом обращении и остаётся за ним, пока
+    поток не вызовет release(), не выйдет из scope() или не завершится.
+    Задачи run() выполняются внутри scope(); для синхронных обработчиков
+    App то же делает App.after_sync_handler(Model.release_connection).
+    Запись идёт только через писателя под RLock: save()/bulk_*/atomic()
+    берут его на время операции, и поток, держащий писателя, читает тоже
+    через него — так он видит собственные незакоммиченные изменения.
+
+    Файловая БД открывается в режиме WAL (читатели не блокируют писателя),
+    synchronous=NORMAL, с mmap и busy_timeout. Для ":memory:" каждое новое
+    соединение было бы отдельной пустой базой, поэтому там все операции
+    идут через одно соединение.
+    """
+
+    def __init__(self, db_path: str, max_readers: int = 16, wal: bool = True,
+                 synchronous: str = "NORMAL", mmap_size: int = 256 * 1024 * 1024,
+                 busy_timeout: int = 5000, timeout: float = 30.0, db_threads: int = 4,
+                 cached_statements: int = 256, row_factory=None,
+                 connection: Optional[sqlite3.Connection] = None) -> None:
+        self.db_path = db_path
+        self.wal = wal
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.busy_timeout = busy_timeout
+        self.timeout = timeout
+        self.db_threads = db_threads
+        # размер кэша подготовленных выражений sqlite3 на каждое соединение
+        self.cached_statements = cached_statements
+        # для своего SQL поверх Model._connection (ORM читает кортежи в любом случае)
+        self.row_factory = row_factory
+        self.memory = connection is not None or db_path == ":memory:" or "mode=memory" in db_path
+        self.max_readers = 0 if self.memory else max_readers
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._readers_sem = threading.BoundedSemaphore(max(self.max_readers, 1))
+        self._idle: list = []
+        self._all: list = []
+        self._idle_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.writer = connection if connection is not None else self._open()
+        if connection is None and wal and not self.memory:
+            self.writer.execute("PRAGMA journal_mode=WAL")
+
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection) -> "ConnectionPool":
+        """Пул из одного готового соединения (для Model._connection = conn)."""
+        return cls("", connection=conn)
+
+    def _open(self, readonly: bool = False) -> sqlite3.Connection:
+        uri = self.db_path.startswith("file:")
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, uri=uri,
+                               timeout=self.busy_timeout / 1000,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = self.row_factory
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        if not self.memory:
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        self._all.append(conn)
+        return conn
+
+    # ---- чтение ----
+
+    def connection(self) -> sqlite3.Connection:
+        """Соединение для текущего потока (писатель, если поток его держит)."""
+        local = self._local
+        if self.memory or getattr(local, "write_depth", 0):
+            return self.writer
+        conn = getattr(local, "reader", None)
+        if conn is None:
+            conn = self._checkout()
+            local.reader = conn
+            # завершившийся поток не вызовет release() — вернём читателя сами
+            local.finalizer = weakref.finalize(threading.current_thread(), self._put_back, conn)
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        if not self._readers_sem.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"No free SQLite reader connection after {self.timeout}s")
+        with self._idle_lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._open(readonly=True)
+
+    def release(self) -> None:
+        """Возвращает читателя текущего потока в пул."""
+        conn = getattr(self._local, "reader", None)
+        if conn is None:
+            return
+        self._local.reader = None
+        self._local.finalizer.detach()
+        self._put_back(conn)
+
+    def _put_back(self, conn: sqlite3.Connection) -> None:
+        if conn not in self._all:
+            return                      # пул уже закрыт
+        if conn.in_transaction:
+            conn.rollback()
+        with self._idle_lock:
+            self._idle.append(conn)
+        self._readers_sem.release()
+
+    @contextmanager
+    def scope(self):
+        """Соединение выдаётся на время блока (например, на один запрос)."""
+        try:
+            yield self
+        finally:
+            self.release()
+
+    # ---- запись ----
+
+    def acquire_writer(self) -> sqlite3.Connection:
+        if not self._write_lock.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"SQLite writer is busy for more than {self.timeout}s")
+        self._local.write_depth = getattr(self._local, "write_depth", 0) + 1
+        return self.writer
+
+    def release_writer(self) -> None:
+        self._local.write_depth -= 1
+        self._write_lock.release()
+
+    @contextmanager
+    def writing(self):
+        conn = self.acquire_writer()
+        try:
+            yield conn
+        finally:
+            self.release_writer()
+
+    # ---- асинхронный фасад ----
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            # задача держит читателя, пока выполняется: потоков больше, чем
+            # читателей, — и лишние только ждали бы свободного
+            workers = self.db_threads if self.memory else min(self.db_threads, self.max_readers)
+            self._executor = ThreadPoolExecutor(max_workers=max(workers, 1),
+                                                thread_name_prefix="miniweb-db")
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """Выполняет func в отдельном пуле потоков БД (с contextvars вызывающего), не блокируя event loop."""
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        job = functools.partial(ctx.run, self._scoped, func, *args, **kwargs)
+        return await loop.run_in_executor(self.executor, job)
+
+    def _scoped(self, func, *args, **kwargs):
+        with self.scope():
+            return func(*args, **kwargs)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for conn in self._all:
+            conn.close()
+        self._all.clear()
+        self._idle.clear()
@@ -0,0 +1,240 @@
+"""
+Единая точка выполнения SQL для ORM: время, число строк и место вызова
+каждого запроса, EXPLAIN QUERY PLAN в режиме отладки и подсчёт запросов
+в пределах запроса/теста.
+
+    from miniweb.orm.executor import executor, query_budget
+
+    executor.debug = True                 # предупреждать о полных сканах
+    with query_budget(3):                 # больше 3 запросов — QueryBudgetExceeded
+        render_author_page(author_id)
+    executor.stats()                      # {sql: {count, total, avg, max, rows, callers}}
+"""
+import os
+import sys
+import threading
+import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, List
+
+_ORM_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# активные журналы (track_queries может быть вложенным)
+_active_logs: ContextVar = ContextVar("miniweb_query_logs", default=())
+
+
+class FullTableScanWarning(UserWarning):
+    """EXPLAIN QUERY PLAN показал полный проход по таблице (executor.debug)."""
+
+
+class QueryBudgetExceeded(AssertionError):
+    """В блоке query_budget() выполнено больше запросов, чем разрешено."""
+
+
+class QueryRecord:
+    __slots__ = ("sql", "seconds", "rows", "caller")
+
+    def __init__(self, sql: str, seconds: float, rows: int, caller: str) -> None:
+        self.sql = sql
+        self.seconds = seconds
+        self.rows = rows
+        self.caller = caller
+
+    def __repr__(self) -> str:
+        return f"<QueryRecord {self.seconds * 1000:.2f} ms rows={self.rows} {self.caller}: {self.sql}>"
+
+
+class QueryLog:
+    """Запросы, выполненные внутри track_queries() (в том числе в потоках пула БД)."""
+
+    def __init__(self) -> None:
+        self.records: List[QueryRecord] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def total_time(self) -> float:
+        return sum(r.seconds for r in self.records)
+
+
+def _caller() -> str:
+    """file:line первого кадра стека вне пакета ORM."""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename.startswith(_ORM_DIR):
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{frame.f_code.co_filename}:{frame.f_lineno}"
+
+
+def _run(conn, sql: str, params, many: bool = False):
+    """
+    Курсор с выполненным запросом. Строки — простые кортежи, даже если у
+    соединения row_factory=sqlite3.Row: модели собираются по позициям колонок.
+    """
+    cur = conn.cursor()
+    cur.row_factory = None
+    return cur.executemany(sql, params) if many else cur.execute(sql, params)
+
+
+class QueryExecutor:
+    """
+    Выполняет SQL на переданном соединении и копит статистику по тексту
+    запроса (параметры в SQL не подставляются, так что один вид запроса —
+    одна запись). Различных текстов хранится не больше max_statements.
+
+    При debug=True для каждого нового SELECT один раз выполняется
+    EXPLAIN QUERY PLAN; полный проход по таблице ("SCAN <table>" без
+    индекса) даёт FullTableScanWarning с местом вызова.
+    """
+
+    def __init__(self, debug: bool = False, max_statements: int = 1000) -> None:
+        self.debug = debug
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._stats: Dict[str, list] = {}
+        self._explained: set = set()
+
+    # ---- выполнение ----
+
+    def execute(self, conn, sql: str, params=(), many: bool = False):
+        """execute/executemany; для записи в статистику идёт cursor.rowcount."""
+        started = perf_counter()
+        cur = _run(conn, sql, params, many)
+        elapsed = perf_counter() - started
+        self._record(conn, sql, () if many else params, elapsed, max(cur.rowcount, 0))
+        return cur
+
+    def fetchone(self, conn, sql: str, params=()):
+        started = perf_counter()
+        row = _run(conn, sql, params).fetchone()
+        self._record(conn, sql, params, perf_counter() - started, int(row is not None))
+        return row
+
+    def fetchall(self, conn, sql: str, params=()):
+        started = perf_counter()
+        rows = _run(conn, sql, params).fetchall()
+        self._record(conn, sql, params, perf_counter() - started, len(rows))
+        return rows
+
+    def iterate(self, conn, sql: str, params=(), batch_size: int = 500):
+        """
+        Строки пачками по fetchmany. Во время запроса входят execute и
+        fetchmany, но не обработка строк вызывающим; запись делается, когда
+        итерация закончена или брошена.
+        """
+        elapsed = 0.0
+        count = 0
+        started = perf_counter()
+        try:
+            cur = _run(conn, sql, params)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                elapsed += perf_counter() - started
+                if not rows:
+                    return
+                count += len(rows)
+                yield from rows
+                started = perf_counter()
+        finally:
+            self._record(conn, sql, params, elapsed, count)
+
+    # ---- учёт ----
+
+    def _record(self, conn, sql: str, params, seconds: float, rows: int) -> None:
+        caller = _caller()
+        logs = _active_logs.get()
+        if logs:
+            record = QueryRecord(sql, seconds, rows, caller)
+            for log in logs:
+                log.records.append(record)
+        with self._lock:
+            entry = self._stats.get(sql)
+            if entry is None:
+                if len(self._stats) >= self.max_statements:
+                    return
+                # [count, total, max, rows, {caller: count}]
+                entry = self._stats[sql] = [0, 0.0, 0.0, 0, {}]
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+            entry[3] += rows
+            entry[4][caller] = entry[4].get(caller, 0) + 1
+            explain = self.debug and sql not in self._explained and sql.lstrip().upper().startswith("SELECT")
+            if explain:
+                self._explained.add(sql)
+        if explain:
+            self._warn_on_scan(conn, sql, params, caller)
+
+    def explain(self, conn, sql: str, params=()) -> List[str]:
+        """Строки detail из EXPLAIN QUERY PLAN."""
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+
+    def _warn_on_scan(self, conn, sql: str, params, caller: str) -> None:
+        scans = [d for d in self.explain(conn, sql, params)
+                 if d.startswith("SCAN ") and " USING " not in d]
+        if scans:
+            warnings.warn(f"{'; '.join(scans)} at {caller}: {sql}", FullTableScanWarning, stacklevel=2)
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {
+                sql: {"count": count, "total": total, "avg": total / count, "max": peak,
+                      "rows": rows, "callers": dict(callers)}
+                for sql, (count, total, peak, rows, callers) in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._explained.clear()
+
+
+executor = QueryExecutor()
+
+
+@contextmanager
+def track_queries():
+    """Собирает QueryLog запросов, выполненных внутри блока."""
+    log = QueryLog()
+    token = _active_logs.set(_active_logs.get() + (log,))
+    try:
+        yield log
+    finally:
+        _active_logs.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Падает с QueryBudgetExceeded, если в блоке выполнено больше
+    max_queries запросов (удобно в тестах против N+1).
+    """
+    with track_queries() as log:
+        yield log
+    if log.count > max_queries:
+        listing = "\n".join(f"  {r.caller}: {r.sql}" for r in log.records)
+        raise QueryBudgetExceeded(f"{log.count} queries, budget {max_queries}:\n{listing}")
+
+
+def query_log_middleware(budget=None):
+    """
+    Middleware для App.add_middleware: время в БД пишется в
+    request.timings["db"], журнал запросов — в request.queries; при
+    заданном budget превышение превращается в ошибку (500) — для тестов
+    и отладки.
+    """
+    async def middleware(request, call_next):
+        with track_queries() as log:
+            response = await call_next(request)
+        request.timings["db"] = log.total_time
+        request.queries = log
+        if budget is not None and log.count > budget:
+            raise QueryBudgetExceeded(f"{request.path}: {log.count} queries, budget {budget}")
+        return response
+    return middleware
@@ -1,7 +1,10 @@
 class Field:
-    def __init__(self, primary_key=False, default=None):
+    def __init__(self, primary_key=False, default=None, index=False, unique=False):
         self.primary_key = primary_key
         self.default = default
+        # индекс по колонке (unique=True — уникальный); создаётся create_table/migrate
+        self.index = index or unique
+        self.unique = unique
         self.name = None
         self.column_name = None
         self.model_class = None
@@ -20,28 +23,47 @@ class Field:
         instance.__dict__[self.column_name] = value
 
 class IntegerField(Field):
-    def __init__(self, primary_key=False, default=None):
-        super().__init__(primary_key=primary_key, default=default)
+    def __init__(self, primary_key=False, default=None, index=False, unique=False):
+        super().__init__(primary_key=primary_key, default=default, index=index, unique=unique)
         self.sql_type = "INTEGER"
 
 class StringField(Field):
-    def __init__(self, default=None):
-        super().__init__(primary_key=False, default=default)
+    def __init__(self, default=None, index=False, unique=False):
+        super().__init__(primary_key=False, default=default, index=index, unique=unique)
         self.sql_type = "TEXT"
 
 class BooleanField(Field):
-    def __init__(self, default=None):
-        super().__init__(primary_key=False, default=default)
+    def __init__(self, default=None, index=False, unique=False):
+        super().__init__(primary_key=False, default=default, index=index, unique=unique)
         self.sql_type = "INTEGER"
 
 class FloatField(Field):
-    def __init__(self, default=None):
-        super().__init__(primary_key=False, default=default)
+    def __init__(self, default=None, index=False, unique=False):
+        super().__init__(primary_key=False, default=default, index=index, unique=unique)
         self.sql_type = "REAL"
 
+class Index:
+    """
+    Составной индекс для Meta.indexes:
+
+        class Meta:
+            indexes = [Index("author", "pages"), ("title", "pages")]
+
+    Поля указываются по именам (у ForeignKey — имя поля, не колонки);
+    простой кортеж имён равносилен Index(*names).
+    """
+
+    def __init__(self, *fields, unique=False, name=None):
+        if not fields:
+            raise ValueError("Index needs at least one field")
+        self.fields = fields
+        self.unique = unique
+        self.name = name
+
 class ForeignKey(Field):
-    def __init__(self, related_model, default=None):
-        super().__init__(primary_key=False, default=default)
+    def __init__(self, related_model, default=None, index=True, unique=False):
+        # колонки *_id индексируются по умолчанию: по ним фильтруют и JOIN-ят
+        super().__init__(primary_key=False, default=default, index=index, unique=unique)
         if isinstance(related_model, str):
             self._related_model_name = related_model
             self._related_model = None
@@ -49,11 +71,14 @@ class ForeignKey(Field):
             self._related_model_name = related_model.__name__
             self._related_model = related_model
         self.sql_type = "INTEGER"
+        self.cache_name = None
 
     def __set_name__(self, owner, name):
         self.name = name
         if self.column_name is None:
             self.column_name = name + "_id"
+        # атрибут экземпляра, где лежит уже загруженный связанный объект
+        self.cache_name = "_cache_" + name
         self.model_class = owner
 
     @property
@@ -67,21 +92,26 @@ class ForeignKey(Field):
     def __get__(self, instance, owner):
         if instance is None:
             return self
-        related_id = instance.__dict__.get(self.column_name, self.default)
+        # getattr/setattr, а не __dict__: у моделей с Meta.slots значения в слотах
+        related_id = getattr(instance, self.column_name, self.default)
         if related_id is None:
             return None
         model_cls = self.related_model
         if model_cls is None:
             return related_id
-        return model_cls.get(related_id)
+        cached = getattr(instance, self.cache_name, None)
+        if cached is not None and getattr(cached, model_cls._primary_key_name) == related_id:
+            return cached
+        obj = model_cls.get(related_id)
+        if obj is not None:
+            setattr(instance, self.cache_name, obj)
+        return obj
 
     def __set__(self, instance, value):
-        col = self.column_name
-        if value is None:
-            instance.__dict__[col] = None
+        from .models import Model
+        if isinstance(value, Model):
+            setattr(instance, self.column_name, getattr(value, "id", None))
+            setattr(instance, self.cache_name, value)
         else:
-            from .models import Model
-            if isinstance(value, Model):
-                instance.__dict__[col] = getattr(value, "id", None)
-            else:
-                instance.__dict__[col] = value
+            setattr(instance, self.column_name, value)
+            setattr(instance, self.cache_name, None)
@@ -0,0 +1,109 @@
+"""
+Сравнение объявленных моделей со схемой SQLite и догоняющие изменения.
+
+    from miniweb.orm.migrations import migrate
+    migrate()                  # все модели реестра
+    migrate(dry_run=True)      # только план, без изменений
+
+Умеет то, что SQLite делает на месте без пересборки таблицы: CREATE
+TABLE для новых моделей, ALTER TABLE ADD COLUMN для новых полей (меняется
+только схема, строки не переписываются), CREATE/DROP INDEX. Лишние
+колонки и смена типа не трогаются — они попадают в план как "note"
+без SQL, чтобы разобраться руками.
+"""
+from collections import namedtuple
+
+from .transactions import atomic
+
+# kind: create_table | add_column | create_index | drop_index | note
+Operation = namedtuple("Operation", ["kind", "table", "sql", "detail"], defaults=(None,))
+
+# индексы с этими префиксами создаёт ORM, и migrate() может их удалять
+MANAGED_INDEX_PREFIXES = ("ix_", "ux_")
+
+
+def _literal(value):
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _table_columns(conn, table):
+    """{колонка: тип} по PRAGMA table_info; пустой dict, если таблицы нет."""
+    return {row[1]: (row[2] or "").upper()
+            for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+
+def _table_indexes(conn, table):
+    """{имя: (unique, (колонки...))} для индексов, созданных через CREATE INDEX."""
+    indexes = {}
+    for row in conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+        name, unique, origin = row[1], bool(row[2]), row[3]
+        if origin != "c":
+            continue
+        columns = tuple(r[2] for r in conn.execute(f'PRAGMA index_info("{name}")'))
+        indexes[name] = (unique, columns)
+    return indexes
+
+
+def diff(model, conn):
+    """Список Operation, приводящих таблицу model к объявленной схеме."""
+    table = model._table_name
+    columns = _table_columns(conn, table)
+    if not columns:
+        cols = ", ".join(model._column_definition(f) for f in model._fields.values())
+        ops = [Operation("create_table", table, f'CREATE TABLE "{table}" ({cols})')]
+        ops += [Operation("create_index", table, model._index_sql(*index))
+                for index in model._indexes]
+        return ops
+
+    ops = []
+    declared = {f.column_name: f for f in model._fields.values()}
+    for column, field in declared.items():
+        col_type = getattr(field, "sql_type", "TEXT").upper()
+        if column in columns:
+            if columns[column] != col_type:
+                ops.append(Operation("note", table, None,
+                                     f"{column}: declared {col_type}, found {columns[column]}"))
+        elif field.primary_key:
+            ops.append(Operation("note", table, None,
+                                 f"{column}: primary key cannot be added to an existing table"))
+        else:
+            sql = f'ALTER TABLE "{table}" ADD COLUMN "{column}" {col_type}'
+            if field.default is not None:
+                sql += f" DEFAULT {_literal(field.default)}"
+            ops.append(Operation("add_column", table, sql))
+    for column in columns:
+        if column not in declared:
+            ops.append(Operation("note", table, None, f"{column}: not declared in {model.__name__}"))
+
+    existing = _table_indexes(conn, table)
+    wanted = {name: (unique, cols) for name, unique, cols in model._indexes}
+    for name, spec in existing.items():
+        if name.startswith(MANAGED_INDEX_PREFIXES) and wanted.get(name) != spec:
+            ops.append(Operation("drop_index", table, f'DROP INDEX "{name}"'))
+    for name, spec in wanted.items():
+        if existing.get(name) != spec:
+            ops.append(Operation("create_index", table, model._index_sql(name, *spec)))
+    return ops
+
+
+def migrate(models=None, dry_run=False):
+    """
+    Применяет diff() для моделей (по умолчанию — весь реестр Model) в одной
+    транзакции. Возвращает список Operation; при dry_run=True ничего не
+    меняет.
+    """
+    from .models import Model
+    models = list(models) if models is not None else list(Model._registry)
+    with Model._pool.writing() as conn:
+        ops = [op for model in models for op in diff(model, conn)]
+        if dry_run or not any(op.sql for op in ops):
+            return ops
+        with atomic(conn):
+            for op in ops:
+                if op.sql:
+                    conn.execute(op.sql)
+    return ops
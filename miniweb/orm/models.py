@@ -1,7 +1,22 @@
-from .fields import Field, IntegerField, StringField, BooleanField, FloatField, ForeignKey
+from .fields import Field, IntegerField, StringField, BooleanField, FloatField, ForeignKey, Index
+from .queryset import QuerySetDescriptor
+from .transactions import atomic, in_atomic, mark_written
+from .connection import ConnectionPool
+from .executor import executor
+from .cache import RowCache, current_identity_map
 import sqlite3
 
 class ModelMeta(type):
+    @property
+    def _connection(cls):
+        """Соединение SQLite для текущего потока (см. ConnectionPool.connection)."""
+        pool = Model._pool
+        return pool.connection() if pool is not None else None
+
+    @_connection.setter
+    def _connection(cls, conn):
+        Model._pool = ConnectionPool.from_connection(conn) if conn is not None else None
+
     def __new__(metacls, name, bases, attrs):
         if name == 'Model':
             cls = super().__new__(metacls, name, bases, attrs)
@@ -17,13 +32,18 @@ class ModelMeta(type):
             fields['id'] = id_field
             attrs['id'] = id_field
         table_name = None
+        slotted = False
         meta = attrs.get('Meta')
         if meta:
             table_name = getattr(meta, 'table_name', None)
+            slotted = getattr(meta, 'slots', False)
         if table_name is None:
             table_name = name.lower()
+        if slotted:
+            attrs['__slots__'] = metacls._slot_names(fields, attrs)
         cls = super().__new__(metacls, name, bases, attrs)
         cls._fields = fields
+        cls._slotted = slotted
         pk_field = None
         pk_name = None
         for fname, f in fields.items():
@@ -34,14 +54,105 @@ class ModelMeta(type):
         cls._primary_key = pk_field
         cls._primary_key_name = pk_name
         cls._table_name = table_name
+        cls._indexes = metacls._collect_indexes(cls, getattr(meta, 'indexes', ()))
+        metacls._compile_sql(cls)
         Model._registry.append(cls)
         Model._models_by_name[name] = cls
         return cls
 
+    @staticmethod
+    def _slot_names(fields, attrs):
+        """
+        __slots__ для Meta.slots = True: значения полей хранятся в слотах
+        вместо __dict__. Обычное поле заменяется слотом с тем же именем
+        (дескриптор Field убирается из класса), у ForeignKey слоты под id
+        и под закэшированный связанный объект, а дескриптор остаётся.
+        """
+        slots = []
+        for fname, field in fields.items():
+            if isinstance(field, ForeignKey):
+                slots += [fname + "_id", "_cache_" + fname]
+            else:
+                del attrs[fname]
+                field.__set_name__(None, fname)
+                slots.append(fname)
+        slots.append("__weakref__")
+        return tuple(slots)
+
+    @staticmethod
+    def _collect_indexes(cls, declared):
+        """
+        Индексы модели: [(имя, unique, (колонки...))] — по полям с
+        index/unique (у ForeignKey index=True по умолчанию) и из Meta.indexes.
+        Имена детерминированы (ix_/ux_<таблица>_<колонки>), по ним
+        migrate() находит уже созданные индексы.
+        """
+        specs = [Index(fname, unique=f.unique) for fname, f in cls._fields.items()
+                 if f.index and not f.primary_key]
+        specs += [spec if isinstance(spec, Index) else Index(*spec) for spec in declared]
+        indexes = []
+        for spec in specs:
+            columns = []
+            for fname in spec.fields:
+                if fname not in cls._fields:
+                    raise ValueError(f"{cls.__name__}: index on unknown field {fname!r}")
+                columns.append(cls._fields[fname].column_name)
+            name = spec.name or "{}_{}_{}".format("ux" if spec.unique else "ix",
+                                                  cls._table_name, "_".join(columns))
+            indexes.append((name, spec.unique, tuple(columns)))
+        return indexes
+
+    @staticmethod
+    def _compile_sql(cls):
+        """Один раз собирает SQL-шаблоны модели, чтобы не строить их на каждый вызов."""
+        table = cls._table_name
+        pk_col = cls._primary_key.column_name
+        cls._write_fields = [f for f in cls._fields.values() if not f.primary_key]
+        # (колонка, значение по умолчанию) для чтения значений из __dict__ или слотов;
+        # у ForeignKey по умолчанию None, как в ForeignKey.__get__
+        cls._write_columns = [
+            (f.column_name, None if isinstance(f, ForeignKey) else f.default)
+            for f in cls._write_fields
+        ]
+        select_cols = ", ".join(f'"{f.column_name}"' for f in cls._fields.values())
+        write_cols = ", ".join(f'"{f.column_name}"' for f in cls._write_fields)
+        placeholders = ", ".join("?" * len(cls._write_fields))
+        set_clause = ", ".join(f'"{f.column_name}" = ?' for f in cls._write_fields)
+        cls._sql = {
+            "select": f'SELECT {select_cols} FROM "{table}"',
+            "get": f'SELECT {select_cols} FROM "{table}" WHERE "{pk_col}" = ?',
+            "insert": f'INSERT INTO "{table}" ({write_cols}) VALUES ({placeholders})',
+            "insert_pk": f'INSERT INTO "{table}" ({write_cols}, "{pk_col}") VALUES ({placeholders}, ?)',
+            "update": f'UPDATE "{table}" SET {set_clause} WHERE "{pk_col}" = ?',
+            "delete": f'DELETE FROM "{table}" WHERE "{pk_col}" = ?',
+        }
+        # SQL, собираемый по форме вызова (bulk_update, prefetch, QuerySet):
+        # (операция, ...) -> текст; см. Model._cached_sql
+        cls._sql_cache = {}
+        # порядок колонок в SELECT = порядок cls._fields: имя поля -> индекс
+        # в строке и ключи хранения значений (__dict__ или слоты) по порядку
+        cls._column_index = {fname: i for i, fname in enumerate(cls._fields)}
+        cls._column_names = tuple(f.column_name for f in cls._fields.values())
+        cls._pk_index = cls._column_index[cls._primary_key_name]
+        cls._row_cache = None
+        if cls._slotted:
+            cls._slot_setters = tuple(getattr(cls, col).__set__ for col in cls._column_names)
+
 class Model(metaclass=ModelMeta):
-    _connection = None 
+    # пустые слоты у базы, чтобы у моделей с Meta.slots не было __dict__
+    __slots__ = ()
+    _pool = None
+    _slotted = False
+    _row_cache = None
     _registry = []
     _models_by_name = {}
+    _write_listeners = []
+    objects = QuerySetDescriptor()
+
+    @property
+    def _connection(self):
+        # свойство метакласса видно только на классе: self._connection — то же
+        return type(self)._connection
 
     def __init__(self, **kwargs):
         for fname, field in self._fields.items():
@@ -54,113 +165,361 @@ class Model(metaclass=ModelMeta):
                     setattr(self, fname, None)
 
     @classmethod
-    def connect(cls, db_path):
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cls._connection = conn
-        return conn
+    def connect(cls, db_path, **pool_options):
+        """
+        Открывает БД через ConnectionPool (WAL, читатели на потоках,
+        один писатель). pool_options — параметры ConnectionPool:
+        max_readers, wal, synchronous, mmap_size, busy_timeout, db_threads,
+        cached_statements, row_factory (по умолчанию sqlite3.Row).
+        Возвращает соединение-писатель.
+        """
+        pool_options.setdefault("row_factory", sqlite3.Row)
+        Model._pool = ConnectionPool(db_path, **pool_options)
+        return Model._pool.writer
+
+    @classmethod
+    def disconnect(cls):
+        """
+        Закрывает все соединения пула (при остановке сервера): незавершённых
+        транзакций не остаётся, WAL сбрасывается в основной файл БД.
+        """
+        pool, Model._pool = Model._pool, None
+        if pool is not None:
+            pool.close()
+
+    @classmethod
+    def release_connection(cls):
+        """Возвращает соединение-читатель текущего потока в пул."""
+        if Model._pool is not None:
+            Model._pool.release()
+
+    @classmethod
+    def add_write_listener(cls, listener):
+        """
+        Подписывает listener(table_name) на запись в таблицы моделей
+        (например, ResponseCache.invalidate_table для сброса кэша ответов).
+        """
+        Model._write_listeners.append(listener)
+        return listener
+
+    @classmethod
+    def _notify_write(cls):
+        for listener in Model._write_listeners:
+            listener(cls._table_name)
+
+    @staticmethod
+    def _committed(tables):
+        """
+        После COMMIT atomic(): сбрасывает кэши строк моделей записанных
+        таблиц (какие строки менялись, транзакция не запоминает) и
+        уведомляет слушателей записи.
+        """
+        for table in tables:
+            for model_cls in Model._registry:
+                if model_cls._table_name == table and model_cls._row_cache is not None:
+                    model_cls._row_cache.clear()
+            for listener in Model._write_listeners:
+                listener(table)
+
+    @classmethod
+    def enable_row_cache(cls, max_size=1024, ttl=None):
+        """
+        Включает для модели кэш строк Model.get (LRU на max_size записей,
+        ttl секунд или бессрочно). Возвращает RowCache — у него stats()
+        с hits/misses/evictions для подбора размера.
+        """
+        cls._row_cache = RowCache(max_size, ttl)
+        return cls._row_cache
+
+    @classmethod
+    def row_cache_stats(cls):
+        """Статистика кэшей строк всех моделей, где он включён: {модель: stats}."""
+        return {model_cls.__name__: model_cls._row_cache.stats()
+                for model_cls in Model._registry if model_cls._row_cache is not None}
+
+    def _forget(self, pk):
+        """Убирает строку pk из кэша строк и карты идентичности после записи."""
+        cls = type(self)
+        if cls._row_cache is not None:
+            cls._row_cache.invalidate(pk)
+        imap = current_identity_map()
+        if imap is not None:
+            imap.discard(cls, pk)
+
+    @staticmethod
+    def _column_definition(field):
+        col_type = getattr(field, 'sql_type', 'TEXT')
+        col_def = f'"{field.column_name}" {col_type}'
+        if field.primary_key:
+            if col_type.upper() == "INTEGER":
+                col_def += " PRIMARY KEY AUTOINCREMENT"
+            else:
+                col_def += " PRIMARY KEY"
+        return col_def
+
+    @classmethod
+    def _index_sql(cls, name, unique, columns):
+        cols = ", ".join(f'"{c}"' for c in columns)
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        return f'CREATE {kind} IF NOT EXISTS "{name}" ON "{cls._table_name}" ({cols})'
 
     @classmethod
     def create_table(cls):
         if cls is Model:
             return
-        columns = []
-        for fname, field in cls._fields.items():
-            col_name = field.column_name
-            col_type = getattr(field, 'sql_type', 'TEXT')
-            col_def = f'"{col_name}" {col_type}'
-            if field.primary_key:
-                if col_type.upper() == "INTEGER":
-                    col_def += " PRIMARY KEY AUTOINCREMENT"
-                else:
-                    col_def += " PRIMARY KEY"
-            columns.append(col_def)
-        cols_joined = ", ".join(columns)
+        cols_joined = ", ".join(cls._column_definition(f) for f in cls._fields.values())
         sql = f'CREATE TABLE IF NOT EXISTS "{cls._table_name}" ({cols_joined});'
-        cur = cls._connection.cursor()
-        cur.execute(sql)
-        cls._connection.commit()
+        with Model._pool.writing() as conn:
+            conn.execute(sql)
+            for index in cls._indexes:
+                conn.execute(cls._index_sql(*index))
+            if not in_atomic(conn):
+                conn.commit()
 
     @classmethod
     def create_all(cls):
         for model_cls in cls._registry:
             model_cls.create_table()
 
+    def _write_values(self):
+        if self._slotted:
+            return [getattr(self, col, default) for col, default in self._write_columns]
+        d = self.__dict__
+        return [d.get(col, default) for col, default in self._write_columns]
+
     def save(self):
         pk_name = self._primary_key_name
-        pk_field = self._fields.get(pk_name)
         if pk_name is None:
             raise Exception("No primary key defined.")
         pk_val = getattr(self, pk_name)
-        cur = self._connection.cursor()
+        with Model._pool.writing() as conn:
+            if pk_val is None:
+                cur = executor.execute(conn, self._sql["insert"], self._write_values())
+                setattr(self, pk_name, cur.lastrowid)
+            else:
+                values = self._write_values()
+                values.append(pk_val)
+                executor.execute(conn, self._sql["update"], values)
+            # внутри atomic() commit и уведомление откладываются до COMMIT
+            deferred = mark_written(conn, self._table_name)
+            if not deferred:
+                conn.commit()
+        if pk_val is not None and self._row_cache is not None:
+            self._row_cache.invalidate(pk_val)
+        imap = current_identity_map()
+        if imap is not None:
+            imap.add(self)
+        if not deferred:
+            self._notify_write()
+        return self
+
+    def delete(self):
+        """Удаляет запись по первичному ключу; у объекта pk становится None."""
+        pk_name = self._primary_key_name
+        pk_val = getattr(self, pk_name)
         if pk_val is None:
-            field_names = []
-            placeholders = []
-            values = []
-            for fname, field in self._fields.items():
-                if field.primary_key:
-                    continue
-                field_names.append(field.column_name)
-                if isinstance(field, ForeignKey):
-                    values.append(self.__dict__.get(field.column_name))
-                else:
-                    values.append(getattr(self, fname))
-                placeholders.append("?")
-            col_list = ", ".join(f'"{name}"' for name in field_names)
-            ph_list = ", ".join(placeholders)
-            sql = f'INSERT INTO "{self._table_name}" ({col_list}) VALUES ({ph_list})'
-            cur.execute(sql, values)
-            new_id = cur.lastrowid
-            setattr(self, pk_name, new_id)
+            return False
+        with Model._pool.writing() as conn:
+            executor.execute(conn, self._sql["delete"], (pk_val,))
+            deferred = mark_written(conn, self._table_name)
+            if not deferred:
+                conn.commit()
+        self._forget(pk_val)
+        setattr(self, pk_name, None)
+        if not deferred:
+            self._notify_write()
+        return True
+
+    async def asave(self):
+        """save() в пуле потоков БД."""
+        return await Model._pool.run(self.save)
+
+    @classmethod
+    async def aget(cls, pk):
+        """get() в пуле потоков БД."""
+        return await Model._pool.run(cls.get, pk)
+
+    @classmethod
+    def bulk_create(cls, objs, batch_size=1000):
+        """
+        Вставляет объекты пачками через executemany в одной транзакции.
+        Объектам без первичного ключа проставляется id (для целочисленного
+        AUTOINCREMENT-ключа SQLite выдаёт их подряд, пока транзакция держит
+        блокировку записи).
+        """
+        objs = list(objs)
+        if not objs:
+            return objs
+        pk_name = cls._primary_key_name
+        integer_pk = getattr(cls._primary_key, "sql_type", "").upper() == "INTEGER"
+        with atomic():
+            conn = cls._connection
+            for start in range(0, len(objs), batch_size):
+                batch = objs[start:start + batch_size]
+                new = [o for o in batch if getattr(o, pk_name) is None]
+                existing = [o for o in batch if getattr(o, pk_name) is not None]
+                if existing:
+                    executor.execute(conn, cls._sql["insert_pk"],
+                                     [o._write_values() + [getattr(o, pk_name)] for o in existing],
+                                     many=True)
+                if new:
+                    executor.execute(conn, cls._sql["insert"], [o._write_values() for o in new],
+                                     many=True)
+                    if integer_pk:
+                        last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                        first = last - len(new) + 1
+                        for offset, obj in enumerate(new):
+                            setattr(obj, pk_name, first + offset)
+            mark_written(conn, cls._table_name)
+        return objs
+
+    @classmethod
+    def bulk_update(cls, objs, fields, batch_size=1000):
+        """Обновляет перечисленные поля у объектов одним executemany на пачку."""
+        objs = list(objs)
+        fields = tuple(fields)
+        if not objs or not fields:
+            return 0
+        sql = cls._cached_sql(("update", fields), lambda: (
+            f'UPDATE "{cls._table_name}" SET '
+            + ", ".join(f'"{cls._fields[f].column_name}" = ?' for f in fields)
+            + f' WHERE "{cls._primary_key.column_name}" = ?'))
+        columns = [(cls._fields[f].column_name,
+                    None if isinstance(cls._fields[f], ForeignKey) else cls._fields[f].default)
+                   for f in fields]
+        pk_name = cls._primary_key_name
+        with atomic():
+            conn = cls._connection
+            for start in range(0, len(objs), batch_size):
+                rows = []
+                for obj in objs[start:start + batch_size]:
+                    rows.append([getattr(obj, col, default) for col, default in columns]
+                                + [getattr(obj, pk_name)])
+                executor.execute(conn, sql, rows, many=True)
+            mark_written(conn, cls._table_name)
+            for obj in objs:
+                obj._forget(getattr(obj, pk_name))
+        return len(objs)
+
+    @classmethod
+    def _cached_sql(cls, key, build):
+        """
+        SQL по ключу формы запроса; build() вызывается только на промахе.
+        Размер кэша ограничен: при переполнении он очищается целиком.
+        """
+        sql = cls._sql_cache.get(key)
+        if sql is None:
+            if len(cls._sql_cache) >= 512:
+                cls._sql_cache.clear()
+            sql = cls._sql_cache[key] = build()
+        return sql
+
+    @classmethod
+    def _column_list(cls, alias=None):
+        prefix = f'"{alias}".' if alias else ""
+        return [f'{prefix}"{field.column_name}"' for field in cls._fields.values()]
+
+    @classmethod
+    def _from_values(cls, values):
+        """
+        Создаёт объект из значений колонок в порядке cls._fields (строка
+        SELECT как есть). __init__ не вызывается: значения кладутся сразу
+        в __dict__ или слоты, минуя дескрипторы полей.
+        """
+        imap = current_identity_map()
+        if imap is not None:
+            # pk уже загружен в этой единице работы — тот же экземпляр
+            existing = imap.find(cls, values[cls._pk_index])
+            if existing is not None:
+                return existing
+        obj = cls.__new__(cls)
+        if cls._slotted:
+            for set_value, value in zip(cls._slot_setters, values):
+                set_value(obj, value)
         else:
-            set_clauses = []
-            values = []
-            for fname, field in self._fields.items():
-                if field.primary_key:
-                    continue
-                set_clauses.append(f'"{field.column_name}" = ?')
-                if isinstance(field, ForeignKey):
-                    values.append(self.__dict__.get(field.column_name))
-                else:
-                    values.append(getattr(self, fname))
-            values.append(pk_val)
-            set_clause_str = ", ".join(set_clauses)
-            sql = f'UPDATE "{self._table_name}" SET {set_clause_str} WHERE "{pk_field.column_name}" = ?'
-            cur.execute(sql, values)
-        self._connection.commit()
-        return self
+            # поштучно в собственный __dict__ объекта, а не dict(zip(...)):
+            # так словарь остаётся с общими для класса ключами и меньше весит
+            d = obj.__dict__
+            for column, value in zip(cls._column_names, values):
+                d[column] = value
+        if imap is not None:
+            imap.add(obj)
+        return obj
 
     @classmethod
     def get(cls, pk):
         pk_field = cls._primary_key
         if pk_field is None:
             raise Exception("No primary key defined.")
-        sql = f'SELECT * FROM "{cls._table_name}" WHERE "{pk_field.column_name}" = ?'
-        cur = cls._connection.cursor()
-        cur.execute(sql, (pk,))
-        row = cur.fetchone()
+        imap = current_identity_map()
+        if imap is not None:
+            obj = imap.get(cls, pk)
+            if obj is not None:
+                return obj
+        cache = cls._row_cache
+        if cache is not None:
+            values = cache.get(pk)
+            if values is not None:
+                return cls._from_values(values)
+            generation = cache.generation
+        conn = cls._connection
+        row = executor.fetchone(conn, cls._sql["get"], (pk,))
         if not row:
             return None
-        obj = cls()
-        for fname, field in cls._fields.items():
-            col = field.column_name
-            if col in row.keys():
-                setattr(obj, fname, row[col])
-        return obj
+        # незакоммиченные данные своей транзакции в общий кэш не кладём
+        if cache is not None and not in_atomic(conn):
+            cache.set(pk, row, generation)
+        return cls._from_values(row)
+
+    @classmethod
+    def _foreign_key(cls, name):
+        field = cls._fields.get(name)
+        if not isinstance(field, ForeignKey):
+            raise ValueError(f"{cls.__name__}.{name} is not a ForeignKey")
+        if field.related_model is None:
+            raise ValueError(f"Related model for {cls.__name__}.{name} is not defined")
+        return field
+
+    @classmethod
+    def all(cls, select_related=None, prefetch_related=None):
+        """
+        Возвращает список объектов (всех записей таблицы) для данной модели.
+
+        select_related=["author"] подтягивает связанные объекты тем же
+        запросом через LEFT JOIN, prefetch_related=["author"] — одним
+        дополнительным запросом WHERE id IN (...) на каждое поле. В обоих
+        случаях obj.author больше не делает SELECT на каждый объект.
+        """
+        qs = cls.objects
+        if select_related:
+            qs = qs.select_related(*select_related)
+        if prefetch_related:
+            qs = qs.prefetch_related(*prefetch_related)
+        return qs.all()
 
     @classmethod
-    def all(cls):
-        """Возвращает список объектов (всех записей таблицы) для данной модели."""
-        sql = f'SELECT * FROM "{cls._table_name}"'
-        cur = cls._connection.cursor()
-        cur.execute(sql)
-        rows = cur.fetchall()
-        objects = []
-        for row in rows:
-            obj = cls()
-            for fname, field in cls._fields.items():
-                col = field.column_name
-                if col in row.keys():
-                    setattr(obj, fname, row[col])
-            objects.append(obj)
+    def prefetch(cls, objects, name, batch_size=900):
+        """
+        Загружает связанные объекты поля-ForeignKey для списка objects
+        запросами WHERE pk IN (...) (по batch_size id — ниже лимита
+        переменных SQLite) и кладёт их в кэш экземпляров.
+        """
+        fk = cls._foreign_key(name)
+        rel = fk.related_model
+        column = fk.column_name
+        ids = list({getattr(obj, column, None) for obj in objects} - {None})
+        loaded = {}
+        pk_col = rel._primary_key.column_name
+        pk_index = rel._column_index[rel._primary_key_name]
+        conn = cls._connection
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            sql = rel._cached_sql(("in", len(batch)), lambda: (
+                f'{rel._sql["select"]} WHERE "{pk_col}" IN ({", ".join("?" * len(batch))})'))
+            for row in executor.fetchall(conn, sql, batch):
+                loaded[row[pk_index]] = rel._from_values(row)
+        for obj in objects:
+            related_obj = loaded.get(getattr(obj, column, None))
+            if related_obj is not None:
+                setattr(obj, fk.cache_name, related_obj)
         return objects
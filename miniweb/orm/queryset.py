@@ -0,0 +1,305 @@
+from .executor import executor
+from .fields import ForeignKey
+
+# суффикс__lookup -> SQL-оператор
+LOOKUPS = {
+    "exact": "=",
+    "ne": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "in": "IN",
+    "contains": "LIKE",
+    "startswith": "LIKE",
+    "isnull": "IS NULL",
+}
+
+
+class QuerySet:
+    """
+    Ленивый запрос к таблице модели. Методы filter/order_by/limit/...
+    возвращают новый QuerySet; SQL выполняется только при итерации
+    (или count/exists/values/...), причём ровно один параметризованный SELECT.
+
+        Book.objects.filter(author=a, pages__gt=100).order_by("-pages").limit(20)
+    """
+
+    def __init__(self, model, where=(), params=(), order=(), limit=None, offset=None,
+                 related=(), prefetch=(), batch_size=500):
+        self.model = model
+        self._where = tuple(where)
+        self._params = tuple(params)
+        self._order = tuple(order)
+        self._limit = limit
+        self._offset = offset
+        self._related = tuple(related)
+        self._prefetch = tuple(prefetch)
+        self._batch_size = batch_size
+
+    def _clone(self, **changes):
+        state = {
+            "where": self._where, "params": self._params, "order": self._order,
+            "limit": self._limit, "offset": self._offset, "related": self._related,
+            "prefetch": self._prefetch, "batch_size": self._batch_size,
+        }
+        state.update(changes)
+        return QuerySet(self.model, **state)
+
+    def __repr__(self):
+        sql, params = self._compile()
+        return f"<QuerySet {self.model.__name__}: {sql} {params}>"
+
+    # ---- построение запроса ----
+
+    def _column(self, name):
+        field = self.model._fields.get(name)
+        if field is None:
+            for f in self.model._fields.values():
+                if f.column_name == name:
+                    field = f
+                    break
+        if field is None:
+            raise ValueError(f"{self.model.__name__} has no field {name!r}")
+        return field
+
+    def _condition(self, key, value):
+        name, _, lookup = key.partition("__")
+        lookup = lookup or "exact"
+        if lookup not in LOOKUPS:
+            raise ValueError(f"Unsupported lookup {lookup!r}")
+        field = self._column(name)
+        col = f'"{self.model._table_name}"."{field.column_name}"'
+        if isinstance(field, ForeignKey) and hasattr(value, "_primary_key_name"):
+            value = getattr(value, value._primary_key_name)
+
+        if lookup == "isnull":
+            return f"{col} IS NULL" if value else f"{col} IS NOT NULL", ()
+        if value is None and lookup in ("exact", "ne"):
+            return f"{col} IS NULL" if lookup == "exact" else f"{col} IS NOT NULL", ()
+        if lookup == "in":
+            values = [getattr(v, v._primary_key_name) if hasattr(v, "_primary_key_name") else v
+                      for v in value]
+            if not values:
+                return "0", ()
+            return f"{col} IN ({', '.join('?' * len(values))})", tuple(values)
+        if lookup == "contains":
+            return f"{col} LIKE ? ESCAPE '\\'", (f"%{_escape_like(value)}%",)
+        if lookup == "startswith":
+            return f"{col} LIKE ? ESCAPE '\\'", (f"{_escape_like(value)}%",)
+        return f"{col} {LOOKUPS[lookup]} ?", (value,)
+
+    def filter(self, **kwargs):
+        where, params = list(self._where), list(self._params)
+        for key, value in kwargs.items():
+            clause, values = self._condition(key, value)
+            where.append(clause)
+            params.extend(values)
+        return self._clone(where=where, params=params)
+
+    def exclude(self, **kwargs):
+        where, params = list(self._where), list(self._params)
+        for key, value in kwargs.items():
+            clause, values = self._condition(key, value)
+            where.append(f"NOT ({clause})")
+            params.extend(values)
+        return self._clone(where=where, params=params)
+
+    def order_by(self, *fields):
+        order = []
+        for name in fields:
+            desc = name.startswith("-")
+            field = self._column(name.lstrip("-"))
+            order.append(f'"{self.model._table_name}"."{field.column_name}"' + (" DESC" if desc else ""))
+        return self._clone(order=order)
+
+    def limit(self, n):
+        return self._clone(limit=int(n))
+
+    def offset(self, n):
+        return self._clone(offset=int(n))
+
+    def select_related(self, *names):
+        for name in names:
+            self.model._foreign_key(name)
+        return self._clone(related=self._related + names)
+
+    def prefetch_related(self, *names):
+        for name in names:
+            self.model._foreign_key(name)
+        return self._clone(prefetch=self._prefetch + names)
+
+    def batch_size(self, n):
+        """Сколько строк забирать из курсора за раз (fetchmany) при итерации."""
+        return self._clone(batch_size=int(n))
+
+    def _tail(self):
+        sql = ""
+        params = list(self._params)
+        if self._where:
+            sql += " WHERE " + " AND ".join(f"({w})" for w in self._where)
+        if self._order:
+            sql += " ORDER BY " + ", ".join(self._order)
+        if self._limit is not None or self._offset is not None:
+            sql += " LIMIT ?"
+            params.append(self._limit if self._limit is not None else -1)
+            if self._offset is not None:
+                sql += " OFFSET ?"
+                params.append(self._offset)
+        return sql, params
+
+    def _compile(self, columns=None):
+        tail, params = self._tail()
+        # текст зависит только от формы запроса; значения — в params
+        key = ("select", columns and tuple(columns), self._related, tail)
+        return self.model._cached_sql(key, lambda: self._build_select(columns, tail)), params
+
+    def _build_select(self, columns, tail):
+        model = self.model
+        table = model._table_name
+        joins = []
+        if columns is None:
+            columns = model._column_list(table)
+            for i, name in enumerate(self._related):
+                fk = model._fields[name]
+                rel = fk.related_model
+                alias = f"_r{i}"
+                columns = columns + rel._column_list(alias)
+                joins.append(
+                    f'LEFT JOIN "{rel._table_name}" AS "{alias}" '
+                    f'ON "{alias}"."{rel._primary_key.column_name}" = "{table}"."{fk.column_name}"'
+                )
+        sql = f'SELECT {", ".join(columns)} FROM "{table}"'
+        if joins:
+            sql += " " + " ".join(joins)
+        return sql + tail
+
+    # ---- выполнение ----
+
+    def _fetchone(self, sql, params):
+        return executor.fetchone(self.model._connection, sql, params)
+
+    def _rows(self, sql, params):
+        return executor.iterate(self.model._connection, sql, params, self._batch_size)
+
+    def _hydrate(self, row):
+        model = self.model
+        width = len(model._fields)
+        obj = model._from_values(row[:width])
+        offset = width
+        for name in self._related:
+            fk = model._fields[name]
+            rel = fk.related_model
+            rel_width = len(rel._fields)
+            values = row[offset:offset + rel_width]
+            offset += rel_width
+            if any(v is not None for v in values):
+                setattr(obj, fk.cache_name, rel._from_values(values))
+        return obj
+
+    def __iter__(self):
+        sql, params = self._compile()
+        # без JOIN строка целиком — колонки модели, срез не нужен
+        hydrate = self._hydrate if self._related else self.model._from_values
+        if self._prefetch:
+            # для prefetch нужны все id сразу — материализуем
+            objects = [hydrate(row) for row in self._rows(sql, params)]
+            for name in self._prefetch:
+                self.model.prefetch(objects, name)
+            return iter(objects)
+        return map(hydrate, self._rows(sql, params))
+
+    def all(self):
+        return list(self)
+
+    def first(self):
+        for obj in self.limit(1):
+            return obj
+        return None
+
+    def get(self, **kwargs):
+        """Единственный объект по условиям или None; больше одного — ValueError."""
+        found = list(self.filter(**kwargs).limit(2))
+        if len(found) > 1:
+            raise ValueError(f"{self.model.__name__}.objects.get() returned more than one object")
+        return found[0] if found else None
+
+    def count(self):
+        tail, params = self._tail()
+        if self._limit is not None or self._offset is not None:
+            sql = f'SELECT COUNT(*) FROM (SELECT 1 FROM "{self.model._table_name}"{tail})'
+        else:
+            sql = f'SELECT COUNT(*) FROM "{self.model._table_name}"{tail}'
+        return self._fetchone(sql, params)[0]
+
+    def exists(self):
+        tail, params = self.limit(1)._tail()
+        sql = f'SELECT 1 FROM "{self.model._table_name}"{tail}'
+        return self._fetchone(sql, params) is not None
+
+    def _value_fields(self, fields):
+        names = fields or tuple(self.model._fields)
+        columns = [f'"{self.model._table_name}"."{self._column(n).column_name}"' for n in names]
+        return names, columns
+
+    def values_list(self, *fields, flat=False):
+        """Кортежи значений колонок (без создания объектов модели)."""
+        if flat and len(fields) != 1:
+            raise ValueError("flat=True requires exactly one field")
+        _, columns = self._value_fields(fields)
+        sql, params = self._compile(columns)
+        if flat:
+            return [row[0] for row in self._rows(sql, params)]
+        return [tuple(row) for row in self._rows(sql, params)]
+
+    def values(self, *fields):
+        """Словари {поле: значение} (без создания объектов модели)."""
+        names, columns = self._value_fields(fields)
+        sql, params = self._compile(columns)
+        return [dict(zip(names, row)) for row in self._rows(sql, params)]
+
+    # ---- асинхронный фасад: запрос выполняется в пуле потоков БД ----
+
+    async def _run(self, method, *args, **kwargs):
+        from .models import Model
+        return await Model._pool.run(method, *args, **kwargs)
+
+    async def aall(self):
+        return await self._run(self.all)
+
+    async def afirst(self):
+        return await self._run(self.first)
+
+    async def aget(self, **kwargs):
+        return await self._run(self.get, **kwargs)
+
+    async def acount(self):
+        return await self._run(self.count)
+
+    async def aexists(self):
+        return await self._run(self.exists)
+
+    async def avalues(self, *fields):
+        return await self._run(self.values, *fields)
+
+    async def avalues_list(self, *fields, flat=False):
+        return await self._run(self.values_list, *fields, flat=flat)
+
+    async def __aiter__(self):
+        # async for (и {% for %} в асинхронном режиме Jinja) не блокирует loop:
+        # запрос выполняется в пуле потоков БД
+        for obj in await self.aall():
+            yield obj
+
+
+def _escape_like(value):
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class QuerySetDescriptor:
+    """Model.objects — новый QuerySet по всей таблице модели."""
+
+    def __get__(self, instance, owner):
+        if instance is not None:
+            raise AttributeError("objects is accessible via the model class, not instances")
+        return QuerySet(owner)
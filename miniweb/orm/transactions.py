@@ -0,0 +1,104 @@
+from contextlib import ContextDecorator
+
+# id(connection) -> [connection, глубина вложенности, таблицы с записью]
+# (sqlite3.Connection не поддерживает weakref, поэтому держим его явно
+# до выхода из внешнего atomic, чтобы id не переиспользовался)
+_state = {}
+
+
+def in_atomic(conn) -> bool:
+    return id(conn) in _state
+
+
+def mark_written(conn, table: str) -> bool:
+    """
+    Запоминает запись в таблицу внутри atomic(). Возвращает False, если
+    транзакции нет — тогда вызывающий сам коммитит и уведомляет слушателей.
+    """
+    state = _state.get(id(conn))
+    if state is None:
+        return False
+    state[2].add(table)
+    return True
+
+
+class atomic(ContextDecorator):
+    """
+    Транзакция для группы операций ORM: контекстный менеджер и декоратор.
+
+        with atomic():
+            for obj in objs:
+                obj.save()     # без commit после каждой строки
+
+    Внешний atomic() открывает BEGIN и делает один COMMIT на выходе
+    (ROLLBACK при исключении); вложенные используют SAVEPOINT и при
+    ошибке откатывают только свою часть. Слушатели записи
+    (Model.add_write_listener) уведомляются после COMMIT.
+    """
+
+    def __init__(self, connection=None) -> None:
+        self._explicit = connection
+        self._stack = []
+
+    def __enter__(self):
+        pool = None
+        if self._explicit is not None:
+            conn = self._explicit
+        else:
+            # транзакция держит соединение-писатель пула до выхода из блока
+            from .models import Model
+            pool = Model._pool
+            conn = pool.acquire_writer()
+        try:
+            self._begin(conn)
+        except BaseException:
+            if pool is not None:
+                pool.release_writer()
+            raise
+        self._stack.append((conn, pool))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        conn, pool = self._stack.pop()
+        try:
+            tables = self._finish(conn, exc_type)
+        finally:
+            if pool is not None:
+                pool.release_writer()
+        if tables:
+            from .models import Model
+            Model._committed(tables)
+        return False
+
+    @staticmethod
+    def _begin(conn):
+        state = _state.get(id(conn))
+        if state is None:
+            if conn.in_transaction:
+                # неявная транзакция sqlite3 от предыдущих операций
+                conn.commit()
+            conn.execute("BEGIN")
+            _state[id(conn)] = [conn, 1, set()]
+        else:
+            conn.execute(f'SAVEPOINT "miniweb_sp_{state[1]}"')
+            state[1] += 1
+
+    @staticmethod
+    def _finish(conn, exc_type):
+        """Закрывает уровень транзакции; возвращает таблицы для уведомления после COMMIT."""
+        state = _state[id(conn)]
+        state[1] -= 1
+        depth = state[1]
+        if depth:
+            name = f'"miniweb_sp_{depth}"'
+            if exc_type is not None:
+                conn.execute(f"ROLLBACK TO SAVEPOINT {name}")
+            conn.execute(f"RELEASE SAVEPOINT {name}")
+            return ()
+
+        del _state[id(conn)]
+        if exc_type is not None:
+            conn.rollback()
+            return ()
+        conn.commit()
+        return state[2]
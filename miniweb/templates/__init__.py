@@ -1,3 +1,20 @@
-from .engine import init_template_engine, render_template
+from .engine import (
+    get_fragment_cache,
+    init_template_engine,
+    precompile_templates,
+    render_template,
+    render_template_async,
+    stream_template,
+)
+from .fragments import FileFragmentStore, MemoryFragmentStore
 
-__all__ = ["init_template_engine", "render_template"]
\ No newline at end of file
+__all__ = [
+    "FileFragmentStore",
+    "MemoryFragmentStore",
+    "get_fragment_cache",
+    "init_template_engine",
+    "precompile_templates",
+    "render_template",
+    "render_template_async",
+    "stream_template",
+]
\ No newline at end of file
@@ -1,11 +1,64 @@
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
-from typing import Optional
+import asyncio
+import contextvars
+import functools
+
+from jinja2 import BytecodeCache, Environment, FileSystemBytecodeCache, FileSystemLoader, TemplateNotFound
+from typing import AsyncIterator, Dict, Iterator, Optional, Union
+
+from .fragments import FragmentCacheExtension, MemoryFragmentStore
 
 
 _env: Optional[Environment] = None
 _templates_enabled: bool = True
 
-def init_template_engine(enabled: bool = True, templates_dir: str = "templates") -> None:
+
+class MemoryBytecodeCache(BytecodeCache):
+    """Байткод шаблонов в словаре процесса (после fork его наследуют воркеры)."""
+
+    def __init__(self) -> None:
+        self._store: Dict[str, bytes] = {}
+
+    def load_bytecode(self, bucket) -> None:
+        code = self._store.get(bucket.key)
+        if code is not None:
+            bucket.bytecode_from_string(code)
+
+    def dump_bytecode(self, bucket) -> None:
+        self._store[bucket.key] = bucket.bytecode_to_string()
+
+    def clear(self) -> None:
+        self._store.clear()
+
+
+def _make_bytecode_cache(option) -> Optional[BytecodeCache]:
+    if option is None or isinstance(option, BytecodeCache):
+        return option
+    if option == "memory":
+        return MemoryBytecodeCache()
+    if option == "filesystem":
+        # по умолчанию — личный каталог во временной папке
+        return FileSystemBytecodeCache()
+    return FileSystemBytecodeCache(str(option))
+
+
+def init_template_engine(enabled: bool = True, templates_dir: str = "templates",
+                         production: bool = False,
+                         bytecode_cache: Union[None, str, BytecodeCache] = None,
+                         enable_async: bool = False, fragment_cache=None) -> None:
+    """
+    production=True: шаблоны не перепроверяются по mtime (auto_reload=False),
+    все компилируются сразу при инициализации, а скомпилированный байткод
+    кладётся в bytecode_cache ("memory", "filesystem", путь к каталогу или
+    готовый BytecodeCache; по умолчанию в production — "filesystem"), так
+    что перезапуск воркеров не компилирует шаблоны заново.
+
+    enable_async=True включает асинхронный режим Jinja2: в async-обработчиках
+    тогда нужен render_template_async (синхронный render_template работает
+    только вне event loop — например, в обработчиках на пуле потоков).
+
+    fragment_cache — хранилище для тега {% cache %} (MemoryFragmentStore
+    по умолчанию, FileFragmentStore для нескольких воркеров).
+    """
     global _env, _templates_enabled
     _templates_enabled = enabled
 
@@ -13,22 +66,100 @@ def init_template_engine(enabled: bool = True, templates_dir: str = "templates")
         _env = None
         return
 
+    if production and bytecode_cache is None:
+        bytecode_cache = "filesystem"
 
     _env = Environment(
         loader=FileSystemLoader(templates_dir),
-        autoescape=True
+        autoescape=True,
+        auto_reload=not production,
+        # в production держим в памяти все шаблоны, а не 400 последних
+        cache_size=-1 if production else 400,
+        bytecode_cache=_make_bytecode_cache(bytecode_cache),
+        enable_async=enable_async,
+        extensions=[FragmentCacheExtension],
     )
+    _env.fragment_cache = fragment_cache if fragment_cache is not None else MemoryFragmentStore()
+    if production:
+        precompile_templates()
 
 
-def render_template(template_name: str, context: dict) -> str:
+def precompile_templates() -> int:
+    """Компилирует все шаблоны каталога заранее; возвращает их число."""
+    env = _get_env()
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def get_fragment_cache():
+    """Хранилище фрагментов {% cache %} — для подписки на запись в таблицы."""
+    return _get_env().fragment_cache
+
+
+def _get_env() -> Environment:
     if not _templates_enabled:
         raise RuntimeError("Шаблонизатор отключён настройками приложения")
     if _env is None:
         raise RuntimeError("Шаблонное окружение не инициализировано")
+    return _env
 
+
+def _get_template(template_name: str):
     try:
-        template = _env.get_template(template_name)
+        return _get_env().get_template(template_name)
     except TemplateNotFound:
         raise FileNotFoundError(f"Шаблон «{template_name}» не найден")
 
-    return template.render(**context)
\ No newline at end of file
+
+def render_template(template_name: str, context: dict) -> str:
+    return _get_template(template_name).render(**context)
+
+
+async def render_template_async(template_name: str, context: dict) -> str:
+    """
+    Рендер для async-обработчиков. В асинхронном окружении (enable_async)
+    шаблон может ждать awaitable и перебирать async-итераторы из контекста.
+    Иначе шаблон рендерится в пуле потоков БД (ConnectionPool.run): ленивый
+    QuerySet в контексте выполняет запрос при рендеринге и не должен
+    блокировать event loop, а читатель возвращается в пул после рендера.
+    """
+    from miniweb.orm.models import Model
+
+    template = _get_template(template_name)
+    if template.environment.is_async:
+        return await template.render_async(**context)
+    if Model._pool is not None:
+        return await Model._pool.run(template.render, **context)
+    loop = asyncio.get_running_loop()
+    # contextvars запроса (карта идентичности ORM) видны в потоке
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(None, functools.partial(ctx.run, template.render, **context))
+
+
+def stream_template(template_name: str, context: dict,
+                    buffer_size: int = 8) -> Union[Iterator[str], AsyncIterator[str]]:
+    """
+    Отдаёт шаблон кусками по мере рендеринга — результат можно вернуть из
+    обработчика как есть, и он уйдёт в Transfer-Encoding: chunked.
+    buffer_size — сколько фрагментов вывода Jinja склеивать в один кусок.
+    В асинхронном окружении возвращает асинхронный генератор.
+    """
+    template = _get_template(template_name)
+    if template.environment.is_async:
+        return _buffered_async(template.generate_async(**context), buffer_size)
+    stream = template.stream(**context)
+    stream.enable_buffering(buffer_size)
+    return iter(stream)
+
+
+async def _buffered_async(parts: AsyncIterator[str], size: int) -> AsyncIterator[str]:
+    buf = []
+    async for part in parts:
+        buf.append(part)
+        if len(buf) >= size:
+            yield "".join(buf)
+            buf.clear()
+    if buf:
+        yield "".join(buf)
@@ -0,0 +1,264 @@
+"""
+Кэш фрагментов шаблонов: тег {% cache %} для Jinja2.
+
+    {% cache "author-books:" ~ author.id, 300, tables=["book"] %}
+        ... дорогой цикл по объектам ORM ...
+    {% endcache %}
+
+Первый аргумент — ключ (к нему добавляется имя шаблона), второй —
+TTL в секундах (None — бессрочно), tables — таблицы, запись в которые
+сбрасывает фрагмент (подключается через Model.add_write_listener(
+store.invalidate_table)). Хранилище подменяемое: MemoryFragmentStore
+(LRU в процессе) или FileFragmentStore (каталог на диске, общий для
+воркеров).
+"""
+import fcntl
+import hashlib
+import inspect
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+# версия таблицы в FileFragmentStore — 8-байтовый счётчик в начале файла
+_COUNTER = struct.Struct("<Q")
+
+
+def _read_counter(fd: int) -> int:
+    data = os.pread(fd, _COUNTER.size, 0)
+    return _COUNTER.unpack(data)[0] if len(data) == _COUNTER.size else 0
+
+
+class MemoryFragmentStore:
+    """
+    Фрагменты в памяти процесса, LRU по суммарному размеру в символах.
+
+    У каждой таблицы есть версия; set() получает версии, снятые до
+    рендеринга, и не сохраняет фрагмент, если таблицу успели изменить
+    за время его построения.
+    """
+
+    def __init__(self, max_size: int = 16 * 1024 * 1024) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[str, float, Tuple[str, ...]]]" = OrderedDict()
+        self._by_table: Dict[str, set] = {}
+        self._versions: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def versions(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get(t, 0) for t in tables)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None,
+            tables: Sequence[str] = (), versions: Optional[Tuple[int, ...]] = None) -> None:
+        if len(value) > self.max_size:
+            return
+        expires = time.monotonic() + ttl if ttl is not None else float("inf")
+        tables = tuple(tables)
+        with self._lock:
+            if versions is not None and versions != tuple(self._versions.get(t, 0) for t in tables):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires, tables)
+            self._size += len(value)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while self._size > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        value, _, tables = self._entries.pop(key)
+        self._size -= len(value)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+
+    def invalidate_table(self, table: str) -> None:
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+            for key in list(self._by_table.pop(table, ())):
+                if key in self._entries:
+                    self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "size": self._size,
+                "hits": self.hits, "misses": self.misses}
+
+
+class FileFragmentStore:
+    """
+    Фрагменты в файлах каталога — общий кэш для воркеров одного сервера.
+
+    Версия таблицы — 8-байтовый счётчик в файле tables/<таблица>:
+    invalidate_table увеличивает его под flock, так что одновременные сбросы
+    из разных воркеров не теряются, а файл не растёт. Фрагмент
+    помнит версии своих таблиц и при чтении сверяет их с текущими, так что
+    invalidate_table в одном процессе сбрасывает фрагменты для всех.
+    Размер кэша не ограничивается: устаревшие файлы удаляются при чтении
+    и clear().
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory or os.path.join(tempfile.gettempdir(), f"miniweb-fragments-{os.getuid()}")
+        self._tables_dir = os.path.join(self.directory, "tables")
+        os.makedirs(self._tables_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+
+    def _write(self, path: str, data: str) -> None:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def versions(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        result = []
+        for table in tables:
+            try:
+                fd = os.open(os.path.join(self._tables_dir, table), os.O_RDONLY)
+            except FileNotFoundError:
+                result.append(0)
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+                result.append(_read_counter(fd))
+            finally:
+                os.close(fd)
+        return tuple(result)
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                body = f.read()
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        tables = header["tables"]
+        if header["expires"] < time.time() or list(self.versions(tables)) != header["versions"]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.misses += 1
+            return None
+        self.hits += 1
+        return body
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None,
+            tables: Sequence[str] = (), versions: Optional[Tuple[int, ...]] = None) -> None:
+        tables = list(tables)
+        current = self.versions(tables)
+        if versions is not None and tuple(versions) != current:
+            return
+        header = {"expires": time.time() + ttl if ttl is not None else float("inf"),
+                  "tables": tables, "versions": list(current)}
+        self._write(self._path(key), json.dumps(header) + "\n" + value)
+
+    def invalidate_table(self, table: str) -> None:
+        fd = os.open(os.path.join(self._tables_dir, table), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # блокировка снимается вместе с закрытием дескриптора
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            os.pwrite(fd, _COUNTER.pack(_read_counter(fd) + 1), 0)
+        finally:
+            os.close(fd)
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class FragmentCacheExtension(Extension):
+    """Тег {% cache key[, ttl][, tables=[...]] %}...{% endcache %}."""
+
+    tags = {"cache"}
+
+    def __init__(self, environment) -> None:
+        super().__init__(environment)
+        environment.extend(fragment_cache=MemoryFragmentStore())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        ttl = nodes.Const(None)
+        tables = nodes.List([])
+        while parser.stream.skip_if("comma"):
+            if parser.stream.current.type == "name" and parser.stream.look().type == "assign":
+                name = next(parser.stream).value
+                next(parser.stream)
+                value = parser.parse_expression()
+                if name == "tables":
+                    tables = value
+                elif name == "ttl":
+                    ttl = value
+                else:
+                    parser.fail(f"unknown cache option {name!r}", lineno)
+            else:
+                ttl = parser.parse_expression()
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        args = [nodes.Const(parser.name), key, ttl, tables]
+        return nodes.CallBlock(self.call_method("_cached", args), [], [], body).set_lineno(lineno)
+
+    def _cached(self, template_name, key, ttl, tables, caller):
+        store = self.environment.fragment_cache
+        full_key = f"{template_name}:{key}"
+        value = store.get(full_key)
+        if value is not None:
+            return Markup(value)
+        tables = tuple(tables)
+        # версии снимаются до рендеринга: запись во время него не даст
+        # сохранить устаревший фрагмент
+        versions = store.versions(tables)
+        rendered = caller()
+        if inspect.isawaitable(rendered):
+            return self._store_async(store, full_key, rendered, ttl, tables, versions)
+        store.set(full_key, str(rendered), ttl, tables, versions)
+        return rendered
+
+    @staticmethod
+    async def _store_async(store, key, rendered, ttl, tables, versions):
+        value = await rendered
+        store.set(key, str(value), ttl, tables, versions)
+        return value
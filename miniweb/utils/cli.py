@@ -1,21 +1,74 @@
+import os
+
 from miniweb.utils.config import load_config_from_args
-from miniweb.templates.engine import init_template_engine, render_template
+from miniweb.templates.engine import (get_fragment_cache, init_template_engine, render_template,
+                                      render_template_async)
+from miniweb.templates.fragments import FileFragmentStore, MemoryFragmentStore
 from miniweb.orm.models import Model
-from miniweb.core.server import App
+from miniweb.orm.cache import identity_map_middleware
+from miniweb.orm.migrations import migrate
+from miniweb.orm.executor import executor, query_log_middleware
+from miniweb.core.server import App, Response
 from demo import Book, Author
 
 def main():
     config = load_config_from_args()
 
     Model.connect(config["DB_PATH"])
-    Model.create_all()
+    # создаёт недостающие таблицы, колонки и индексы (в том числе в старой БД)
+    for op in migrate():
+        if op.kind == "note":
+            print(f"* schema: {op.table}.{op.detail}")
 
     init_template_engine(
         enabled=config["TEMPLATES_ENABLED"],
-        templates_dir="templates"
+        templates_dir="templates",
+        # без --debug шаблоны компилируются при старте и не перечитываются
+        production=not config["DEBUG"],
+        # {% cache %}: у нескольких воркеров общий кэш фрагментов на диске
+        fragment_cache=FileFragmentStore() if config["WORKERS"] > 1 else MemoryFragmentStore(),
+    )
+
+    app = App(
+        max_body_size=config["MAX_BODY_SIZE"],
+        max_connections=config["MAX_CONNECTIONS"],
+        max_inflight=config["MAX_INFLIGHT"],
+        max_queue_time=config["MAX_QUEUE_TIME"],
+        backlog=config["BACKLOG"],
     )
+    if config["COMPRESSION"]:
+        app.enable_compression()
+    if config["METRICS"]:
+        app.enable_metrics()
+    if os.path.isdir("static"):
+        # в режиме отладки браузер перепроверяет файлы на каждом запросе
+        app.static("/static", "static", max_age=0 if config["DEBUG"] else 3600)
+
+    # запись через ORM сбрасывает закэшированные страницы, зависящие от таблицы
+    Model.add_write_listener(app.response_cache.invalidate_table)
+    if config["TEMPLATES_ENABLED"]:
+        Model.add_write_listener(get_fragment_cache().invalidate_table)
+    # один экземпляр на pk в пределах запроса (obj.author не перечитывает автора)
+    app.add_middleware(identity_map_middleware)
+    if config["DEBUG"]:
+        # EXPLAIN QUERY PLAN для новых SELECT и время БД в request.timings["db"]
+        executor.debug = True
+        app.add_middleware(query_log_middleware())
+    Author.enable_row_cache(max_size=4096, ttl=60)
 
-    app = App()
+    @app.on_worker_start
+    def reconnect_db():
+        # соединение SQLite нельзя разделять между процессами после fork
+        Model.connect(config["DB_PATH"])
+
+    # читатель SQLite возвращается в пул после каждого синхронного обработчика:
+    # потоков у App может быть больше, чем читателей
+    app.after_sync_handler(Model.release_connection)
+
+    @app.on_shutdown
+    def close_db():
+        # после того как дообслужены текущие запросы
+        Model.disconnect()
 
     @app.route("/")
     def index(request):
@@ -28,20 +81,40 @@ def main():
 
 
     @app.route("/items")
+    @app.cache(ttl=30, tables=["book", "author"])
     async def list_items(request):
-        items = Book.all()
         if config["TEMPLATES_ENABLED"]:
-            return render_template("items.html", {"items": items})
+            # ленивый QuerySet: при попадании в кэш фрагмента запроса к БД нет,
+            # при промахе он выполняется при рендеринге — в пуле потоков БД, не в loop
+            items = Book.objects.select_related("author")
+            return await render_template_async("items.html", {"items": items})
+        items = await Book.objects.select_related("author").aall()
         return "\n".join(f"{i:>2}. {b}" for i, b in enumerate(items, 1)) or "Книг нет."
 
+    @app.route("/items.csv")
+    def export_items(request):
+        # курсор отдаёт строки пачками (fetchmany), и они уходят по мере
+        # генерации (chunked) — память не растёт с размером таблицы. Генератор
+        # продвигается в пуле потоков по куску за шаг, так что кусок — пачка строк
+        def rows(batch=500):
+            yield "id,title,pages,author_id\n"
+            lines = []
+            for b in Book.objects.order_by("id").batch_size(batch):
+                title = b.title.replace('"', '""')
+                lines.append(f'{b.id},"{title}",{b.pages},{b.__dict__.get("author_id")}\n')
+                if len(lines) == batch:
+                    yield "".join(lines)
+                    lines.clear()
+            if lines:
+                yield "".join(lines)
+        return Response(200, {"Content-Type": "text/csv"}, rows())
+
     def _books_by_author(author):
-        aid = author.id
-        return [
-            b for b in Book.all()
-            if getattr(b.author, "id", b.author) == aid
-        ]
+        # QuerySet ленивый: выполнится, только если фрагмент не в кэше
+        return Book.objects.filter(author=author)
 
     @app.route("/authors/<int:author_id>")
+    @app.cache(ttl=30, tables=["book", "author"])
     def author_detail(req, author_id: int):
         author = Author.get(author_id)
         if author is None:
@@ -59,7 +132,11 @@ def main():
     app.run(
         host=config["HOST"],
         port=config["PORT"],
-        debug=config["DEBUG"]
+        debug=config["DEBUG"],
+        thread_pool_size=config["THREAD_POOL_SIZE"],
+        thread_queue_limit=config["THREAD_QUEUE_LIMIT"],
+        workers=config["WORKERS"],
+        reload=config["RELOAD"],
     )
 
 if __name__ == "__main__":
@@ -6,7 +6,18 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "PORT": 8000,
     "DB_PATH": "app.db",
     "TEMPLATES_ENABLED": True,
-    "DEBUG": False
+    "DEBUG": False,
+    "THREAD_POOL_SIZE": 8,
+    "THREAD_QUEUE_LIMIT": 64,
+    "WORKERS": 1,
+    "MAX_BODY_SIZE": 10 * 1024 * 1024,
+    "COMPRESSION": False,
+    "METRICS": False,
+    "MAX_CONNECTIONS": 1024,
+    "MAX_INFLIGHT": 256,
+    "MAX_QUEUE_TIME": None,
+    "BACKLOG": 1024,
+    "RELOAD": False
 }
 
 def load_config_from_args() -> Dict[str, Any]:
@@ -19,6 +30,27 @@ def load_config_from_args() -> Dict[str, Any]:
     parser.add_argument("--db", default=DEFAULT_CONFIG["DB_PATH"], help="Путь к SQLite-файлу БД")
     parser.add_argument("--no-templates", action="store_true", help="Отключить шаблонизатор")
     parser.add_argument("--debug", action="store_true", help="Включить режим отладки")
+    parser.add_argument("--threads", type=int, default=DEFAULT_CONFIG["THREAD_POOL_SIZE"],
+                        help="Размер пула потоков для синхронных обработчиков")
+    parser.add_argument("--thread-queue", type=int, default=DEFAULT_CONFIG["THREAD_QUEUE_LIMIT"],
+                        help="Максимум ожидающих вызовов в пуле потоков (0 — без ограничения)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_CONFIG["WORKERS"],
+                        help="Количество процессов-воркеров (SO_REUSEPORT)")
+    parser.add_argument("--max-body-size", type=int, default=DEFAULT_CONFIG["MAX_BODY_SIZE"],
+                        help="Максимальный размер тела запроса в байтах (иначе 413)")
+    parser.add_argument("--compress", action="store_true", help="Сжимать ответы (gzip/deflate/br)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Отдавать метрики в формате Prometheus на /__metrics")
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_CONFIG["MAX_CONNECTIONS"],
+                        help="Максимум одновременных соединений на процесс (сверх — 503; 0 — без ограничения)")
+    parser.add_argument("--max-inflight", type=int, default=DEFAULT_CONFIG["MAX_INFLIGHT"],
+                        help="Максимум одновременно обрабатываемых запросов (сверх — 503; 0 — без ограничения)")
+    parser.add_argument("--max-queue-time", type=float, default=DEFAULT_CONFIG["MAX_QUEUE_TIME"],
+                        help="Отвечать 503 на запросы, прождавшие в очереди дольше стольких секунд")
+    parser.add_argument("--backlog", type=int, default=DEFAULT_CONFIG["BACKLOG"],
+                        help="Длина очереди непринятых соединений (listen backlog)")
+    parser.add_argument("--reload", action="store_true",
+                        help="Перезапускать сервер при изменении исходников и шаблонов (для разработки)")
 
     args = parser.parse_args()
 
@@ -27,5 +59,16 @@ def load_config_from_args() -> Dict[str, Any]:
         "PORT": args.port,
         "DB_PATH": args.db,
         "TEMPLATES_ENABLED": not args.no_templates,
-        "DEBUG": args.debug
+        "DEBUG": args.debug,
+        "THREAD_POOL_SIZE": args.threads,
+        "THREAD_QUEUE_LIMIT": args.thread_queue,
+        "WORKERS": args.workers,
+        "MAX_BODY_SIZE": args.max_body_size,
+        "COMPRESSION": args.compress,
+        "METRICS": args.metrics,
+        "MAX_CONNECTIONS": args.max_connections,
+        "MAX_INFLIGHT": args.max_inflight,
+        "MAX_QUEUE_TIME": args.max_queue_time,
+        "BACKLOG": args.backlog,
+        "RELOAD": args.reload
     }
\ No newline at end of file
@@ -1,7 +1,10 @@
 # miniweb/utils/request.py
 
+import io
 import json
-from typing import Any, Dict
+import shutil
+import tempfile
+from typing import Any, Dict, Tuple
 from urllib.parse import parse_qs
 
 # Предполагаем, что Request у вас предоставляет:
@@ -43,4 +46,149 @@ def parse_form(request) -> Dict[str, Any]:
         body = body.decode("utf-8")
     # parse_qs возвращает List[str] для каждого ключа, распаковываем первый элемент
     raw = parse_qs(body, keep_blank_values=True)
-    return {k: v[0] if v else "" for k, v in raw.items()}
\ No newline at end of file
+    return {k: v[0] if v else "" for k, v in raw.items()}
+
+async def read_json(request) -> Dict[str, Any]:
+    """
+    Асинхронный вариант parse_json для потоковых запросов (route(..., stream=True)):
+    дочитывает тело из соединения и разбирает его.
+    """
+    await request.read()
+    return parse_json(request)
+
+
+async def read_form(request) -> Dict[str, Any]:
+    """Асинхронный вариант parse_form для потоковых запросов."""
+    await request.read()
+    return parse_form(request)
+
+
+class UploadedFile:
+    """
+    Файл из multipart/form-data. Содержимое лежит в SpooledTemporaryFile:
+    в памяти до spool_size байт, дальше — во временном файле на диске.
+    """
+
+    def __init__(self, name: str, filename: str, content_type: str, spool_size: int) -> None:
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+        self.file = tempfile.SpooledTemporaryFile(max_size=spool_size)
+
+    def write(self, data) -> None:
+        self.file.write(data)
+        self.size += len(data)
+
+    def read(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
+
+    def save(self, path) -> None:
+        self.file.seek(0)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(self.file, out)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __repr__(self) -> str:
+        return f"<UploadedFile {self.name}={self.filename!r} {self.size} bytes>"
+
+
+def _header_params(value: str) -> Tuple[str, Dict[str, str]]:
+    """'form-data; name="a"; filename="b.txt"' -> ('form-data', {'name': 'a', ...})"""
+    main, *rest = value.split(";")
+    params = {}
+    for item in rest:
+        if "=" not in item:
+            continue
+        key, val = item.split("=", 1)
+        val = val.strip()
+        if len(val) >= 2 and val[0] == val[-1] == '"':
+            val = val[1:-1]
+        params[key.strip().lower()] = val
+    return main.strip().lower(), params
+
+
+async def parse_multipart(request, spool_size: int = 1024 * 1024) -> Tuple[Dict[str, str], Dict[str, UploadedFile]]:
+    """
+    Потоково разбирает multipart/form-data и возвращает (поля, файлы).
+    Тело читается по кускам через request.stream(), поэтому большие файлы
+    не держатся в памяти целиком. Если Content-Type не multipart — ({}, {}).
+    Некорректное тело — ValueError.
+    """
+    kind, params = _header_params(request.headers.get("Content-Type", ""))
+    if kind != "multipart/form-data" or not params.get("boundary"):
+        return {}, {}
+    delimiter = b"--" + params["boundary"].encode("latin-1")
+    separator = b"\r\n" + delimiter
+
+    fields: Dict[str, str] = {}
+    files: Dict[str, UploadedFile] = {}
+    buf = bytearray()
+    state = "preamble"
+    target = None
+    name = ""
+
+    async for chunk in request.stream():
+        buf += chunk
+        while True:
+            if state == "preamble":
+                idx = buf.find(delimiter)
+                if idx == -1 or len(buf) < idx + len(delimiter) + 2:
+                    break
+                tail = bytes(buf[idx + len(delimiter):idx + len(delimiter) + 2])
+                del buf[:idx + len(delimiter) + 2]
+                state = "end" if tail == b"--" else "headers"
+            elif state == "headers":
+                idx = buf.find(b"\r\n\r\n")
+                if idx == -1:
+                    break
+                part_headers = {}
+                for line in bytes(buf[:idx]).decode("utf-8", "replace").split("\r\n"):
+                    if ":" in line:
+                        key, val = line.split(":", 1)
+                        part_headers[key.strip().lower()] = val.strip()
+                del buf[:idx + 4]
+                _, disp = _header_params(part_headers.get("content-disposition", ""))
+                name = disp.get("name", "")
+                if "filename" in disp:
+                    target = UploadedFile(name, disp["filename"],
+                                          part_headers.get("content-type", "application/octet-stream"),
+                                          spool_size)
+                else:
+                    target = io.BytesIO()
+                state = "body"
+            elif state == "body":
+                idx = buf.find(separator)
+                if idx == -1:
+                    # хвост может оказаться началом разделителя — оставляем его в буфере
+                    keep = len(separator) + 1
+                    if len(buf) > keep:
+                        target.write(bytes(buf[:-keep]))
+                        del buf[:-keep]
+                    break
+                if len(buf) < idx + len(separator) + 2:
+                    break
+                target.write(bytes(buf[:idx]))
+                if isinstance(target, UploadedFile):
+                    files[name] = target
+                else:
+                    fields[name] = target.getvalue().decode("utf-8", "replace")
+                tail = bytes(buf[idx + len(separator):idx + len(separator) + 2])
+                del buf[:idx + len(separator) + 2]
+                target = None
+                state = "end" if tail == b"--" else "headers"
+            else:
+                # эпилог после закрывающего разделителя не нужен
+                buf.clear()
+                break
+
+    if state != "end":
+        for f in files.values():
+            f.close()
+        if isinstance(target, UploadedFile):
+            target.close()
+        raise ValueError("Malformed multipart body")
+    return fields, files
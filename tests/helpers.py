@@ -0,0 +1,45 @@
+# tests/helpers.py — общие помощники тестов, запускающих сервер
+
+import asyncio
+import socket
+import time
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def fetch(port: int, path: str) -> bytes:
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as s:
+        s.sendall(f"GET {path} HTTP/1.1\r\nConnection: close\r\n\r\n".encode())
+        data = b""
+        while chunk := s.recv(4096):
+            data += chunk
+    return data
+
+
+def wait_ready(port: int, timeout: float = 5.0) -> None:
+    """Ждёт, пока сервер на port не ответит на GET /pid."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            fetch(port, "/pid")
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError("сервер не поднялся")
+
+
+async def exchange(app, payload: bytes) -> bytes:
+    # поднимаем сервер на свободном порту, шлём сырые байты и читаем до закрытия
+    server = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(payload)
+        await writer.drain()
+        data = await asyncio.wait_for(reader.read(), timeout=5)
+        writer.close()
+    return data
@@ -0,0 +1,39 @@
+# tests/test_benchmarks.py
+
+import asyncio
+
+from benchmarks.bench_load import generate_load, make_app
+from benchmarks.results import LOWER, Results, compare
+
+
+def test_compare_respects_direction(tmp_path):
+    base = Results({"platform": "x"})
+    base.add("micro.router.match", 1000.0, "ops/s")
+    base.add("load.p99.index", 10.0, "ms", LOWER)
+    base.save(str(tmp_path / "base.json"))
+
+    current = Results({"platform": "x"})
+    current.add("micro.router.match", 1200.0, "ops/s")
+    current.add("load.p99.index", 13.0, "ms", LOWER)
+    current.add("micro.new", 1.0, "ops/s")
+
+    rows, regressions = compare(Results.load(str(tmp_path / "base.json")), current, threshold=0.1)
+    assert [r[0] for r in rows] == ["micro.router.match", "load.p99.index"]
+    # рост задержки на 30% — регрессия, рост ops/s на 20% — нет
+    assert [r[0] for r in regressions] == ["load.p99.index"]
+
+
+def test_load_generator_keep_alive_and_close():
+    async def run():
+        app = make_app(payload_size=100)
+        server = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reuse = await generate_load(port, requests=40, concurrency=4, path="/payload")
+            close = await generate_load(port, requests=20, concurrency=4, keep_alive=False,
+                                        path="/echo", method="POST", body_size=10)
+        return reuse, close
+
+    reuse, close = asyncio.run(run())
+    assert reuse["requests"] == 40 and reuse["errors"] == 0 and reuse["statuses"] == {200: 40}
+    assert close["requests"] == 20 and close["statuses"] == {200: 20}
@@ -0,0 +1,132 @@
+# tests/test_cache.py
+
+import asyncio
+import time
+
+from miniweb.core.cache import ResponseCache, etag_matches, matching_etag
+from miniweb.core.server import App, Request, Response
+
+
+def resp(body: bytes):
+    return Response(200, {}, body)
+
+
+def test_lru_by_bytes_and_ttl(monkeypatch):
+    cache = ResponseCache(max_bytes=250)
+    cache.set("a", resp(b"a" * 100), ttl=10)
+    cache.set("b", resp(b"b" * 100), ttl=10)
+    assert cache.get("a") is not None   # «a» становится самым свежим
+    cache.set("c", resp(b"c" * 100), ttl=10)
+    assert cache.get("b") is None and cache.get("a") and cache.get("c")
+    assert cache.size <= 250
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 60)
+    assert cache.get("a") is None
+
+
+def test_invalidate_table():
+    cache = ResponseCache()
+    cache.set("books", resp(b"1"), ttl=10, tables=["book"])
+    cache.set("authors", resp(b"2"), ttl=10, tables=["author"])
+    cache.invalidate_table("book")
+    assert cache.get("books") is None and cache.get("authors") is not None
+
+
+def test_single_flight():
+    cache = ResponseCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return resp(b"x")
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute, 10) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(r[0].body == b"x" for r in results)
+
+
+def test_streaming_responses_are_not_shared():
+    app = App()
+
+    @app.route("/rows")
+    @app.cache(ttl=30)
+    async def rows(request):
+        await asyncio.sleep(0.01)
+
+        async def gen():
+            for i in range(3):
+                yield f"row{i}\n"
+        return Response(200, {"Content-Type": "text/plain"}, gen())
+
+    async def fetch():
+        response = await app._run_pipeline(Request("GET", "/rows", {}))
+        return b"".join([chunk.encode() async for chunk in response.body])
+
+    async def scenario():
+        return await asyncio.gather(*(fetch() for _ in range(3)))
+
+    # один общий итератор раздал бы клиентам по строке
+    assert asyncio.run(scenario()) == [b"row0\nrow1\nrow2\n"] * 3
+
+
+def test_etag_matches():
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"x"')
+    assert not etag_matches('"zzz"', '"abc"')
+    assert matching_etag('"abc-gzip"', '"abc"') == '"abc-gzip"'
+    assert matching_etag('"abc"', '"abc"') == '"abc"'
+    assert matching_etag('"abc-zstd"', '"abc"') is None
+
+
+def test_app_cache_decorator_with_304():
+    app = App()
+    hits = []
+
+    @app.route("/items")
+    @app.cache(ttl=30, vary=["Accept-Language"], tables=["book"])
+    async def items(request):
+        hits.append(request.headers.get("Accept-Language"))
+        return "list"
+
+    def get(headers):
+        return asyncio.run(app._run_pipeline(Request("GET", "/items", headers)))
+
+    first = get({"Accept-Language": "ru"})
+    etag = first.headers["ETag"]
+    assert first.status == 200 and first.body == b"list"
+    assert get({"Accept-Language": "ru", "If-None-Match": etag}).status == 304
+    get({"Accept-Language": "en"})
+    assert hits == ["ru", "en"]
+
+    app.response_cache.invalidate_table("book")
+    get({"Accept-Language": "ru"})
+    assert hits == ["ru", "en", "ru"]
+
+
+def test_cached_response_etag_with_compression():
+    app = App()
+    app.enable_compression(min_size=10)
+    app.compressor.encodings = ("gzip",)
+
+    @app.route("/page")
+    @app.cache(ttl=30)
+    async def page(request):
+        return "<p>hello</p>" * 100
+
+    def get(headers):
+        return asyncio.run(app._run_pipeline(Request("GET", "/page", headers)))
+
+    plain = get({})
+    gzipped = get({"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] != plain.headers["ETag"]
+
+    # валидатор сжатой формы тоже даёт 304 — и возвращается в ответе
+    not_modified = get({"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"]})
+    assert not_modified.status == 304 and not_modified.headers["ETag"] == gzipped.headers["ETag"]
+    assert get({"If-None-Match": plain.headers["ETag"]}).status == 304
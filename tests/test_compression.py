@@ -0,0 +1,99 @@
+# tests/test_compression.py
+
+import asyncio
+import gzip
+import zlib
+
+from miniweb.core.compression import Compressor, parse_accept_encoding
+from miniweb.core.server import App, Request, Response
+
+
+def req(accept="gzip, deflate"):
+    return Request("GET", "/", {"Accept-Encoding": accept})
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0.5, br, identity;q=0") == {"gzip": 0.5, "br": 1.0, "identity": 0.0}
+
+
+def test_choose_encoding():
+    c = Compressor()
+    c.encodings = ("gzip", "deflate")
+    assert c.choose_encoding("deflate;q=0.9, gzip") == "gzip"
+    assert c.choose_encoding("gzip;q=0, deflate") == "deflate"
+    assert c.choose_encoding("identity") is None
+    assert c.choose_encoding("*") == "gzip"
+
+
+def test_buffered_body_and_cache():
+    c = Compressor(min_size=10)
+    c.encodings = ("gzip",)
+    body = b"<p>hello</p>" * 100
+    resp = Response(200, {"Content-Type": "text/html"}, body)
+    out = c.apply(req(), resp)
+    assert out.headers["Content-Encoding"] == "gzip"
+    assert out.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(out.body) == body
+    c.apply(req(), Response(200, {"Content-Type": "text/html"}, body))
+    assert (c.hits, c.misses) == (1, 1)
+
+
+def test_strong_etag_differs_between_encodings():
+    c = Compressor(min_size=10)
+    c.encodings = ("gzip",)
+    body = b"<p>hello</p>" * 100
+    strong = Response(200, {"Content-Type": "text/html", "ETag": '"abc"'}, body)
+    assert c.apply(req("identity"), strong).headers["ETag"] == '"abc"'
+    assert c.apply(req(), strong).headers["ETag"] == '"abc-gzip"'
+    weak = Response(200, {"Content-Type": "text/html", "etag": 'W/"abc"'}, body)
+    assert c.apply(req(), weak).headers["etag"] == 'W/"abc"'
+
+
+def test_skips_small_and_compressed_types():
+    c = Compressor(min_size=100)
+    small = Response(200, {"Content-Type": "text/html"}, b"tiny")
+    assert c.apply(req(), small) is small
+    png = Response(200, {"Content-Type": "image/png"}, b"x" * 1000)
+    assert c.apply(req(), png) is png
+    svg = Response(200, {"Content-Type": "image/svg+xml"}, b"<svg/>" * 100)
+    assert "Content-Encoding" in c.apply(req(), svg).headers
+    no_accept = c.apply(req(""), Response(200, {"Content-Type": "text/html"}, b"x" * 1000))
+    assert "Content-Encoding" not in no_accept.headers
+
+
+def test_streaming_body():
+    c = Compressor()
+    c.encodings = ("deflate",)
+    rows = [f"row {i}\n" for i in range(50)]
+    out = c.apply(req("deflate"), Response(200, {"Content-Type": "text/csv"}, iter(rows)))
+    assert zlib.decompress(b"".join(out.body)) == "".join(rows).encode()
+
+
+def test_server_compresses_chunked_response():
+    app = App()
+    app.enable_compression(min_size=10).encodings = ("gzip",)
+
+    @app.route("/gen", inline=True)
+    def gen(request):
+        return (f"line {i}\n" for i in range(100))
+
+    async def fetch():
+        server = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /gen HTTP/1.1\r\nAccept-Encoding: gzip\r\nConnection: close\r\n\r\n")
+            data = await reader.read()
+            writer.close()
+            return data
+
+    head, _, body = asyncio.run(fetch()).partition(b"\r\n\r\n")
+    assert b"Content-Encoding: gzip" in head and b"Transfer-Encoding: chunked" in head
+    payload = b""
+    while True:
+        size_line, _, body = body.partition(b"\r\n")
+        size = int(size_line, 16)
+        if not size:
+            break
+        payload, body = payload + body[:size], body[size + 2:]
+    assert gzip.decompress(payload) == "".join(f"line {i}\n" for i in range(100)).encode()
@@ -38,4 +38,11 @@ def test_help_flag_exits(monkeypatch, capsys):
         load_config_from_args()
     assert se.value.code == 0
     captured = capsys.readouterr()
-    assert "Запуск минимального web-фреймворка" in captured.out
\ No newline at end of file
+    assert "Запуск минимального web-фреймворка" in captured.out
+
+
+def test_thread_pool_args(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["prog", "--threads", "4", "--thread-queue", "0"])
+    cfg = load_config_from_args()
+    assert cfg["THREAD_POOL_SIZE"] == 4
+    assert cfg["THREAD_QUEUE_LIMIT"] == 0
@@ -0,0 +1,167 @@
+# tests/test_connection.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+from miniweb.orm.connection import ConnectionPool, PoolTimeout
+from miniweb.orm.fields import StringField
+from miniweb.orm.models import Model
+from miniweb.orm.transactions import atomic
+
+
+class Note(Model):
+    text = StringField()
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    Model.connect(str(tmp_path / "pool.db"), max_readers=2, timeout=0.2)
+    Note.create_table()
+    yield Model._pool
+    Model._pool.close()
+
+
+def test_pragmas_and_readers(file_db):
+    pool = file_db
+    assert pool.writer.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    reader = Model._connection
+    assert reader is not pool.writer
+    assert reader.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert reader.execute("PRAGMA query_only").fetchone()[0] == 1
+
+    seen = []
+    t = threading.Thread(target=lambda: seen.append(Model._connection))
+    t.start()
+    t.join()
+    assert seen[0] is not reader          # у каждого потока свой читатель
+
+
+def test_pool_limit_and_release(file_db):
+    pool = file_db
+    pool.connection()
+    results = []
+    gate = threading.Event()
+
+    def grab(hold):
+        try:
+            pool.connection()
+            results.append("ok")
+        except PoolTimeout:
+            results.append("timeout")
+        if hold:
+            gate.wait()
+
+    holder = threading.Thread(target=grab, args=(True,))
+    holder.start()
+    t = threading.Thread(target=grab, args=(False,))
+    t.start()
+    t.join()               # третьего читателя при max_readers=2 нет
+    gate.set()
+    holder.join()
+    del holder             # завершившийся поток возвращает читателя в пул
+    t = threading.Thread(target=grab, args=(False,))
+    t.start()
+    t.join()
+    assert results == ["ok", "timeout", "ok"]
+
+
+def test_more_handler_threads_than_readers(file_db):
+    from miniweb.core.server import App
+
+    file_db.timeout = 2
+    Note(text="x").save()
+    app = App(thread_pool_size=8)
+    app.after_sync_handler(Model.release_connection)
+
+    @app.route("/note")
+    def note(request):
+        text = Note.objects.first().text
+        time.sleep(0.02)                # читатель занят, пока идёт обработчик
+        return text
+
+    async def scenario():
+        server = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def fetch():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /note HTTP/1.1\r\nConnection: close\r\n\r\n")
+            data = await reader.read()
+            writer.close()
+            return data
+
+        async with server:
+            return await asyncio.gather(*(fetch() for _ in range(8)))
+
+    results = asyncio.run(scenario())
+    app._shutdown_executor()
+    # 8 потоков обработчиков на 2 читателя: каждый возвращает своего после запроса
+    assert all(r.startswith(b"HTTP/1.1 200") and r.endswith(b"x") for r in results)
+    assert len(file_db._idle) == 2
+
+
+def test_writes_go_through_writer_and_are_visible(file_db):
+    Note(text="a").save()
+    with atomic():
+        Note(text="b").save()
+        # внутри транзакции поток читает через писателя и видит свою запись
+        assert Model._connection is file_db.writer
+        assert Note.objects.count() == 2
+    assert Note.objects.count() == 2
+
+
+def test_async_facade(file_db):
+    async def scenario():
+        await Note(text="async").asave()
+        notes = await Note.objects.filter(text="async").aall()
+        same = await Note.aget(notes[0].id)
+        return notes, same, await Note.objects.acount()
+
+    notes, same, count = asyncio.run(scenario())
+    assert [n.text for n in notes] == ["async"] and same.text == "async" and count == 1
+    # потоков БД не больше, чем читателей (max_readers=2): лишние только ждали бы
+    assert file_db.executor._max_workers == 2
+
+
+def test_async_iteration_in_async_template(file_db, tmp_path, monkeypatch):
+    from miniweb.orm.queryset import QuerySet
+    from miniweb.templates import engine
+
+    Note(text="a").save()
+    Note(text="b").save()
+    threads = []
+    original = QuerySet.all
+
+    def recording_all(self):
+        threads.append(threading.current_thread())
+        return original(self)
+
+    monkeypatch.setattr(QuerySet, "all", recording_all)
+    (tmp_path / "notes.html").write_text("{% for n in notes %}{{ n.text }}{% endfor %}")
+    engine.init_template_engine(templates_dir=str(tmp_path), enable_async=True)
+    html = asyncio.run(engine.render_template_async("notes.html", {"notes": Note.objects.order_by("id")}))
+    # {% for %} в асинхронном Jinja идёт через __aiter__: запрос — в пуле потоков БД
+    assert html == "ab"
+    assert threads and threading.main_thread() not in threads
+
+
+def test_sync_template_renders_in_db_pool(file_db, tmp_path):
+    from miniweb.templates import engine
+
+    Note(text="a").save()
+    (tmp_path / "notes.html").write_text("{% for n in notes %}{{ n.text }}{% endfor %}")
+    (tmp_path / "thread.html").write_text("{{ thread() }}")
+    engine.init_template_engine(templates_dir=str(tmp_path))
+    html = asyncio.run(engine.render_template_async("notes.html", {"notes": Note.objects.order_by("id")}))
+    name = asyncio.run(engine.render_template_async(
+        "thread.html", {"thread": lambda: threading.current_thread().name}))
+    assert html == "a" and name.startswith("miniweb-db")
+    # ленивый запрос в шаблоне не оставляет читателя за потоком
+    assert file_db._readers_sem._value == 2
+
+
+def test_memory_db_uses_single_connection():
+    pool = ConnectionPool(":memory:")
+    assert pool.connection() is pool.writer and pool.max_readers == 0
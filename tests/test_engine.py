@@ -1,5 +1,7 @@
 # tests/test_engine.py
 
+import os
+
 import pytest
 from miniweb.templates import engine
 
@@ -31,4 +33,107 @@ def test_render_template_disabled(tmp_path):
     engine.init_template_engine(enabled=False, templates_dir=str(tmp_path))
     with pytest.raises(RuntimeError) as exc:
         engine.render_template("any.html", {})
-    assert "Шаблонизатор отключён" in str(exc.value)
\ No newline at end of file
+    assert "Шаблонизатор отключён" in str(exc.value)
+
+def test_production_mode_precompiles_and_skips_mtime_checks(tmp_path):
+    tpl_dir = tmp_path / "templates"
+    tpl_dir.mkdir()
+    (tpl_dir / "a.html").write_text("A {{ x }}")
+    (tpl_dir / "b.html").write_text("B")
+    cache = engine.MemoryBytecodeCache()
+
+    engine.init_template_engine(templates_dir=str(tpl_dir), production=True, bytecode_cache=cache)
+    assert len(cache._store) == 2
+    (tpl_dir / "a.html").write_text("changed")
+    assert engine.render_template("a.html", {"x": 1}) == "A 1"
+
+    # новое окружение берёт байткод из кэша, а не компилирует заново
+    engine.init_template_engine(templates_dir=str(tpl_dir), production=True, bytecode_cache=cache)
+    assert engine.render_template("b.html", {}) == "B"
+
+
+def test_async_render_and_stream(tmp_path):
+    import asyncio
+    import threading
+
+    tpl_dir = tmp_path / "templates"
+    tpl_dir.mkdir()
+    (tpl_dir / "list.html").write_text("{% for i in items %}<{{ i }}>{% endfor %}")
+
+    engine.init_template_engine(templates_dir=str(tpl_dir))
+    chunks = list(engine.stream_template("list.html", {"items": range(20)}, buffer_size=5))
+    assert len(chunks) > 1 and "".join(chunks) == "".join(f"<{i}>" for i in range(20))
+    assert asyncio.run(engine.render_template_async("list.html", {"items": [1]})) == "<1>"
+    # без enable_async рендер (и ленивые запросы в нём) — не в потоке event loop
+    (tpl_dir / "thread.html").write_text("{{ thread() }}")
+    context = {"thread": lambda: threading.current_thread().name}
+    name = asyncio.run(engine.render_template_async("thread.html", context))
+    assert name != threading.main_thread().name
+
+    async def items():
+        for i in range(3):
+            yield i
+
+    async def collect():
+        out = await engine.render_template_async("list.html", {"items": items()})
+        parts = [p async for p in engine.stream_template("list.html", {"items": items()})]
+        return out, "".join(parts)
+
+    engine.init_template_engine(templates_dir=str(tpl_dir), enable_async=True)
+    assert asyncio.run(collect()) == ("<0><1><2>", "<0><1><2>")
+
+
+def test_fragment_cache_tag_and_table_invalidation(tmp_path):
+    from miniweb.templates.fragments import FileFragmentStore, MemoryFragmentStore
+
+    tpl_dir = tmp_path / "templates"
+    tpl_dir.mkdir()
+    (tpl_dir / "frag.html").write_text(
+        '{% cache "list:" ~ kind, 60, tables=["book"] %}'
+        '{% for i in items %}<{{ i }}>{% endfor %}{% endcache %}|{{ kind }}')
+
+    for store in (MemoryFragmentStore(), FileFragmentStore(str(tmp_path / "frags"))):
+        engine.init_template_engine(templates_dir=str(tpl_dir), fragment_cache=store)
+        assert engine.get_fragment_cache() is store
+        assert engine.render_template("frag.html", {"kind": "a", "items": ["&"]}) == "<&amp;>|a"
+        # попадание: новые items не рендерятся, разметка не экранируется повторно
+        assert engine.render_template("frag.html", {"kind": "a", "items": [2]}) == "<&amp;>|a"
+        assert engine.render_template("frag.html", {"kind": "b", "items": [3]}) == "<3>|b"
+        store.invalidate_table("author")
+        assert engine.render_template("frag.html", {"kind": "a", "items": [4]}) == "<&amp;>|a"
+        store.invalidate_table("book")
+        assert engine.render_template("frag.html", {"kind": "a", "items": [5]}) == "<5>|a"
+        assert store.stats()["hits"] == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="нужен os.fork")
+def test_file_store_invalidation_is_atomic_across_processes(tmp_path):
+    import multiprocessing
+    from miniweb.templates.fragments import FileFragmentStore
+
+    store = FileFragmentStore(str(tmp_path / "frags"))
+
+    def bump():
+        for _ in range(200):
+            store.invalidate_table("book")
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=bump) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    # ни один сброс из параллельных воркеров не потерян
+    assert store.versions(["book", "author"]) == (800, 0)
+    # счётчик, а не журнал сбросов: файл не растёт
+    assert os.path.getsize(tmp_path / "frags" / "tables" / "book") == 8
+
+
+def test_fragment_not_stored_when_table_written_during_render():
+    from miniweb.templates.fragments import MemoryFragmentStore
+
+    store = MemoryFragmentStore()
+    versions = store.versions(["book"])
+    store.invalidate_table("book")
+    store.set("k", "stale", 60, ["book"], versions)
+    assert store.get("k") is None
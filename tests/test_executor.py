@@ -0,0 +1,79 @@
+# tests/test_executor.py
+
+import warnings
+
+import pytest
+from miniweb.orm.models import Model
+from miniweb.orm.fields import StringField, IntegerField, ForeignKey
+from miniweb.orm.executor import (FullTableScanWarning, QueryBudgetExceeded, executor,
+                                  query_budget, track_queries)
+
+
+class Label(Model):
+    name = StringField()
+
+
+class Record(Model):
+    title = StringField()
+    plays = IntegerField(default=0)
+    label = ForeignKey(Label)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_db():
+    Model.connect(":memory:")
+    Label.create_table()
+    Record.create_table()
+    label = Label(name="Melodiya").save()
+    Record.bulk_create([Record(title=f"LP {i}", plays=i, label=label) for i in range(10)])
+    yield
+    executor.debug = False
+
+
+def test_stats_record_timing_rows_and_callers():
+    executor.reset()
+    Record.objects.filter(plays__gte=5).all()
+    Record.objects.filter(plays__gte=7).all()
+    stats = executor.stats()
+    sql, entry = next((s, e) for s, e in stats.items() if "plays" in s)
+    assert entry["count"] == 2 and entry["rows"] == 5 + 3
+    assert entry["max"] >= entry["avg"] > 0
+    assert all(c.startswith(__file__) for c in entry["callers"])
+
+
+def test_sql_is_compiled_once_per_shape():
+    Record._sql_cache.clear()
+    Record.objects.filter(plays=1).first()
+    Record.objects.filter(plays=2).first()
+    assert len([k for k in Record._sql_cache if k[0] == "select"]) == 1
+
+
+def test_query_budget_catches_n_plus_one():
+    with query_budget(2) as log:
+        records = Record.objects.select_related("label").all()
+        assert {r.label.name for r in records} == {"Melodiya"}
+    assert log.count == 1
+
+    with pytest.raises(QueryBudgetExceeded, match="11 queries, budget 2"):
+        with query_budget(2):
+            for r in Record.objects.all():
+                r.label.name
+
+
+def test_track_queries_nested():
+    with track_queries() as outer:
+        Label.get(1)
+        with track_queries() as inner:
+            Record.objects.count()
+    assert (outer.count, inner.count) == (2, 1)
+
+
+def test_debug_explain_warns_on_full_scan():
+    executor.debug = True
+    executor.reset()
+    with pytest.warns(FullTableScanWarning, match="SCAN record"):
+        Record.objects.filter(title="LP 3").all()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        Record.objects.filter(label=1).all()       # ix_record_label_id
+        Record.objects.filter(title="LP 4").all()  # уже разобран
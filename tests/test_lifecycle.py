@@ -0,0 +1,129 @@
+# tests/test_lifecycle.py
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from helpers import fetch, free_port, wait_ready
+from miniweb.core.lifecycle import Reloader, _snapshot
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="нужны POSIX-сигналы")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def server(tmp_path):
+    port = free_port()
+    marker = tmp_path / "shutdown.log"
+    # скрипт, а не -c: перезапуск по SIGHUP запускает ту же команду заново
+    script = tmp_path / "app.py"
+    script.write_text(textwrap.dedent(f"""
+        import os, time
+        from miniweb.core.server import App
+        app = App(port={port})
+
+        @app.route("/pid", inline=True)
+        def pid(request):
+            return str(os.getpid())
+
+        @app.route("/slow")
+        def slow(request):
+            time.sleep(0.5)
+            return "finished"
+
+        @app.on_shutdown
+        async def log_shutdown():
+            with open({str(marker)!r}, "a") as f:
+                f.write(f"{{os.getpid()}}\\n")
+
+        app.run()
+    """))
+    proc = subprocess.Popen([sys.executable, str(script)], cwd=ROOT, stdout=subprocess.DEVNULL,
+                            env=dict(os.environ, PYTHONPATH=ROOT))
+    try:
+        wait_ready(port)
+        yield proc, port, marker
+    finally:
+        for pid in _pids(port, proc):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        proc.wait()
+
+
+def _pids(port, proc):
+    pids = {proc.pid}
+    try:
+        pids.add(int(fetch(port, "/pid").split(b"\r\n\r\n", 1)[1]))
+    except (OSError, ValueError, IndexError):
+        pass
+    return pids
+
+
+def test_sigterm_drains_inflight_and_runs_hooks(server):
+    proc, port, marker = server
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(data=fetch(port, "/slow")))
+    thread.start()
+    time.sleep(0.2)
+    proc.send_signal(signal.SIGTERM)
+    thread.join(5)
+
+    assert result["data"].startswith(b"HTTP/1.1 200") and result["data"].endswith(b"finished")
+    assert proc.wait(timeout=5) == 0
+    assert marker.read_text().split() == [str(proc.pid)]
+    # слушающий сокет закрыт — новых соединений нет
+    with pytest.raises(OSError):
+        fetch(port, "/pid")
+
+
+def test_sighup_hands_listening_socket_to_new_process(server):
+    proc, port, marker = server
+    old_pid = int(fetch(port, "/pid").split(b"\r\n\r\n", 1)[1])
+    assert old_pid == proc.pid
+
+    proc.send_signal(signal.SIGHUP)
+    # старый процесс завершается только после готовности нового;
+    # запросы во время передачи не получают отказа
+    errors = 0
+    deadline = time.monotonic() + 10
+    while proc.poll() is None and time.monotonic() < deadline:
+        try:
+            fetch(port, "/pid")
+        except OSError:
+            errors += 1
+        time.sleep(0.02)
+    assert proc.wait(timeout=5) == 0
+    assert errors == 0
+
+    new_pid = int(fetch(port, "/pid").split(b"\r\n\r\n", 1)[1])
+    assert new_pid != old_pid
+    assert marker.read_text().split() == [str(old_pid)]
+    os.kill(new_pid, signal.SIGTERM)
+
+
+def test_reloader_detects_changes(tmp_path):
+    (tmp_path / "app.py").write_text("x = 1")
+    (tmp_path / "templates").mkdir()
+    (tmp_path / "templates" / "index.html").write_text("<p>")
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "app.cpython.pyc").write_text("")
+
+    reloader = Reloader(socket.socket(), [str(tmp_path)])
+    before = _snapshot(reloader.paths)
+    assert len(before) == 2
+
+    os.utime(tmp_path / "templates" / "index.html", (time.time() + 5, time.time() + 5))
+    (tmp_path / "new.py").write_text("")
+    changed = reloader.changed_files(before, _snapshot(reloader.paths))
+    assert {os.path.basename(p) for p in changed} == {"index.html", "new.py"}
+    reloader.sock.close()
@@ -0,0 +1,100 @@
+# tests/test_middleware.py
+
+import asyncio
+
+from miniweb.core.server import App, Request, Response
+
+
+def run(app, path="/"):
+    return asyncio.run(app._run_pipeline(Request("GET", path, {})))
+
+
+def test_order_of_middlewares_and_hooks():
+    app = App()
+    calls = []
+
+    @app.route("/", inline=True)
+    def index(request):
+        calls.append("handler")
+        return "ok"
+
+    async def outer(request, call_next):
+        calls.append("outer>")
+        response = await call_next(request)
+        calls.append("<outer")
+        return response
+
+    def inner(request, call_next):
+        calls.append("inner")
+        return call_next(request)
+
+    app.add_middleware(outer)
+    app.add_middleware(inner)
+
+    @app.before_request
+    async def before(request):
+        calls.append("before")
+
+    @app.after_request
+    def after(request, response):
+        calls.append("after")
+        return response._replace(headers={**response.headers, "X-After": "1"})
+
+    resp = run(app)
+    assert calls == ["outer>", "inner", "before", "handler", "after", "<outer"]
+    assert resp.headers["X-After"] == "1"
+
+
+def test_before_request_short_circuits():
+    app = App()
+
+    @app.route("/", inline=True)
+    def index(request):
+        raise AssertionError("не должен вызываться")
+
+    @app.before_request
+    def deny(request):
+        return Response(403, {"Content-Type": "text/plain"}, b"forbidden")
+
+    assert run(app).status == 403
+
+
+def test_stage_timings_and_errors():
+    app = App()
+
+    @app.route("/", inline=True)
+    def index(request):
+        return "ok"
+
+    async def broken(request, call_next):
+        raise RuntimeError("boom")
+
+    request = Request("GET", "/", {})
+    asyncio.run(app._run_pipeline(request))
+    assert set(request.timings) == {"handler"}
+
+    app.add_middleware(broken)
+    resp = run(app)
+    assert resp.status == 500 and resp.body == b"boom"
+    stats = app.middleware_timings()
+    assert stats["handler"]["count"] == 1
+    assert stats["test_stage_timings_and_errors.<locals>.broken"]["count"] == 1
+
+
+def test_short_circuit_with_compression():
+    def deny(request, call_next):
+        return "maintenance " * 10, 503
+
+    async def stub(request, call_next):
+        return "short"
+
+    responses = []
+    for middleware in (deny, stub):
+        app = App()
+        app.enable_compression(min_size=10)
+        app.add_middleware(middleware)
+        request = Request("GET", "/", {"accept-encoding": "gzip"})
+        responses.append(asyncio.run(app._run_pipeline(request)))
+    # ответ middleware приводится к Response до сжатия
+    assert responses[0].status == 503 and responses[0].headers["Content-Encoding"] == "gzip"
+    assert responses[1].status == 200 and responses[1].body == b"short"
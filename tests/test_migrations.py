@@ -0,0 +1,63 @@
+# tests/test_migrations.py
+
+import pytest
+from miniweb.orm.models import Model
+from miniweb.orm.fields import StringField, IntegerField, ForeignKey, Index
+from miniweb.orm.migrations import migrate
+
+
+class Shelf(Model):
+    label = StringField(unique=True)
+
+
+class Volume(Model):
+    title = StringField(index=True)
+    pages = IntegerField(default=0)
+    year = IntegerField(default=1900)
+    shelf = ForeignKey(Shelf)
+
+    class Meta:
+        indexes = [Index("shelf", "pages"), ("title", "year")]
+
+
+@pytest.fixture(autouse=True)
+def db():
+    Model.connect(":memory:")
+    yield Model._connection
+
+
+def _indexes(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA index_list("{table}")') if row[3] == "c"}
+
+
+def test_create_table_builds_declared_indexes(db):
+    Shelf.create_table()
+    Volume.create_table()
+    assert _indexes(db, "shelf") == {"ux_shelf_label"}
+    assert _indexes(db, "volume") == {"ix_volume_title", "ix_volume_shelf_id",
+                                      "ix_volume_shelf_id_pages", "ix_volume_title_year"}
+    plan = db.execute('EXPLAIN QUERY PLAN SELECT * FROM "volume" WHERE "shelf_id" = 1').fetchall()
+    assert "USING INDEX" in plan[0][3] or "USING COVERING INDEX" in plan[0][3]
+    assert migrate([Shelf, Volume]) == []
+
+
+def test_migrate_upgrades_existing_table_in_place(db):
+    db.execute('CREATE TABLE "volume" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, '
+               '"title" TEXT, "shelf_id" INTEGER, "legacy" TEXT)')
+    db.execute('CREATE INDEX "ix_volume_legacy" ON "volume" ("legacy")')
+    db.execute('CREATE INDEX "keep_me" ON "volume" ("legacy")')
+    db.execute('INSERT INTO "volume" ("title", "shelf_id") VALUES (\'Old\', 1)')
+    db.commit()
+
+    plan = migrate([Shelf, Volume], dry_run=True)
+    assert "pages" not in {r[1] for r in db.execute('PRAGMA table_info("volume")')}
+    kinds = [op.kind for op in plan]
+    assert kinds.count("add_column") == 2 and "create_table" in kinds
+    assert [op.detail for op in plan if op.kind == "note"] == ["legacy: not declared in Volume"]
+
+    migrate([Shelf, Volume])
+    assert _indexes(db, "volume") == {"keep_me", "ix_volume_title", "ix_volume_shelf_id",
+                                      "ix_volume_shelf_id_pages", "ix_volume_title_year"}
+    old = Volume.objects.get(title="Old")
+    assert (old.pages, old.year) == (0, 1900)
+    assert all(op.sql is None for op in migrate([Shelf, Volume]))
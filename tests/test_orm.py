@@ -1,5 +1,7 @@
 # tests/test_orm_basic.py
 
+import sqlite3
+
 import pytest
 from miniweb.orm.models import Model
 from miniweb.orm.fields import StringField, IntegerField, ForeignKey
@@ -12,6 +14,14 @@ class Post(Model):
     body  = StringField()
     user  = ForeignKey(User)
 
+class Comment(Model):
+    text  = StringField()
+    votes = IntegerField(default=0)
+    user  = ForeignKey(User)
+
+    class Meta:
+        slots = True
+
 @pytest.fixture(scope="module", autouse=True)
 def setup_db():
     Model.connect(":memory:")
@@ -43,3 +53,178 @@ def test_all_and_counts():
     assert len(posts) == 2
     for post in posts:
         assert isinstance(post.__dict__["user_id"], int)
+
+def test_write_listener():
+    tables = []
+    listener = Model.add_write_listener(tables.append)
+    try:
+        User(name="Carol").save()
+    finally:
+        Model._write_listeners.remove(listener)
+    assert tables == ["user"]
+
+def test_select_and_prefetch_related():
+    queries = []
+    Model._connection.set_trace_callback(queries.append)
+    try:
+        posts = Post.all(select_related=["user"])
+        assert len(queries) == 1 and "LEFT JOIN" in queries[0]
+        assert [p.user.name for p in posts] == ["Alice", "Bob"]
+        assert len(queries) == 1
+
+        queries.clear()
+        posts = Post.all(prefetch_related=["user"])
+        assert len(queries) == 2 and " IN (" in queries[1]
+        assert posts[0].user.name == "Alice" and posts[0].user.name == "Alice"
+        assert len(queries) == 2
+    finally:
+        Model._connection.set_trace_callback(None)
+
+
+def test_foreign_key_instance_cache():
+    post = Post.get(1)
+    queries = []
+    Model._connection.set_trace_callback(queries.append)
+    try:
+        first = post.user
+        assert post.user is first and len(queries) == 1
+        post.user = 2            # смена id сбрасывает кэш
+        assert post.user.name == "Bob" and len(queries) == 2
+    finally:
+        Model._connection.set_trace_callback(None)
+
+def test_bulk_create_and_update():
+    users = User.bulk_create([User(name=f"bulk{i}") for i in range(5)], batch_size=2)
+    ids = [u.id for u in users]
+    assert ids == list(range(ids[0], ids[0] + 5))
+    assert User.get(ids[-1]).name == "bulk4"
+
+    for u in users:
+        u.name = u.name.upper()
+    assert User.bulk_update(users, ["name"]) == 5
+    assert User.get(ids[0]).name == "BULK0"
+
+
+def test_atomic_commit_rollback_and_savepoints():
+    from miniweb.orm.transactions import atomic
+
+    notified = []
+    listener = Model.add_write_listener(notified.append)
+    try:
+        with pytest.raises(RuntimeError):
+            with atomic():
+                User(name="ghost").save()
+                raise RuntimeError("rollback")
+        assert User.objects.filter(name="ghost").count() == 0
+
+        with atomic():
+            User(name="kept").save()
+            with pytest.raises(ValueError):
+                with atomic():
+                    User(name="inner-ghost").save()
+                    raise ValueError
+            assert notified == []          # уведомление — только после COMMIT
+        assert notified == ["user"]
+        assert User.objects.filter(name="kept").count() == 1
+        assert User.objects.filter(name="inner-ghost").count() == 0
+
+        @atomic()
+        def create_two():
+            User(name="d1").save()
+            User(name="d2").save()
+
+        create_two()
+        assert User.objects.filter(name__startswith="d").count() == 2
+    finally:
+        Model._write_listeners.remove(listener)
+
+
+def test_hydration_bypasses_init():
+    calls = []
+    original = User.__init__
+    User.__init__ = lambda self, **kw: (calls.append(kw), original(self, **kw))[1]
+    try:
+        users = User.objects.filter(name="Alice").all()
+    finally:
+        User.__init__ = original
+    assert calls == [] and users[0].name == "Alice"
+    # своё SQL поверх соединения по-прежнему получает sqlite3.Row, ORM — кортежи
+    row = Model._connection.execute('SELECT "id" FROM "user"').fetchone()
+    assert isinstance(row, sqlite3.Row) and row["id"] == users[0].id
+    assert users[0]._connection is Model._connection
+
+
+def test_slotted_model():
+    alice = User.objects.get(name="Alice")
+    c = Comment(text="first", user=alice).save()
+    assert not hasattr(c, "__dict__")
+    assert c.votes == 0 and c.user is alice
+
+    loaded = Comment.get(c.id)
+    assert not hasattr(loaded, "__dict__")
+    assert (loaded.text, loaded.votes, loaded.user_id) == ("first", 0, alice.id)
+    assert loaded.user.name == "Alice"
+
+    loaded.votes = 5
+    loaded.save()
+    Comment.bulk_create([Comment(text=f"c{i}", user=alice) for i in range(3)])
+    comments = Comment.objects.select_related("user").order_by("id").all()
+    assert [x.votes for x in comments] == [5, 0, 0, 0]
+    assert all(x.user.name == "Alice" for x in comments)
+    for x in comments:
+        x.votes += 1
+    Comment.bulk_update(comments, ["votes"])
+    prefetched = Comment.all(prefetch_related=["user"])
+    assert sum(x.votes for x in prefetched) == 9
+    assert prefetched[0].user.name == "Alice"
+
+
+def test_identity_map_one_instance_per_pk():
+    from miniweb.orm.cache import identity_map
+
+    queries = []
+    Model._connection.set_trace_callback(queries.append)
+    try:
+        with identity_map() as imap:
+            alice = User.get(1)
+            posts = Post.objects.filter(user=alice).all()
+            assert posts[0].user is alice
+            assert User.get(1) is alice and Post.get(posts[0].id) is posts[0]
+            assert len(queries) == 2 and imap.hits == 3
+        assert User.get(1) is not alice
+    finally:
+        Model._connection.set_trace_callback(None)
+
+
+def test_row_cache_hits_and_invalidation():
+    from miniweb.orm.transactions import atomic
+
+    cache = User.enable_row_cache(max_size=2, ttl=60)
+    try:
+        u = User(name="Cached").save()
+        assert User.get(u.id).name == "Cached"          # промах, строка в кэше
+        queries = []
+        Model._connection.set_trace_callback(queries.append)
+        try:
+            assert User.get(u.id).name == "Cached" and queries == []
+        finally:
+            Model._connection.set_trace_callback(None)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        u.name = "Renamed"
+        u.save()
+        assert User.get(u.id).name == "Renamed"
+        with atomic():
+            u.name = "InTx"
+            u.save()
+        assert User.get(u.id).name == "InTx"
+
+        User.get(1), User.get(2)                         # LRU на 2 строки
+        assert cache.evictions >= 1 and len(cache) == 2
+        pk = u.id
+        assert User.get(pk).name == "InTx"
+        u.delete()
+        assert u.id is None and User.get(pk) is None
+        assert Model.row_cache_stats()["User"]["hits"] == cache.hits
+    finally:
+        User._row_cache = None
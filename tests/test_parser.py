@@ -0,0 +1,110 @@
+# tests/test_parser.py
+
+import asyncio
+import pytest
+from miniweb.core.parser import (HTTPError, Headers, body_length, iter_chunked, parse_chunk_size,
+                                 parse_request_head, read_request_head)
+from miniweb.core.server import Request
+
+
+def test_parse_head_splits_query_and_normalises_headers():
+    raw = b"get /items?page=2&q=a%20b HTTP/1.1\r\nHost: x\r\nX-Tag: a\r\nx-tag: b\r\n\r\n"
+    method, path, query, version, headers = parse_request_head(memoryview(raw))
+    assert (method, path, query, version) == ("GET", "/items", "page=2&q=a%20b", "HTTP/1.1")
+    assert headers["HOST"] == "x"
+    assert headers.get("x-TAG") == "a, b"
+    assert "host" in headers and "Cookie" not in headers
+
+
+def test_header_limits_and_errors():
+    many = b"GET / HTTP/1.1\r\n" + b"".join(b"H%d: v\r\n" % i for i in range(5)) + b"\r\n"
+    with pytest.raises(HTTPError) as exc:
+        parse_request_head(many, max_headers=4)
+    assert exc.value.status == 431
+    with pytest.raises(HTTPError) as exc:
+        parse_request_head(b"GET / HTTP/1.1\r\nBad Header: v\r\n\r\n")
+    assert exc.value.status == 400
+    with pytest.raises(HTTPError):
+        parse_request_head(b"\r\n\r\n")
+
+
+def test_headers_dict_methods_lowercase_names():
+    headers = Headers({"Host": "x"}, Accept="*/*")
+    headers.update({"X-A": "1"}, Accept_Language="ru")
+    headers.update([("X-B", "2")])
+    assert set(headers) == {"host", "accept", "x-a", "accept_language", "x-b"}
+    assert headers.setdefault("X-A", "other") == "1" and headers.setdefault("X-C", "3") == "3"
+    assert headers.pop("HOST") == "x" and headers.pop("Host", None) is None
+    copy = headers.copy()
+    assert isinstance(copy, Headers) and copy["x-c"] == "3"
+
+
+def test_parse_from_bytearray_and_views():
+    raw = bytearray(b"GET /a?b=1 HTTP/1.1\r\nHost: x\r\n\r\n")
+    for data in (raw, memoryview(raw), memoryview(b"--" + bytes(raw))[2:]):
+        method, path, query, _, headers = parse_request_head(data)
+        assert (method, path, query, headers["host"]) == ("GET", "/a", "b=1", "x")
+    assert parse_chunk_size(memoryview(b"1a;ext=1\r\n")) == 26
+    assert parse_chunk_size(bytearray(b" ff \r\n")) == 255
+
+
+def test_read_request_head_timeouts():
+    async def read(*chunks, timeout=0.05, header_timeout=0.05):
+        reader = asyncio.StreamReader()
+        for chunk in chunks:
+            reader.feed_data(chunk)
+        return await read_request_head(reader, timeout=timeout, header_timeout=header_timeout)
+
+    assert asyncio.run(read(b"\r\nGET / HTTP/1.1\r\n\r\nnext")) == b"GET / HTTP/1.1\r\n\r\n"
+    assert asyncio.run(read()) is None                      # простой — молча закрываем
+    with pytest.raises(HTTPError) as exc:
+        asyncio.run(read(b"GET / HTTP/1.1\r\nHo"))         # голова не дошла за header_timeout
+    assert exc.value.status == 408
+    with pytest.raises(HTTPError) as exc:
+        asyncio.run(read(b"GET / HTTP/1.1\r\nHo", timeout=None))
+    assert exc.value.status == 408
+
+
+def test_body_length():
+    assert body_length(Headers({"Content-Length": "10"})) == 10
+    assert body_length(Headers()) == 0
+    assert body_length(Headers({"Transfer-Encoding": "chunked"})) is None
+    with pytest.raises(HTTPError) as exc:
+        body_length(Headers({"Transfer-Encoding": "gzip"}))
+    assert exc.value.status == 501
+
+
+def test_iter_chunked():
+    async def collect():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"4;ext=1\r\nWiki\r\n5\r\npedia\r\n0\r\nX-Trailer: 1\r\n\r\n")
+        reader.feed_eof()
+        return [chunk async for chunk in iter_chunked(reader)]
+
+    assert asyncio.run(collect()) == [b"Wiki", b"pedia"]
+
+    async def pieces():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"a\r\n0123456789\r\n0\r\n\r\n")
+        reader.feed_eof()
+        return [chunk async for chunk in iter_chunked(reader, piece_size=4)]
+
+    assert asyncio.run(pieces()) == [b"0123", b"4567", b"89"]
+
+    async def limited():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"a\r\n0123456789\r\n500000\r\n")
+        return [chunk async for chunk in iter_chunked(reader, max_size=20, piece_size=4)]
+
+    with pytest.raises(HTTPError) as exc:
+        asyncio.run(limited())
+    assert exc.value.status == 413
+
+
+def test_request_lazy_attributes():
+    req = Request("GET", "/items", {"content-type": "Application/JSON; charset=utf-8"}, b"", "page=2&page=3&x=")
+    assert "args" not in req.__dict__
+    assert req.args == {"page": "2", "x": ""}
+    assert req.content_type == "application/json"
+    assert req.headers["Content-Type"].startswith("Application")
+    assert req.full_path == "/items?page=2&page=3&x="
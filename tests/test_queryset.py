@@ -0,0 +1,72 @@
+# tests/test_queryset.py
+
+import pytest
+from miniweb.orm.models import Model
+from miniweb.orm.fields import StringField, IntegerField, ForeignKey
+
+
+class Writer(Model):
+    name = StringField()
+
+
+class Novel(Model):
+    title = StringField()
+    pages = IntegerField(default=0)
+    writer = ForeignKey(Writer)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_db():
+    Model.connect(":memory:")
+    Model.create_all()
+    tolstoy = Writer(name="Tolstoy").save()
+    chekhov = Writer(name="Chekhov").save()
+    for title, pages, w in [("War and Peace", 1225, tolstoy), ("Anna Karenina", 864, tolstoy),
+                            ("Hadji Murat", 120, tolstoy), ("The Steppe", 90, chekhov),
+                            ("Ward No. 6", 60, chekhov)]:
+        Novel(title=title, pages=pages, writer=w).save()
+    yield
+
+
+def test_queryset_is_lazy_and_single_query():
+    queries = []
+    Model._connection.set_trace_callback(queries.append)
+    try:
+        tolstoy = Writer.objects.get(name="Tolstoy")
+        queries.clear()
+        qs = Novel.objects.filter(writer=tolstoy, pages__gt=100).order_by("-pages")
+        assert queries == []
+        assert [n.title for n in qs.limit(2).offset(1)] == ["Anna Karenina", "Hadji Murat"]
+        assert len(queries) == 1 and "LIMIT 2 OFFSET 1" in queries[0]
+    finally:
+        Model._connection.set_trace_callback(None)
+
+
+def test_lookups():
+    assert Novel.objects.filter(pages__lte=90).count() == 2
+    assert Novel.objects.filter(title__startswith="Wa").count() == 2
+    assert Novel.objects.filter(title__contains="%").count() == 0
+    assert Novel.objects.filter(pages__in=[60, 90]).count() == 2
+    assert Novel.objects.exclude(pages__gt=100).count() == 2
+    assert Novel.objects.filter(writer__isnull=True).exists() is False
+    assert Novel.objects.filter(pages__in=[]).count() == 0
+    with pytest.raises(ValueError):
+        Novel.objects.filter(pages__between=1)
+
+
+def test_count_exists_values():
+    assert Novel.objects.count() == 5
+    assert Novel.objects.limit(2).count() == 2
+    assert Novel.objects.filter(pages__gt=5000).exists() is False
+    assert Novel.objects.order_by("pages").values_list("title", flat=True)[:2] == ["Ward No. 6", "The Steppe"]
+    assert Novel.objects.filter(pages=90).values("title", "pages") == [{"title": "The Steppe", "pages": 90}]
+    assert Writer.objects.order_by("name").values_list("id", "name") == [(2, "Chekhov"), (1, "Tolstoy")]
+
+
+def test_batched_iteration_and_related():
+    qs = Novel.objects.select_related("writer").order_by("id").batch_size(2)
+    names = [n.writer.name for n in qs]
+    assert names == ["Tolstoy"] * 3 + ["Chekhov"] * 2
+    assert Novel.objects.order_by("id").first().title == "War and Peace"
+    with pytest.raises(ValueError):
+        Novel.objects.get(writer=1)
@@ -37,4 +37,42 @@ def test_parse_form_success():
 
 def test_parse_form_wrong_type():
     req = DummyRequest({"Content-Type": "application/json"}, b"foo=bar")
-    assert parse_form(req) == {}
\ No newline at end of file
+    assert parse_form(req) == {}
+
+
+def test_parse_multipart_streaming(tmp_path):
+    import asyncio
+    from miniweb.core.server import Request
+    from miniweb.utils.request import parse_multipart
+
+    big = b"x" * 5000
+    body = (
+        b"preamble\r\n--BND\r\n"
+        b'Content-Disposition: form-data; name="title"\r\n\r\n'
+        b"Hello\r\n--BND\r\n"
+        b'Content-Disposition: form-data; name="doc"; filename="a.bin"\r\n'
+        b"Content-Type: application/octet-stream\r\n\r\n"
+        + big + b"\r\n--BND--\r\n"
+    )
+
+    class Chunks:
+        # отдаём тело мелкими кусками, чтобы разделители разрывались между ними
+        done = False
+
+        async def __aiter__(self):
+            for i in range(0, len(body), 7):
+                yield body[i:i + 7]
+            self.done = True
+
+    req = Request("POST", "/", {"Content-Type": "multipart/form-data; boundary=BND"},
+                  None, body_reader=Chunks())
+    fields, files = asyncio.run(parse_multipart(req, spool_size=1024))
+    assert fields == {"title": "Hello"}
+    upload = files["doc"]
+    assert upload.filename == "a.bin" and upload.size == len(big)
+    # больше spool_size — ушло на диск: у файла в памяти имени нет
+    assert upload.file.name is not None
+    upload.file.seek(0)
+    assert upload.file.read() == big
+    upload.save(tmp_path / "out.bin")
+    assert (tmp_path / "out.bin").read_bytes() == big
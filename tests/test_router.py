@@ -0,0 +1,77 @@
+# tests/test_router.py
+
+import pytest
+from miniweb.core.router import MethodNotAllowed, Router
+
+
+def h(name):
+    def handler(request, **params):
+        return name
+    handler.__name__ = name
+    return handler
+
+
+@pytest.fixture
+def router():
+    r = Router()
+    r.add_route("GET", "/", h("index"))
+    r.add_route("GET", "/users/me", h("me"))
+    r.add_route("GET", "/users/<int:uid>", h("user"))
+    r.add_route("GET", "/users/<str:name>", h("user_by_name"))
+    r.add_route("GET", "/price/<float:value>", h("price"))
+    r.add_route("GET", "/files/<path:rest>", h("files"))
+    r.add_route("GET", "/dl/<path:rest>/raw", h("dl_raw"))
+    r.add_route("POST", "/users/<int:uid>", h("user_update"))
+    return r
+
+
+def test_static_before_params(router):
+    handler, params = router.match("GET", "/users/me")
+    assert handler.__name__ == "me" and params == {}
+
+
+def test_converters(router):
+    handler, params = router.match("GET", "/users/42")
+    assert handler.__name__ == "user" and params == {"uid": 42}
+    handler, params = router.match("GET", "/users/alice")
+    assert handler.__name__ == "user_by_name" and params == {"name": "alice"}
+    handler, params = router.match("GET", "/price/9.5")
+    assert params == {"value": 9.5}
+
+
+def test_path_converter(router):
+    handler, params = router.match("GET", "/files/a/b/c.txt")
+    assert handler.__name__ == "files" and params == {"rest": "a/b/c.txt"}
+    handler, params = router.match("GET", "/dl/a/b/raw")
+    assert handler.__name__ == "dl_raw" and params == {"rest": "a/b"}
+    with pytest.raises(FileNotFoundError):
+        router.match("GET", "/dl/raw")
+
+
+def test_method_dispatch_and_405(router):
+    handler, _ = router.match("post", "/users/7")
+    assert handler.__name__ == "user_update"
+    with pytest.raises(MethodNotAllowed) as exc:
+        router.match("DELETE", "/users/7")
+    assert exc.value.allowed == ["GET", "POST"]
+    with pytest.raises(MethodNotAllowed):
+        router.match("POST", "/")
+
+
+def test_not_found(router):
+    with pytest.raises(FileNotFoundError):
+        router.match("GET", "/nope/1")
+    router.set_404(h("missing"))
+    handler, _ = router.match("GET", "/nope/1")
+    assert handler.__name__ == "missing"
+
+
+def test_lru_cache_is_bounded():
+    r = Router(cache_size=2)
+    r.add_route("GET", "/item/<int:id>", h("item"))
+    for i in range(5):
+        assert r.match("GET", f"/item/{i}")[1] == {"id": i}
+    assert list(r._cache) == [("GET", "/item/3"), ("GET", "/item/4")]
+    # новый маршрут сбрасывает кэш
+    r.add_route("GET", "/item/new", h("new"))
+    assert not r._cache
@@ -0,0 +1,410 @@
+# tests/test_server.py
+
+import asyncio
+
+from helpers import exchange
+from miniweb.core.server import App
+
+
+def make_app(**kwargs):
+    app = App(**kwargs)
+
+    @app.route("/")
+    def index(request):
+        return "hello"
+
+    @app.route("/user/<int:uid>")
+    async def user(request, uid):
+        return f"user {uid}"
+
+    return app
+
+
+def test_connection_close():
+    app = make_app()
+    data = asyncio.run(exchange(app, b"GET / HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"))
+    assert data.startswith(b"HTTP/1.1 200")
+    assert b"Content-Length: 5\r\n" in data
+    assert b"Connection: close\r\n" in data
+    assert data.endswith(b"hello")
+
+
+def test_pipelined_requests_in_order():
+    app = make_app()
+    payload = (
+        b"GET /user/1 HTTP/1.1\r\nHost: x\r\n\r\n"
+        b"GET /user/2 HTTP/1.1\r\nHost: x\r\n\r\n"
+        b"GET / HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+    )
+    data = asyncio.run(exchange(app, payload))
+    assert data.count(b"HTTP/1.1 200") == 3
+    assert data.index(b"user 1") < data.index(b"user 2") < data.index(b"hello")
+    assert data.count(b"Connection: keep-alive") == 2
+
+
+def test_max_requests_per_connection():
+    app = make_app(max_requests_per_connection=2)
+    payload = b"GET / HTTP/1.1\r\nHost: x\r\n\r\n" * 3
+    data = asyncio.run(exchange(app, payload))
+    # второй ответ закрывает соединение, третий запрос не обслуживается
+    assert data.count(b"HTTP/1.1 200") == 2
+    assert data.rstrip(b"hello").endswith(b"Connection: close\r\n\r\n")
+
+
+def test_http10_closes_by_default():
+    app = make_app()
+    data = asyncio.run(exchange(app, b"GET / HTTP/1.0\r\n\r\n"))
+    assert b"Connection: close\r\n" in data
+
+
+def test_sync_handler_runs_in_executor():
+    import threading
+    app = App()
+    seen = {}
+
+    @app.route("/sync")
+    def sync_view(request):
+        seen["sync"] = threading.current_thread().name
+        return "ok"
+
+    @app.route("/inline", inline=True)
+    def inline_view(request):
+        seen["inline"] = threading.current_thread().name
+        return "ok"
+
+    asyncio.run(exchange(app, b"GET /sync HTTP/1.1\r\n\r\nGET /inline HTTP/1.1\r\nConnection: close\r\n\r\n"))
+    app._shutdown_executor()
+    assert seen["sync"].startswith("miniweb-handler")
+    assert seen["inline"] == threading.main_thread().name
+    assert app.executor_stats()["completed"] == 1
+
+
+def test_executor_queue_limit_returns_503():
+    import time
+    app = App(thread_pool_size=1, thread_queue_limit=1)
+
+    @app.route("/slow")
+    def slow(request):
+        time.sleep(0.2)
+        return "done"
+
+    async def scenario():
+        server = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def fetch():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /slow HTTP/1.1\r\nConnection: close\r\n\r\n")
+            data = await reader.read()
+            writer.close()
+            return data
+
+        async with server:
+            return await asyncio.gather(*(fetch() for _ in range(4)))
+
+    results = asyncio.run(scenario())
+    app._shutdown_executor()
+    statuses = sorted(r.split(b" ", 2)[1] for r in results)
+    assert b"503" in statuses and b"200" in statuses
+
+
+def test_query_string_and_chunked_body():
+    app = App()
+
+    @app.route("/echo", method="POST", inline=True)
+    def echo(request):
+        return f"{request.args.get('page')}:{request.body.decode()}"
+
+    payload = (
+        b"POST /echo?page=2 HTTP/1.1\r\ntransfer-encoding: chunked\r\nConnection: close\r\n\r\n"
+        b"3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n"
+    )
+    data = asyncio.run(exchange(app, payload))
+    assert data.startswith(b"HTTP/1.1 200")
+    assert data.endswith(b"2:abcde")
+
+
+def test_too_many_headers_returns_431():
+    app = make_app(max_headers=2)
+    payload = b"GET / HTTP/1.1\r\nA: 1\r\nB: 2\r\nC: 3\r\n\r\n"
+    data = asyncio.run(exchange(app, payload))
+    assert data.startswith(b"HTTP/1.1 431")
+
+
+def test_body_limit_and_streaming_route():
+    app = App(max_body_size=10)
+
+    @app.route("/upload", method="POST", stream=True)
+    async def upload(request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return str(size)
+
+    @app.route("/small", method="POST")
+    def small(request):
+        return request.body
+
+    data = asyncio.run(exchange(app, b"POST /small HTTP/1.1\r\nContent-Length: 11\r\n\r\nhello world"))
+    assert data.startswith(b"HTTP/1.1 413")
+
+    payload = b"POST /upload HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n6\r\nabcdef\r\n6\r\nghijkl\r\n0\r\n\r\n"
+    data = asyncio.run(exchange(app, payload))
+    assert data.startswith(b"HTTP/1.1 413")
+    assert b"Connection: close" in data
+
+    # объявленный чанк в 5 МБ отвергается по размеру, данные не ждём и не буферизуем
+    data = asyncio.run(exchange(app, b"POST /upload HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+                                      b"500000\r\n" + b"x" * 100))
+    assert data.startswith(b"HTTP/1.1 413")
+
+    app.max_body_size = 100
+    payload = (b"POST /upload HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello"
+               b"POST /small HTTP/1.1\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+    data = asyncio.run(exchange(app, payload))
+    app._shutdown_executor()
+    assert data.count(b"HTTP/1.1 200") == 2
+    assert data.endswith(b"ok")
+
+
+def test_streaming_responses(tmp_path):
+    from miniweb.core.server import Response
+
+    app = App()
+    target = tmp_path / "data.csv"
+    target.write_bytes(b"id,title\n1,Book\n")
+
+    @app.route("/gen", inline=True)
+    def gen(request):
+        return Response(200, {"Content-Type": "text/csv"}, (f"row{i}\n" for i in range(3)))
+
+    @app.route("/agen")
+    async def agen(request):
+        async def rows():
+            yield b"a"
+            await asyncio.sleep(0)
+            yield "b"
+        return rows()
+
+    @app.route("/file", inline=True)
+    def file(request):
+        return target
+
+    @app.route("/missing", inline=True)
+    def missing(request):
+        return "nope", 404
+
+    payload = (b"GET /gen HTTP/1.1\r\n\r\n"
+               b"GET /agen HTTP/1.1\r\n\r\n"
+               b"GET /missing HTTP/1.1\r\n\r\n"
+               b"GET /file HTTP/1.1\r\nConnection: close\r\n\r\n")
+    data = asyncio.run(exchange(app, payload))
+    assert b"Transfer-Encoding: chunked\r\nConnection: keep-alive\r\n\r\n5\r\nrow0\n\r\n5\r\nrow1\n\r\n5\r\nrow2\n\r\n0\r\n\r\n" in data
+    assert b"1\r\na\r\n1\r\nb\r\n0\r\n\r\n" in data
+    assert b"HTTP/1.1 404 Not Found" in data
+    assert b"Content-Type: text/csv; charset=utf-8\r\nContent-Length: 16\r\n" in data
+    assert data.endswith(b"id,title\n1,Book\n")
+
+    # HTTP/1.0 не понимает chunked: тело идёт как есть, соединение закрывается
+    data = asyncio.run(exchange(app, b"GET /gen HTTP/1.0\r\nConnection: keep-alive\r\n\r\n"))
+    assert b"Transfer-Encoding" not in data and b"Connection: close" in data
+    assert data.endswith(b"row0\nrow1\nrow2\n")
+
+
+def test_blocking_sync_generator_does_not_stall_loop():
+    import time
+    from miniweb.core.server import Response
+
+    app = make_app()
+
+    @app.route("/slow", inline=True)
+    def slow(request):
+        def rows():
+            yield "start\n"
+            time.sleep(0.5)
+            yield "end\n"
+        return Response(200, {"Content-Type": "text/plain"}, rows())
+
+    async def run():
+        server = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def fetch(path):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {path} HTTP/1.1\r\nConnection: close\r\n\r\n".encode())
+            data = await reader.read()
+            writer.close()
+            return data, time.perf_counter()
+
+        async with server:
+            slow_task = asyncio.create_task(fetch("/slow"))
+            await asyncio.sleep(0.1)
+            fast, fast_done = await fetch("/")
+            slow_data, slow_done = await slow_task
+        return fast, fast_done, slow_data, slow_done
+
+    fast, fast_done, slow_data, slow_done = asyncio.run(run())
+    app._shutdown_executor()
+    # пока генератор спит в потоке пула, соседний запрос обслуживается
+    assert fast.endswith(b"hello") and fast_done < slow_done - 0.2
+    assert slow_data.endswith(b"6\r\nstart\n\r\n4\r\nend\n\r\n0\r\n\r\n")
+
+
+def test_metrics_endpoint():
+    app = make_app()
+    app.enable_metrics()
+
+    @app.route("/boom", inline=True)
+    def boom(request):
+        raise ValueError("boom")
+
+    payload = (b"GET / HTTP/1.1\r\n\r\n"
+               b"GET /user/7 HTTP/1.1\r\n\r\n"
+               b"GET /boom HTTP/1.1\r\n\r\n"
+               b"GET /nowhere HTTP/1.1\r\n\r\n"
+               b"GET /__metrics HTTP/1.1\r\nConnection: close\r\n\r\n")
+    data = asyncio.run(exchange(app, payload)).decode()
+    body = data.rsplit("\r\n\r\n", 1)[1]
+    assert "Content-Type: text/plain; version=0.0.4" in data
+    # маршрут — шаблон пути, а не конкретный URL
+    assert 'miniweb_requests_total{route="/user/<int:uid>",method="GET",status="200"' in body
+    assert 'miniweb_requests_total{route="<unmatched>",method="GET",status="404"' in body
+    assert 'miniweb_request_duration_seconds_count{route="/",method="GET"' in body
+    assert 'miniweb_request_duration_seconds_bucket{route="/",method="GET",le="+Inf"' in body
+    assert 'miniweb_handler_exceptions_total{route="/boom",exception="ValueError"' in body
+    assert app.metrics.handler_calls == {"async": 2, "inline": 1, "thread": 1}
+    assert "miniweb_connections{" in body and "miniweb_requests_in_flight{" in body
+    assert app._connections == 0
+
+
+def test_profile_query_in_debug_mode():
+    app = make_app()
+    request = b"GET /?__profile=1 HTTP/1.1\r\nConnection: close\r\n\r\n"
+    # без debug параметр ничего не меняет
+    assert asyncio.run(exchange(app, request)).endswith(b"hello")
+
+    app.debug = True
+    data = asyncio.run(exchange(app, request))
+    assert b"X-Profiled-Status: 200" in data
+    assert b"function calls" in data and b"Ordered by: cumulative time" in data
+
+    data = asyncio.run(exchange(app, b"GET /?__profile=flame HTTP/1.1\r\nConnection: close\r\n\r\n"))
+    assert b"X-Profiled-Status: 200" in data
+
+    @app.route("/slow")
+    async def slow(request):
+        await asyncio.sleep(0.2)
+        return "done"
+
+    async def concurrent():
+        first = asyncio.create_task(
+            exchange(app, b"GET /slow?__profile=1 HTTP/1.1\r\nConnection: close\r\n\r\n"))
+        await asyncio.sleep(0.05)
+        second = await exchange(app, b"GET /?__profile=1 HTTP/1.1\r\nConnection: close\r\n\r\n")
+        return await first, second
+
+    # профили запросов в одном потоке loop смешались бы — второй отклоняется
+    first, second = asyncio.run(concurrent())
+    assert b"X-Profiled-Status: 200" in first
+    assert second.startswith(b"HTTP/1.1 409")
+
+
+def test_slow_header_and_body_get_408():
+    app = make_app(header_timeout=0.1, body_timeout=0.1)
+
+    @app.route("/upload", method="POST")
+    async def upload(request):
+        return "got it"
+
+    async def scenario():
+        server = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def send(payload):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(payload)
+            data = await asyncio.wait_for(reader.read(), timeout=2)
+            writer.close()
+            return data
+
+        async with server:
+            # голова без завершающей пустой строки, тело короче Content-Length
+            slow_head = await send(b"GET / HTTP/1.1\r\nHost: x\r\n")
+            slow_body = await send(b"POST /upload HTTP/1.1\r\nContent-Length: 10\r\n\r\nabc")
+            idle = await send(b"")
+        return slow_head, slow_body, idle
+
+    slow_head, slow_body, idle = asyncio.run(scenario())
+    assert slow_head.startswith(b"HTTP/1.1 408") and b"header timeout" in slow_head
+    assert slow_body.startswith(b"HTTP/1.1 408") and b"Connection: close" in slow_body
+    # соединение без единого байта закрывается молча
+    assert idle == b""
+
+
+def test_overload_is_shed_with_503():
+    app = make_app(max_connections=2, max_inflight=1)
+    app.enable_metrics()
+    gate = asyncio.Event()
+
+    @app.route("/wait")
+    async def wait(request):
+        await gate.wait()
+        return "done"
+
+    async def scenario():
+        server = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /wait HTTP/1.1\r\n\r\n")
+            await asyncio.sleep(0.05)
+            # второе соединение принято, но запрос сверх max_inflight
+            r2, w2 = await asyncio.open_connection("127.0.0.1", port)
+            w2.write(b"GET / HTTP/1.1\r\n\r\n")
+            busy = await asyncio.wait_for(r2.readuntil(b"\r\n\r\n"), timeout=2)
+            # третье — сверх max_connections: 503 без чтения запроса
+            r3, w3 = await asyncio.open_connection("127.0.0.1", port)
+            full = await asyncio.wait_for(r3.read(), timeout=2)
+            w2.close()
+            w3.close()
+            gate.set()
+            writer.write(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+            served = await asyncio.wait_for(reader.read(), timeout=2)
+            writer.close()
+        return busy, full, served
+
+    busy, full, served = asyncio.run(scenario())
+    assert busy.startswith(b"HTTP/1.1 503") and b"Retry-After: 1\r\n" in busy
+    assert full.startswith(b"HTTP/1.1 503") and b"Connection: close" in full
+    assert served.count(b"HTTP/1.1 200") == 2
+    assert app.metrics.shed == {"inflight": 1, "connections": 1}
+
+
+def test_queue_time_shedding():
+    import time
+    app = App(thread_pool_size=1, thread_queue_limit=0, max_queue_time=0.05, max_inflight=0)
+
+    @app.route("/slow")
+    def slow(request):
+        time.sleep(0.2)
+        return "done"
+
+    async def scenario():
+        server = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def fetch():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /slow HTTP/1.1\r\nConnection: close\r\n\r\n")
+            data = await reader.read()
+            writer.close()
+            return data
+
+        async with server:
+            return await asyncio.gather(*(fetch() for _ in range(3)))
+
+    results = asyncio.run(scenario())
+    app._shutdown_executor()
+    statuses = sorted(r.split(b" ", 2)[1] for r in results)
+    # первый запрос обработан, остальные прождали поток дольше 50 мс
+    assert statuses == [b"200", b"503", b"503"]
@@ -0,0 +1,153 @@
+# tests/test_static.py
+
+import asyncio
+import gzip
+import os
+
+import pytest
+
+from helpers import exchange
+from miniweb.core.server import App
+from miniweb.core.static import parse_range
+
+BIG = bytes(range(256)) * 1024  # 256 КБ — больше cache_file_size, идёт через sendfile
+
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / "static"
+    (root / "css").mkdir(parents=True)
+    (root / "css" / "site.css").write_text("body { color: red }")
+    (root / "app.js").write_text("console.log('plain')")
+    (root / "app.js.gz").write_bytes(gzip.compress(b"console.log('plain')"))
+    (root / "big.bin").write_bytes(BIG)
+    (root / ".env").write_text("SECRET=1")
+    (tmp_path / "secret.txt").write_text("outside")
+    app = App()
+    files = app.static("/static/", str(root), cache_file_size=1024)
+    return app, files, root
+
+
+def get(app, path: str, *headers: str, method: str = "GET"):
+    extra = "".join(f"{h}\r\n" for h in headers)
+    raw = asyncio.run(exchange(app, f"{method} {path} HTTP/1.1\r\nHost: x\r\n{extra}Connection: close\r\n\r\n"
+                                    .encode()))
+    head, _, body = raw.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    status = int(lines[0].split()[1])
+    hdrs = dict(line.split(": ", 1) for line in lines[1:])
+    return status, hdrs, body
+
+
+def test_serves_small_and_large_files(site):
+    app, files, _ = site
+    status, headers, body = get(app, "/static/css/site.css")
+    assert status == 200 and body == b"body { color: red }"
+    assert headers["Content-Type"] == "text/css; charset=utf-8"
+    assert headers["Accept-Ranges"] == "bytes"
+    assert "ETag" in headers and "Last-Modified" in headers
+    assert headers["Cache-Control"] == "public, max-age=3600"
+
+    status, headers, body = get(app, "/static/big.bin")
+    assert status == 200 and body == BIG
+    assert headers["Content-Length"] == str(len(BIG))
+    assert "big.bin" not in str(list(files._cache))
+
+
+def test_conditional_requests(site):
+    app, _, _ = site
+    _, headers, _ = get(app, "/static/big.bin")
+    etag, last_modified = headers["ETag"], headers["Last-Modified"]
+
+    status, headers, body = get(app, "/static/big.bin", f"If-None-Match: {etag}")
+    assert status == 304 and body == b"" and headers["ETag"] == etag
+    assert get(app, "/static/big.bin", f"If-Modified-Since: {last_modified}")[0] == 304
+    assert get(app, "/static/big.bin", 'If-None-Match: "other"')[0] == 200
+    assert get(app, "/static/big.bin", "If-Modified-Since: Thu, 01 Jan 1970 00:00:00 GMT")[0] == 200
+
+
+def test_range_requests(site):
+    app, _, _ = site
+    status, headers, body = get(app, "/static/big.bin", "Range: bytes=1000-1999")
+    assert status == 206 and body == BIG[1000:2000]
+    assert headers["Content-Range"] == f"bytes 1000-1999/{len(BIG)}"
+    assert headers["Content-Length"] == "1000"
+
+    status, _, body = get(app, "/static/big.bin", "Range: bytes=-10")
+    assert status == 206 and body == BIG[-10:]
+    status, _, body = get(app, "/static/css/site.css", "Range: bytes=5-")
+    assert status == 206 and body == b"{ color: red }"
+
+    status, headers, _ = get(app, "/static/big.bin", f"Range: bytes={len(BIG)}-")
+    assert status == 416 and headers["Content-Range"] == f"bytes */{len(BIG)}"
+    # If-Range с устаревшим валидатором — файл целиком
+    status, _, body = get(app, "/static/big.bin", "Range: bytes=0-9", 'If-Range: "stale"')
+    assert status == 200 and body == BIG
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 100)
+    assert parse_range("bytes=990-2000", 1000) == (990, 10)
+    assert parse_range("bytes=-2000", 1000) == (0, 1000)
+    assert parse_range("bytes=1000-", 1000) == (-1, 0)
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    assert parse_range("bytes=5-1", 1000) is None
+
+
+def test_precompressed_sibling(site):
+    app, _, _ = site
+    status, headers, body = get(app, "/static/app.js", "Accept-Encoding: gzip, br")
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) == b"console.log('plain')"
+    assert headers["Vary"] == "Accept-Encoding"
+    assert "javascript" in headers["Content-Type"]
+
+    status, headers, body = get(app, "/static/app.js", "Accept-Encoding: gzip;q=0")
+    assert body == b"console.log('plain')" and "Content-Encoding" not in headers
+    assert headers["Vary"] == "Accept-Encoding"
+
+
+def test_path_traversal_is_rejected(site, tmp_path):
+    app, _, root = site
+    os.symlink(tmp_path / "secret.txt", root / "link.txt")
+    for path in ("/static/../secret.txt", "/static/%2e%2e/secret.txt", "/static/css/..%2f..%2fsecret.txt",
+                 "/static/.env", "/static//etc/passwd", "/static/link.txt", "/static/css",
+                 "/static/missing.css", "/static/a%00.css"):
+        status, _, body = get(app, path)
+        assert status == 404, path
+        assert b"SECRET" not in body and b"outside" not in body
+
+
+def test_head_sends_headers_only(site):
+    app, _, _ = site
+    status, headers, body = get(app, "/static/big.bin", method="HEAD")
+    assert status == 200 and body == b""
+    assert headers["Content-Length"] == str(len(BIG))
+
+
+def test_memory_cache_follows_file_changes(site):
+    app, files, root = site
+    assert get(app, "/static/css/site.css")[2] == b"body { color: red }"
+    assert get(app, "/static/css/site.css")[2] == b"body { color: red }"
+    assert files.hits == 1 and files.misses == 1
+
+    path = root / "css" / "site.css"
+    stat = path.stat()
+    path.write_text("body { color: blue }")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert get(app, "/static/css/site.css")[2] == b"body { color: blue }"
+    assert files.misses == 2
+
+
+def test_compressed_small_file_revalidates(site):
+    app, _, root = site
+    (root / "page.html").write_text("<p>hello</p>" * 50)  # меньше cache_file_size: тело — bytes
+    app.enable_compression(min_size=100)
+    app.compressor.encodings = ("gzip",)
+    status, headers, body = get(app, "/static/page.html", "Accept-Encoding: gzip")
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    assert headers["ETag"].endswith('-gzip"')
+    status, headers, _ = get(app, "/static/page.html", "Accept-Encoding: gzip",
+                             f"If-None-Match: {headers['ETag']}")
+    assert status == 304 and headers["ETag"].endswith('-gzip"')
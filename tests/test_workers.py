@@ -0,0 +1,96 @@
+# tests/test_workers.py
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from helpers import fetch, free_port, wait_ready
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="нужен os.fork")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_pid(port: int) -> int:
+    return int(fetch(port, "/pid").split(b"\r\n\r\n", 1)[1])
+
+
+@pytest.fixture
+def master():
+    port = free_port()
+    script = textwrap.dedent(f"""
+        import os
+        from miniweb.core.server import App
+        app = App(port={port})
+
+        @app.route("/pid", inline=True)
+        def pid(request):
+            return str(os.getpid())
+
+        app.run(workers=2)
+    """)
+    proc = subprocess.Popen([sys.executable, "-c", script], cwd=ROOT,
+                            stdout=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        yield proc, port
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+def test_workers_serve_and_shutdown(master):
+    proc, port = master
+    pids = {get_pid(port) for _ in range(30)}
+    assert proc.pid not in pids
+    assert 1 <= len(pids) <= 2
+
+    proc.send_signal(signal.SIGTERM)
+    assert proc.wait(timeout=10) == 0
+
+
+def test_crashed_worker_is_restarted(master):
+    proc, port = master
+    victim = get_pid(port)
+    os.kill(victim, signal.SIGKILL)
+
+    deadline = time.monotonic() + 5
+    pids = set()
+    while time.monotonic() < deadline and len(pids - {victim}) < 2:
+        try:
+            pids.add(get_pid(port))
+        except OSError:
+            pass
+    assert len(pids - {victim}) == 2
+
+
+def test_worker_connections_use_nodelay():
+    import asyncio
+    from miniweb.core.workers import create_listen_socket
+
+    sock = create_listen_socket("127.0.0.1", 0)
+
+    async def check():
+        flags = []
+
+        async def handle(reader, writer):
+            raw = writer.get_extra_info("socket")
+            flags.append(raw.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+            writer.close()
+
+        server = await asyncio.start_server(handle, sock=sock)
+        async with server:
+            _, writer = await asyncio.open_connection(*sock.getsockname())
+            await asyncio.sleep(0.05)
+            writer.close()
+        return flags
+
+    # без TCP_NODELAY каждый ответ keep-alive задерживается delayed ACK клиента
+    assert asyncio.run(check()) == [1]